@@ -0,0 +1,65 @@
+"""
+Authentication classes for the REST API
+"""
+from asgiref.sync import sync_to_async
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenUser
+
+
+class ClaimsMissing(Exception):
+    """The token has no user claims and its user must be queried"""
+
+
+class StatelessJWTCookieAuthentication(JWTCookieAuthentication):
+    """
+    JWT authentication trusting the signed userId, is_active and is_staff
+    claims instead of loading the user on every request. Tokens issued
+    without those claims fall back to the database lookup.
+    """
+
+    claims_only = False
+
+    def get_user(self, validated_token):
+        user = self.get_claims_user(validated_token)
+        if user is None:
+            if self.claims_only:
+                raise ClaimsMissing()
+            return super().get_user(validated_token)
+        return user
+
+    def get_claims_user(self, validated_token):
+        """Build the user from the token claims, or None if they are missing"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not all(claim in validated_token for claim in ("is_active", "is_staff")):
+            return None
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return TokenUser.from_claims(
+            user_id=user_id,
+            is_active=validated_token["is_active"],
+            is_staff=validated_token["is_staff"],
+        )
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views. Decoding a token with the claims
+        needs no query and runs on the event loop; older tokens load
+        their user through the database thread.
+        """
+        self.claims_only = True
+        try:
+            return self.authenticate(request)
+        except ClaimsMissing:
+            pass
+        finally:
+            self.claims_only = False
+        return await sync_to_async(self.authenticate)(request)
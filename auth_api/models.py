@@ -0,0 +1,75 @@
+"""
+Auth models
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import User
+
+USER_CACHE_KEY = "auth_api:user:{}"
+# Kept out of the shared cache, read from the database when accessed
+UNCACHED_FIELDS = ("password", "last_login")
+
+
+def get_cached_user_values(user_id):
+    """
+    Return the values of the fields TokenUser defers, cached for a short
+    TTL, except UNCACHED_FIELDS.
+    """
+    key = USER_CACHE_KEY.format(user_id)
+    values = cache.get(key)
+    if values is None:
+        attnames = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname not in TokenUser.CLAIM_FIELDS + UNCACHED_FIELDS
+        ]
+        values = User.objects.filter(pk=user_id).values(*attnames).first()
+        if values is not None:
+            cache.set(key, values, getattr(settings, "JWT_USER_CACHE_TIMEOUT", 60))
+    return values
+
+
+class TokenUser(User):
+    """
+    User built from signed token claims. Fields missing from the claims
+    are deferred and loaded together from the user cache on first access,
+    the password and last login from the database.
+    """
+
+    CLAIM_FIELDS = ("userId", "is_active", "is_staff")
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, is_active, is_staff):
+        user_id = cls._meta.pk.to_python(user_id)
+        user = cls(userId=user_id, is_active=is_active, is_staff=is_staff)
+        for field in cls._meta.concrete_fields:
+            if field.attname not in cls.CLAIM_FIELDS:
+                del user.__dict__[field.attname]
+        user._state.adding = False
+        user._state.db = "default"
+        return user
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        cached = deferred.difference(UNCACHED_FIELDS)
+        if fields is None or not cached.issuperset(fields):
+            return super().refresh_from_db(using=using, fields=fields)
+        values = get_cached_user_values(self.pk)
+        if values is None:
+            raise self.DoesNotExist("User not found")
+        for attname in cached:
+            self.__dict__[attname] = values[attname]
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=TokenUser)
+@receiver(post_delete, sender=TokenUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(USER_CACHE_KEY.format(instance.pk))
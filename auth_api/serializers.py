@@ -0,0 +1,15 @@
+"""
+Serializers for auth_api
+"""
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair carrying the claims used by stateless authentication"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["is_active"] = user.is_active
+        token["is_staff"] = user.is_staff
+        return token
@@ -0,0 +1,98 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase
+
+from django.contrib.auth import get_user_model
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+
+CONNECTION_URL = reverse("auth_api:connection-verify")
+ME_URL = reverse("user_api:me")
+TASKS_URL = reverse("todo_api:tasks-list")
+
+
+class TestStatelessJWTAuthentication(TestCase):
+    """Stateless JWT authentication testing."""
+
+    def setUp(self):
+        """Setting up a user and a client with its access token."""
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="matias@email.com",
+            password="pass12345",
+            first_name="Matias",
+        )
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_token_carries_user_claims(self):
+        """Test issued tokens carry is_active and is_staff claims."""
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.assertTrue(token["is_active"])
+        self.assertFalse(token["is_staff"])
+
+    def test_authentication_without_user_query(self):
+        """Test authenticating does not query the user table."""
+        with self.assertNumQueries(0):
+            res = self.client.post(CONNECTION_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_fields_loaded_on_access(self):
+        """Test other fields are loaded once when a view reads them."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+        self.assertEqual(res.data["first_name"], "Matias")
+
+    def test_password_not_cached(self):
+        """Test the password hash is read from the database, not the cache."""
+        res = self.client.get(ME_URL)
+        token_user = res.wsgi_request.user
+        values = cache.get(f"auth_api:user:{self.user.pk}")
+
+        self.assertNotIn("password", values)
+        self.assertNotIn("last_login", values)
+        with self.assertNumQueries(1):
+            self.assertEqual(token_user.password, self.user.password)
+
+    def test_saving_user_invalidates_cache(self):
+        """Test saved user fields are not served stale from the cache."""
+        self.client.get(ME_URL)
+        self.user.first_name = "Other"
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["first_name"], "Other")
+
+    def test_inactive_claim_rejected(self):
+        """Test a token claiming an inactive user is rejected."""
+        token = AccessToken.for_user(self.user)
+        token["is_active"] = False
+        token["is_staff"] = False
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        res = self.client.post(CONNECTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_claims_falls_back_to_database(self):
+        """Test tokens issued before the claims still authenticate."""
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with self.assertNumQueries(1):
+            res = self.client.post(CONNECTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_lazy_user_scopes_querysets(self):
+        """Test views filter by the token user without loading it."""
+        res = self.client.get(TASKS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
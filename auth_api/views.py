@@ -18,6 +18,8 @@ class GoogleLoginView(SocialLoginView):  # Authorization Code grant
 
 class ConnectionView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
+    # Writes nothing, spends a read token
+    throttle_scope = "read"
 
     def post(self, request, *args, **kwargs):
         return Response({
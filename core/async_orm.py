@@ -0,0 +1,56 @@
+"""
+Async queryset helpers.
+
+Django 4.0 ships async views but not the async queryset API added in 4.1
+(`aiterator`, `acount`, `aget`...). These helpers use the native methods
+when they exist and otherwise run the query through `sync_to_async`, which
+keeps every query on the same database thread as Django 4.1 does.
+"""
+import itertools
+
+from asgiref.sync import sync_to_async
+
+
+async def aiterator(queryset, chunk_size=2000):
+    """Iterate over a queryset, fetching chunk_size rows per round trip."""
+    if hasattr(queryset, "aiterator"):
+        async for row in queryset.aiterator(chunk_size=chunk_size):
+            yield row
+        return
+    rows = queryset.iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: list(itertools.islice(rows, chunk_size)))
+    while True:
+        chunk = await fetch()
+        if not chunk:
+            return
+        for row in chunk:
+            yield row
+
+
+async def alist(queryset, chunk_size=2000):
+    """Evaluate a queryset into a list."""
+    return [row async for row in aiterator(queryset, chunk_size=chunk_size)]
+
+
+async def acount(queryset):
+    if hasattr(queryset, "acount"):
+        return await queryset.acount()
+    return await sync_to_async(queryset.count)()
+
+
+async def aget(queryset, *args, **kwargs):
+    if hasattr(queryset, "aget"):
+        return await queryset.aget(*args, **kwargs)
+    return await sync_to_async(queryset.get)(*args, **kwargs)
+
+
+async def aexists(queryset):
+    if hasattr(queryset, "aexists"):
+        return await queryset.aexists()
+    return await sync_to_async(queryset.exists)()
+
+
+async def aaggregate(queryset, *args, **kwargs):
+    if hasattr(queryset, "aaggregate"):
+        return await queryset.aaggregate(*args, **kwargs)
+    return await sync_to_async(queryset.aggregate)(*args, **kwargs)
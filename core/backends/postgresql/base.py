@@ -0,0 +1,143 @@
+"""
+PostgreSQL backend checking connections out of an in-process pool
+
+Closing a connection gives it back to the pool of its process, so with
+CONN_MAX_AGE = 0 each request holds one only while it runs. The POOL
+entry of the database settings holds MIN_SIZE, MAX_SIZE, MAX_LIFETIME,
+MAX_IDLE and TIMEOUT, see core.pool.ConnectionPool.
+
+Connections given back run DISCARD ALL, which returns a session to the
+parameters it was opened with, so the client encoding and time zone
+Django needs are passed when connecting rather than SET afterwards.
+"""
+import functools
+import os
+import threading
+
+from django.db.backends.postgresql.base import Database
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as PostgreSQLDatabaseCreation,
+)
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from core.pool import ConnectionPool, PoolTimeout
+
+# Pools of this process by pid, alias and connection parameters. Forked
+# workers must not share the sockets of their parent.
+pools = {}
+pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    """Ping a connection checked out of the pool"""
+    if connection.closed:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return rollback(connection)
+
+
+def reset_connection(connection):
+    """
+    Roll back the transaction a connection was left in and discard the
+    session state of its user: SET parameters, temporary tables, advisory
+    locks and prepared statements.
+    """
+    if not rollback(connection):
+        return False
+    # DISCARD ALL cannot run inside a transaction block
+    autocommit = connection.autocommit
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("DISCARD ALL")
+    finally:
+        connection.autocommit = autocommit
+    return True
+
+
+def rollback(connection):
+    """Roll back the open transaction, False when the connection is lost"""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the test database in use
+        self.connection.close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_pool(self, conn_params):
+        key = (os.getpid(), self.alias, repr(sorted(conn_params.items())))
+        with pools_lock:
+            pool = pools.get(key)
+            if pool is None:
+                options = self.settings_dict.get("POOL", {})
+                pool = pools[key] = ConnectionPool(
+                    functools.partial(super().get_new_connection, self.session_params(conn_params)),
+                    name=self.alias,
+                    min_size=options.get("MIN_SIZE", 0),
+                    max_size=options.get("MAX_SIZE", 10),
+                    max_lifetime=options.get("MAX_LIFETIME", 1800),
+                    max_idle=options.get("MAX_IDLE", 300),
+                    timeout=options.get("TIMEOUT", 10),
+                    check=check_connection,
+                    reset=reset_connection,
+                )
+            return pool
+
+    def session_params(self, conn_params):
+        """Connection parameters with the session defaults Django sets"""
+        params = {**conn_params, "client_encoding": "UTF8"}
+        if self.timezone_name:
+            options = conn_params.get("options", "")
+            params["options"] = f"{options} -c TimeZone={self.timezone_name}".strip()
+        return params
+
+    def close_pools(self):
+        """Close the pools of this alias in this process"""
+        with pools_lock:
+            closing = [
+                pools.pop(key)
+                for key in list(pools)
+                if key[:2] == (os.getpid(), self.alias)
+            ]
+        for pool in closing:
+            pool.close()
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        try:
+            connection = pool.get()
+        except PoolTimeout as exc:
+            # Raised as django.db.OperationalError by wrap_database_errors
+            raise Database.OperationalError(str(exc)) from exc
+        self.pool = pool
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps a connection closed inside atomic() until the
+                # block exits, so it cannot serve another thread meanwhile
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
@@ -0,0 +1,308 @@
+"""
+Django command to benchmark the API endpoints on a synthetic dataset.
+"""
+import itertools
+import json
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from todo_api.models import Task, TaskList, TaskStats
+
+PASSWORD = "benchpassword"
+WORDS = (
+    "buy call email plan review write fix book pay clean read send prepare "
+    "milk report invoice meeting dentist trip garden budget slides taxes"
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Generate users x lists x tasks with bulk_create inside a transaction
+    which is rolled back at the end, then drive every todo_api, user_api
+    and auth_api endpoint through the test client as the first user.
+    The report is JSON with sorted keys so runs can be diffed, and
+    `--baseline` flags endpoints that regressed against an earlier run.
+    """
+
+    help = "Benchmark the API endpoints on a synthetic dataset and report JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--lists", type=int, default=5, help="Lists per user")
+        parser.add_argument("--tasks", type=int, default=200, help="Tasks per list")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--endpoints", nargs="+", help="Only run these endpoints")
+        parser.add_argument(
+            "--use-cache",
+            action="store_true",
+            help="Serve repeated reads from the response cache",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the report to a file")
+        parser.add_argument("--baseline", help="Report from an earlier run to compare")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p95 growth reported as a regression",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for name in ("users", "lists", "tasks", "requests"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        overrides = {
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+            # Measure the endpoints, not the throttles
+            "REST_FRAMEWORK": {
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": dict.fromkeys(
+                    settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+                ),
+            },
+        }
+        if not options["use_cache"]:
+            overrides["CACHES"] = {
+                **settings.CACHES,
+                "bench": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            }
+            overrides["RESPONSE_CACHE_ALIAS"] = "bench"
+
+        with override_settings(**overrides), transaction.atomic():
+            started = time.perf_counter()
+            user = self.create_dataset(options)
+            generated = time.perf_counter() - started
+            report = {
+                "dataset": {
+                    "users": options["users"],
+                    "lists": options["users"] * options["lists"],
+                    "tasks": options["users"] * options["lists"] * options["tasks"],
+                    "seconds": round(generated, 3),
+                },
+                "endpoints": self.run_endpoints(user, options),
+            }
+            transaction.set_rollback(True)
+
+        if baseline is not None:
+            report["regressions"] = compare(baseline, report, options["threshold"])
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        self.stdout.write(output)
+        if report.get("regressions"):
+            raise CommandError(f"{len(report['regressions'])} endpoints regressed.")
+
+    def create_dataset(self, options):
+        """Bulk create the dataset and return the user the requests run as"""
+        rng = random.Random(options["seed"])
+        prefix = f"bench{time.time_ns()}"
+        password = make_password(PASSWORD)
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            (
+                User(
+                    email=f"{prefix}-{index}@example.com",
+                    username=User.objects.create_random_username(),
+                    password=password,
+                )
+                for index in range(options["users"])
+            ),
+            batch_size=options["batch_size"],
+        )
+        lists = TaskList.objects.bulk_create(
+            (
+                # The first list of every user is its inbox
+                TaskList(name="inbox" if index == 0 else f"List {index}", created_by=user)
+                for user in users
+                for index in range(options["lists"])
+            ),
+            batch_size=options["batch_size"],
+        )
+        now = timezone.now()
+
+        def tasks():
+            for task_list in lists:
+                for index in range(options["tasks"]):
+                    due = rng.random() < 0.5
+                    yield Task(
+                        title=" ".join(rng.sample(WORDS, 3)),
+                        completed=rng.random() < 0.3,
+                        due_date=now + timezone.timedelta(hours=rng.randint(-720, 720))
+                        if due
+                        else None,
+                        task_list=task_list,
+                        created_by_id=task_list.created_by_id,
+                    )
+
+        batches = iter(tasks())
+        while True:
+            batch = list(itertools.islice(batches, options["batch_size"]))
+            if not batch:
+                break
+            Task.objects.bulk_create(batch)
+        # bulk_create bypasses the task counters
+        TaskStats.objects.recount(user.pk for user in users)
+        return users[0]
+
+    def get_endpoints(self, user, options):
+        """
+        Map endpoint names to (method, path, data) factories taking the
+        request number. Writes consume rows prepared for them up front.
+        """
+        total = options["requests"] + options["warmup"]
+        lists = TaskList.objects.filter(created_by=user)
+        task_list = lists.exclude(name="inbox").first() or lists.first()
+        task = Task.objects.filter(created_by=user).first()
+        doomed = Task.objects.bulk_create(
+            Task(title=f"Delete {index}", created_by=user) for index in range(total)
+        )
+        TaskStats.objects.record_tasks(
+            user.pk, added=[(task.task_list_id, task.completed) for task in doomed]
+        )
+        refresh = str(ClaimsTokenObtainPairSerializer.get_token(user))
+        task_url = reverse("todo_api:tasks-detail", args=[task.task_uuid])
+        list_url = reverse("todo_api:lists-detail", args=[task_list.list_uuid])
+        tasks_url = reverse("todo_api:tasks-list")
+        lists_url = reverse("todo_api:lists-list")
+        list_param = {"list": str(task_list.list_uuid)}
+
+        def get(path, **params):
+            return lambda index: ("get", path, params)
+
+        return {
+            "tasks.list": get(tasks_url),
+            "tasks.list_by_list": get(tasks_url, **list_param),
+            "tasks.retrieve": get(task_url),
+            "tasks.create": lambda index: (
+                "post", tasks_url, {"title": f"Bench {index}", **list_param}
+            ),
+            "tasks.update": lambda index: (
+                "patch", task_url, {"completed": bool(index % 2)}
+            ),
+            "tasks.delete": lambda index: (
+                "delete", reverse("todo_api:tasks-detail", args=[doomed[index].task_uuid]), None
+            ),
+            "tasks.bulk": lambda index: (
+                "post",
+                reverse("todo_api:tasks-bulk"),
+                {"create": [{"title": f"Bulk {index} {n}"} for n in range(10)]},
+            ),
+            "tasks.count": get(reverse("todo_api:tasks-count")),
+            "tasks.count_lists": get(reverse("todo_api:tasks-count"), lists="all"),
+            "tasks.upcoming": get(reverse("todo_api:tasks-upcoming")),
+            "tasks.agenda": get(reverse("todo_api:tasks-agenda")),
+            "tasks.search": get(reverse("todo_api:tasks-search"), q="report"),
+            "tasks.export": get(reverse("todo_api:tasks-export")),
+            "lists.list": get(lists_url),
+            "lists.retrieve": get(list_url),
+            "lists.create": lambda index: ("post", lists_url, {"name": f"Bench {index}"}),
+            "sync.changes": get(reverse("todo_api:sync-changes")),
+            "async.tasks.list": get(reverse("todo_api_async:tasks-list")),
+            "async.tasks.upcoming": get(reverse("todo_api_async:tasks-upcoming")),
+            "async.tasks.count": get(reverse("todo_api_async:tasks-count")),
+            "async.lists.list": get(reverse("todo_api_async:lists-list")),
+            "async.lists.retrieve": get(
+                reverse("todo_api_async:lists-detail", args=[task_list.list_uuid])
+            ),
+            "user.me": get(reverse("user_api:me")),
+            "auth.verify": lambda index: ("post", reverse("auth_api:connection-verify"), {}),
+            "auth.login": lambda index: (
+                "post", reverse("rest_login"), {"username": user.email, "password": PASSWORD}
+            ),
+            "auth.token_refresh": lambda index: (
+                "post", reverse("token_refresh"), {"refresh": refresh}
+            ),
+        }
+
+    def run_endpoints(self, user, options):
+        endpoints = self.get_endpoints(user, options)
+        if options["endpoints"]:
+            unknown = set(options["endpoints"]) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = {name: endpoints[name] for name in options["endpoints"]}
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        results = {}
+        for name, make_request in endpoints.items():
+            counter = itertools.count()
+            for _ in range(options["warmup"]):
+                self.request(client, *make_request(next(counter)))
+            samples = [
+                self.request(client, *make_request(next(counter)))
+                for _ in range(options["requests"])
+            ]
+            results[name] = summarize(samples)
+        return results
+
+    def request(self, client, method, path, data):
+        """Return (seconds, queries, bytes, status code) of one request"""
+        kwargs = {"content_type": "application/json"} if method != "get" else {}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data, **kwargs)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(queries), size, response.status_code
+
+
+def summarize(samples):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample[3] >= 400),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "queries": statistics.median_low(sample[1] for sample in samples),
+        "bytes": statistics.median_low(sample[2] for sample in samples),
+    }
+
+
+def compare(baseline, report, threshold):
+    """Endpoints slower at p95 by more than threshold, or with more queries"""
+    regressions = []
+    for name, result in sorted(report["endpoints"].items()):
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(
+                {"endpoint": name, "metric": "p95_ms",
+                 "baseline": before["p95_ms"], "current": result["p95_ms"]}
+            )
+        if result["queries"] > before["queries"]:
+            regressions.append(
+                {"endpoint": name, "metric": "queries",
+                 "baseline": before["queries"], "current": result["queries"]}
+            )
+    return regressions
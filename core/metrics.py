@@ -0,0 +1,107 @@
+"""
+Prometheus metrics of the API
+
+When PROMETHEUS_MULTIPROC_DIR is set before the server starts, every
+process writes its samples to memory mapped files in that directory and
+/metrics aggregates them, so all gunicorn workers report as one server.
+See gunicorn.conf.py for the directory cleanup this mode needs.
+"""
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LABELS = ("route", "action", "method")
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to produce the response", LABELS
+)
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes", "Request body size", LABELS, buckets=SIZE_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size, streamed responses excluded",
+    LABELS,
+    buckets=SIZE_BUCKETS,
+)
+RESPONSES = Counter(
+    "http_responses_total", "Responses by status code", (*LABELS, "status")
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries per request", LABELS, buckets=QUERY_BUCKETS
+)
+# Hit ratio: rate(..{result="hit"}) / rate(..) summed over results
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups_total", "Response cache lookups", ("result",)
+)
+# Database connection pools, see core/pool.py. Gauges add up the live workers
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Open connections of the pool by state",
+    ("alias", "state"),
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITING = Gauge(
+    "db_pool_waiting",
+    "Threads waiting for a connection",
+    ("alias",),
+    multiprocess_mode="livesum",
+)
+DB_POOL_EVENTS = Counter(
+    "db_pool_events_total",
+    "Connections opened, closed, checked out, failing checks and checkout timeouts",
+    ("alias", "event"),
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time to check a connection out of the pool", ("alias",)
+)
+
+
+def route_labels(request):
+    """
+    Label a request with its URL name and DRF action. Unresolved paths
+    share one label so scanners cannot blow up the series count.
+    """
+    method = request.method if request.method in METHODS else "other"
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return {"route": "unmatched", "action": "", "method": method}
+    # Viewsets map methods to actions, async read views carry their action
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(method.lower()) or getattr(match.func, "action", None) or ""
+    return {"route": match.view_name or match.route, "action": action, "method": method}
+
+
+def observe_request(request, response, duration, queries=None):
+    labels = route_labels(request)
+    REQUEST_LATENCY.labels(**labels).observe(duration)
+    RESPONSES.labels(**labels, status=str(response.status_code)).inc()
+    try:
+        REQUEST_SIZE.labels(**labels).observe(int(request.META.get("CONTENT_LENGTH") or 0))
+    except ValueError:
+        pass
+    if not response.streaming:
+        RESPONSE_SIZE.labels(**labels).observe(len(response.content))
+    if queries is not None:
+        REQUEST_QUERIES.labels(**labels).observe(queries)
+
+
+def generate_metrics():
+    """The metrics of every worker in the Prometheus text format"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
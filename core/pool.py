@@ -0,0 +1,229 @@
+"""
+In-process pool of database connections
+
+Threads check connections out of the pool and give them back instead of
+each keeping its own open, so a process never holds more than `max_size`
+connections and a traffic spike waits for a free one rather than opening
+more. Connections are pinged when checked out, which catches those the
+server or a frozen serverless instance dropped, and replaced once older
+than `max_lifetime`. Idle connections beyond `min_size` are closed after
+`max_idle` seconds. Connections are only opened on demand, `min_size` is
+how many the pool keeps alive once open, not how many it opens up front,
+so a cold start costs no connection that no request asked for.
+"""
+import collections
+import threading
+import time
+
+from core.metrics import DB_POOL_CONNECTIONS, DB_POOL_EVENTS, DB_POOL_WAIT, DB_POOL_WAITING
+
+
+class PoolTimeout(Exception):
+    """No connection was given back within the wait timeout"""
+
+
+class ConnectionPool:
+    """
+    Pool of the connections made by `connect()`. `check(connection)`
+    pings a connection checked out of the pool and `reset(connection)`
+    cleans one given back, both returning False, or raising, when the
+    connection is broken and must be closed.
+    """
+
+    def __init__(
+        self,
+        connect,
+        *,
+        name="default",
+        min_size=0,
+        max_size=10,
+        max_lifetime=1800,
+        max_idle=300,
+        timeout=10,
+        check=None,
+        reset=None,
+    ):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("Pool sizes need 0 <= min_size <= max_size and max_size >= 1")
+        self.connect = connect
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.condition = threading.Condition()
+        # (connection, released at), the most recently released last
+        self.idle = collections.deque()
+        # Opening time of every open connection by id()
+        self.opened_at = {}
+        # Open connections plus those being opened
+        self.size = 0
+        self.waiting = 0
+        self.counts = collections.Counter()
+        self.closed = False
+
+    def get(self):
+        """Check out a healthy connection, waiting `timeout` seconds at most"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection, stale = self.take(deadline)
+            self.close_all(stale)
+            if connection is None:
+                connection = self.open()
+            elif not self.healthy(connection, self.check):
+                self.discard(connection, "failed_check")
+                continue
+            with self.condition:
+                self.count("checkout")
+            DB_POOL_WAIT.labels(self.name).observe(time.monotonic() - started)
+            return connection
+
+    def take(self, deadline):
+        """
+        Pop an idle connection, or reserve room for a new one with None.
+        Also return the idle connections which expired, to be closed once
+        the lock is released.
+        """
+        with self.condition:
+            self.waiting += 1
+            try:
+                while True:
+                    stale = self.prune()
+                    if self.idle:
+                        connection, _ = self.idle.pop()
+                        return connection, stale
+                    if self.size < self.max_size:
+                        self.size += 1
+                        return None, stale
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.count("timeout")
+                        raise PoolTimeout(
+                            f"No connection of the {self.name!r} pool was released "
+                            f"within {self.timeout}s, all {self.max_size} are in use."
+                        )
+                    self.publish()
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+                self.publish()
+
+    def open(self):
+        """Open a connection in the room `take()` reserved"""
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+                self.publish()
+            raise
+        with self.condition:
+            self.opened_at[id(connection)] = time.monotonic()
+            self.count("open")
+        return connection
+
+    def release(self, connection):
+        """Give a connection back, closing it when broken or too old"""
+        if self.closed or self.expired(connection, time.monotonic()) or not self.healthy(
+            connection, self.reset
+        ):
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+            self.publish()
+
+    def discard(self, connection, event=None):
+        """Close a checked out connection and free its room"""
+        with self.condition:
+            self.forget(connection)
+            if event:
+                self.count(event)
+            self.condition.notify()
+        self.close_all([connection])
+
+    def prune(self):
+        """Drop expired and surplus idle connections, the lock being held"""
+        now = time.monotonic()
+        stale = []
+        kept = collections.deque()
+        while self.idle:
+            connection, released_at = self.idle.popleft()
+            surplus = self.size - len(stale) > self.min_size
+            if surplus and now - released_at > self.max_idle or self.expired(connection, now):
+                stale.append(connection)
+            else:
+                kept.append((connection, released_at))
+        self.idle = kept
+        for connection in stale:
+            self.forget(connection)
+        return stale
+
+    def forget(self, connection):
+        self.opened_at.pop(id(connection), None)
+        self.size -= 1
+        self.count("close")
+        self.publish()
+
+    def expired(self, connection, now):
+        opened_at = self.opened_at.get(id(connection), now)
+        return now - opened_at > self.max_lifetime
+
+    def healthy(self, connection, check):
+        if check is None:
+            return True
+        try:
+            return check(connection) is not False
+        except Exception:
+            return False
+
+    def close_all(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Close the idle connections, those checked out close when released"""
+        with self.condition:
+            self.closed = True
+            stale = [connection for connection, _ in self.idle]
+            self.idle.clear()
+            for connection in stale:
+                self.forget(connection)
+        self.close_all(stale)
+
+    def count(self, event):
+        self.counts[event] += 1
+        DB_POOL_EVENTS.labels(self.name, event).inc()
+
+    def publish(self):
+        idle = len(self.idle)
+        DB_POOL_CONNECTIONS.labels(self.name, "idle").set(idle)
+        DB_POOL_CONNECTIONS.labels(self.name, "in_use").set(self.size - idle)
+        DB_POOL_WAITING.labels(self.name).set(self.waiting)
+
+    def stats(self):
+        """Sizes and event counts of the pool"""
+        with self.condition:
+            idle = len(self.idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self.size,
+                "idle": idle,
+                "in_use": self.size - idle,
+                "waiting": self.waiting,
+                "opened": self.counts["open"],
+                "closed": self.counts["close"],
+                "checkouts": self.counts["checkout"],
+                "failed_checks": self.counts["failed_check"],
+                "timeouts": self.counts["timeout"],
+            }
@@ -0,0 +1,85 @@
+"""
+Query budgets of the API endpoints
+
+Every route and action declares the most queries, and the most database
+time, one request may use whatever the amount of data of the user.
+core/tests/test_query_budgets.py sends a request to each of them with 1,
+100 and 10,000 rows and fails with the SQL of any request over budget,
+so a query per row slipping into a view or a serializer is caught.
+
+The query count is the gate. Database time depends on the machine, so it
+is only checked when QUERY_BUDGET_DB_MS=true is set for the tests.
+"""
+from collections import namedtuple
+
+from core.metrics import route_labels
+
+# db_ms is generous: it catches unindexed scans on a quiet machine
+Budget = namedtuple("Budget", ("queries", "db_ms"), defaults=(250,))
+
+QUERY_BUDGETS = {
+    # Tasks
+    ("todo_api:api-root", "get"): Budget(0),
+    ("todo_api:tasks-list", "list"): Budget(3),
+    ("todo_api:tasks-list", "create"): Budget(9),
+    ("todo_api:tasks-detail", "retrieve"): Budget(3),
+    ("todo_api:tasks-detail", "partial_update"): Budget(8),
+    ("todo_api:tasks-detail", "update"): Budget(8),
+    ("todo_api:tasks-detail", "destroy"): Budget(7),
+    ("todo_api:tasks-bulk", "bulk_tasks"): Budget(11),
+    ("todo_api:tasks-count-tasks", "count_tasks"): Budget(2),
+    ("todo_api:tasks-upcoming-tasks", "upcoming_tasks"): Budget(2),
+    ("todo_api:tasks-agenda", "agenda_tasks"): Budget(1),
+    ("todo_api:tasks-search", "search_tasks"): Budget(2),
+    ("todo_api:tasks-export", "export_tasks"): Budget(2),
+    # Task lists
+    ("todo_api:lists-list", "list"): Budget(2),
+    ("todo_api:lists-list", "create"): Budget(5),
+    ("todo_api:lists-detail", "retrieve"): Budget(1),
+    ("todo_api:lists-detail", "partial_update"): Budget(3),
+    ("todo_api:lists-detail", "update"): Budget(3),
+    ("todo_api:lists-detail", "destroy"): Budget(8),
+    # Sync
+    ("todo_api:sync-changes", "get"): Budget(3),
+    # Async reads
+    ("todo_api_async:tasks-list", "list"): Budget(2),
+    ("todo_api_async:tasks-upcoming", "upcoming_tasks"): Budget(2),
+    ("todo_api_async:tasks-count", "count_tasks"): Budget(2),
+    ("todo_api_async:lists-list", "list"): Budget(2),
+    ("todo_api_async:lists-detail", "list_detail"): Budget(1),
+    # Users and authentication
+    ("user_api:me", "get"): Budget(1),
+    ("auth_api:connection-verify", "post"): Budget(0),
+    ("rest_login", "post"): Budget(9),
+    ("token_refresh", "post"): Budget(0),
+}
+
+
+def budget_key(request):
+    """(route, action) of a request, the lowercase method for plain views"""
+    labels = route_labels(request)
+    return labels["route"], labels["action"] or request.method.lower()
+
+
+def check_budget(key, captured, check_time=False):
+    """
+    Return a report of the budget a request went over, listing its SQL,
+    or None when the request stayed within budget. Database time only
+    counts with check_time.
+    """
+    budget = QUERY_BUDGETS.get(key)
+    if budget is None:
+        return f"{key} has no query budget, add one to QUERY_BUDGETS"
+    db_ms = sum(float(query["time"]) for query in captured) * 1000
+    slow = check_time and db_ms > budget.db_ms
+    if len(captured) <= budget.queries and not slow:
+        return None
+    lines = [
+        f"{key} ran {len(captured)} queries in {db_ms:.1f} ms, "
+        f"budget is {budget.queries} queries in {budget.db_ms} ms:"
+    ]
+    lines += [
+        f"  {index}. [{query['time']}s] {query['sql']}"
+        for index, query in enumerate(captured, 1)
+    ]
+    return "\n".join(lines)
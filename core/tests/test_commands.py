@@ -1,13 +1,20 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from todo_api.models import Task
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +39,46 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class BenchCommandTests(TestCase):
+    """Test the API benchmark command."""
+
+    def bench(self, *args):
+        out = StringIO()
+        call_command(
+            "bench", "--users", "2", "--lists", "2", "--tasks", "3",
+            "--requests", "2", "--warmup", "0", *args, stdout=out,
+        )
+        return json.loads(out.getvalue())
+
+    def test_bench_reports_every_endpoint(self):
+        """Test every endpoint is measured without errors."""
+        report = self.bench()
+
+        self.assertEqual(report["dataset"]["tasks"], 12)
+        self.assertIn("tasks.list", report["endpoints"])
+        self.assertIn("user.me", report["endpoints"])
+        self.assertIn("auth.login", report["endpoints"])
+        for name, result in report["endpoints"].items():
+            self.assertEqual(result["errors"], 0, name)
+            self.assertEqual(result["requests"], 2)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_bench_rolls_back_dataset(self):
+        """Test the synthetic dataset is not left in the database."""
+        self.bench("--endpoints", "tasks.list")
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_bench_baseline_regression(self):
+        """Test endpoints slower than the baseline fail the command."""
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as baseline:
+            json.dump(
+                {"endpoints": {"tasks.list": {"p95_ms": 0.0, "queries": 0}}}, baseline
+            )
+        self.addCleanup(os.remove, baseline.name)
+
+        with self.assertRaises(CommandError):
+            self.bench("--endpoints", "tasks.list", "--baseline", baseline.name)
@@ -0,0 +1,111 @@
+"""
+Test the Prometheus metrics endpoint.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+
+METRICS_URL = reverse("metrics")
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_SEARCH_URL = reverse("todo_api:tasks-search")
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTests(TestCase):
+    """Test request metrics are exposed to Prometheus."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def scrape(self):
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(res.content.decode())
+            for sample in family.samples
+        }
+
+    def sample(self, metrics, name, **labels):
+        return metrics.get((name, tuple(sorted(labels.items()))), 0)
+
+    def delta(self, before, after, name, **labels):
+        return self.sample(after, name, **labels) - self.sample(before, name, **labels)
+
+    def test_requests_are_measured_per_action(self):
+        """Test latency, status and query metrics are labelled with the action."""
+        labels = {"route": "todo_api:tasks-list", "action": "list", "method": "GET"}
+        before = self.scrape()
+
+        self.client.get(TASKS_URL)
+        self.client.get(TASKS_URL)
+        after = self.scrape()
+
+        for name in (
+            "http_request_duration_seconds_count",
+            "http_response_size_bytes_count",
+            "http_request_db_queries_count",
+        ):
+            self.assertEqual(self.delta(before, after, name, **labels), 2, name)
+        self.assertEqual(
+            self.delta(before, after, "http_responses_total", status="200", **labels), 2
+        )
+
+    def test_extra_actions_and_errors_labelled(self):
+        """Test @action routes carry their action and error status codes."""
+        labels = {"route": "todo_api:tasks-search", "action": "search_tasks", "method": "GET"}
+        before = self.scrape()
+
+        self.client.get(TASKS_SEARCH_URL)
+        after = self.scrape()
+
+        self.assertEqual(
+            self.delta(before, after, "http_responses_total", status="400", **labels), 1
+        )
+
+    def test_unmatched_paths_share_a_label(self):
+        """Test unknown URLs do not create a series per path."""
+        self.client.get("/no-such-page/")
+        metrics = self.scrape()
+
+        self.assertGreater(
+            self.sample(
+                metrics, "http_responses_total",
+                route="unmatched", action="", method="GET", status="404",
+            ),
+            0,
+        )
+
+    def test_cache_lookups_counted(self):
+        """Test response cache hits and misses are counted."""
+        before = self.scrape()
+
+        self.client.get(TASKS_URL)
+        self.client.get(TASKS_URL)
+        after = self.scrape()
+
+        for result in ("hit", "miss"):
+            self.assertGreaterEqual(
+                self.delta(before, after, "response_cache_lookups_total", result=result), 1
+            )
+
+    def test_token_required(self):
+        """Test scrapes need the bearer token."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 401)
+        self.scrape()
+
+    @override_settings(METRICS_TOKEN="")
+    def test_hidden_without_token(self):
+        """Test the endpoint does not exist until a token is configured."""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 404)
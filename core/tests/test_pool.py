@@ -0,0 +1,283 @@
+"""
+Test the database connection pool.
+"""
+import threading
+import time
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from psycopg2.extensions import TRANSACTION_STATUS_INTRANS
+
+from core.backends.postgresql.base import DatabaseWrapper, reset_connection
+from core.metrics import generate_metrics
+from core.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Connection counting how many of its kind are open"""
+
+    def __init__(self, opened):
+        self.opened = opened
+        self.closed = False
+        self.healthy = True
+        opened.add(self)
+
+    def close(self):
+        self.closed = True
+        self.opened.discard(self)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test connections are reused, checked, replaced and bounded."""
+
+    def make_pool(self, **kwargs):
+        self.opened = set()
+        return ConnectionPool(
+            lambda: FakeConnection(self.opened),
+            name="test",
+            check=lambda connection: connection.healthy,
+            **kwargs,
+        )
+
+    def test_connection_reused(self):
+        """Test a released connection serves the next checkout."""
+        pool = self.make_pool()
+
+        first = pool.get()
+        pool.release(first)
+        second = pool.get()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["opened"], 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_checkout_waits_for_release(self):
+        """Test a full pool hands over the next released connection."""
+        pool = self.make_pool(max_size=1, timeout=5)
+        held = pool.get()
+        threading.Timer(0.05, pool.release, (held,)).start()
+
+        self.assertIs(pool.get(), held)
+
+    def test_checkout_times_out(self):
+        """Test a full pool raises once the wait timeout passes."""
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        pool.get()
+
+        with self.assertRaises(PoolTimeout):
+            pool.get()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_broken_connection_replaced_on_checkout(self):
+        """Test a connection failing its check is closed and replaced."""
+        pool = self.make_pool(max_size=1)
+        broken = pool.get()
+        pool.release(broken)
+        broken.healthy = False
+
+        connection = pool.get()
+
+        self.assertIsNot(connection, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+
+    def test_failed_reset_closes_connection(self):
+        """Test a connection failing its reset is not given back."""
+        pool = self.make_pool()
+        pool.reset = mock.Mock(side_effect=RuntimeError)
+        connection = pool.get()
+
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_old_connections_replaced(self):
+        """Test connections are closed after their max lifetime."""
+        pool = self.make_pool(max_lifetime=60)
+        now = time.monotonic()
+        with mock.patch("core.pool.time") as clock:
+            clock.monotonic.return_value = now
+            old = pool.get()
+            pool.release(old)
+
+            clock.monotonic.return_value = now + 61
+            connection = pool.get()
+
+        self.assertIsNot(connection, old)
+        self.assertTrue(old.closed)
+
+    def test_idle_connections_beyond_min_size_closed(self):
+        """Test idle connections above the min size are closed after max idle."""
+        pool = self.make_pool(min_size=1, max_idle=60)
+        now = time.monotonic()
+        with mock.patch("core.pool.time") as clock:
+            clock.monotonic.return_value = now
+            connections = [pool.get() for _ in range(3)]
+            for held in connections:
+                pool.release(held)
+
+            clock.monotonic.return_value = now + 61
+            pool.release(pool.get())
+
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_connect_error_frees_room(self):
+        """Test a failed connection attempt does not use up the pool."""
+        pool = self.make_pool(max_size=1)
+        connect = pool.connect
+        pool.connect = mock.Mock(side_effect=OSError)
+
+        with self.assertRaises(OSError):
+            pool.get()
+        pool.connect = connect
+
+        self.assertIsNotNone(pool.get())
+
+    def test_stats_exposed_as_metrics(self):
+        """Test the pool publishes its connections to Prometheus."""
+        pool = self.make_pool()
+        pool.release(pool.get())
+
+        metrics = generate_metrics().decode()
+
+        self.assertIn('db_pool_connections{alias="test",state="idle"} 1.0', metrics)
+        self.assertIn('db_pool_connections{alias="test",state="in_use"} 0.0', metrics)
+
+    def test_connections_bounded_under_load(self):
+        """Test many threads never open more than max size connections."""
+        pool = self.make_pool(max_size=4, timeout=10)
+        peak = 0
+        errors = []
+        lock = threading.Lock()
+
+        def work():
+            nonlocal peak
+            try:
+                for _ in range(25):
+                    connection = pool.get()
+                    with lock:
+                        peak = max(peak, len(self.opened))
+                    time.sleep(0.001)
+                    pool.release(connection)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work) for _ in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(peak, 4)
+        self.assertEqual(pool.stats()["checkouts"], 32 * 25)
+        self.assertLessEqual(pool.stats()["opened"], 4)
+
+
+class ResetConnectionTests(SimpleTestCase):
+    """Test connections given back to the pool are cleaned."""
+
+    def test_session_state_discarded(self):
+        """Test the transaction is rolled back then DISCARD ALL runs in autocommit."""
+        client = mock.MagicMock(closed=False, autocommit=False)
+        client.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        cursor = client.cursor.return_value.__enter__.return_value
+        autocommit = []
+        cursor.execute.side_effect = lambda sql: autocommit.append(client.autocommit)
+
+        self.assertTrue(reset_connection(client))
+
+        client.rollback.assert_called_once_with()
+        cursor.execute.assert_called_once_with("DISCARD ALL")
+        self.assertEqual(autocommit, [True])
+        self.assertFalse(client.autocommit)
+
+    def test_closed_connection_not_reset(self):
+        """Test a closed connection is reported broken."""
+        client = mock.Mock(closed=True)
+
+        self.assertFalse(reset_connection(client))
+        client.cursor.assert_not_called()
+
+
+@skipUnless(connection.vendor == "postgresql", "The pooled backend is PostgreSQL only")
+class PooledBackendLoadTests(TransactionTestCase):
+    """Test Django connections of many threads share a bounded pool."""
+
+    application_name = "pool-load-test"
+
+    def make_wrapper(self):
+        settings_dict = connection.settings_dict
+        return DatabaseWrapper(
+            {
+                **settings_dict,
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**settings_dict["OPTIONS"], "application_name": self.application_name},
+                "POOL": {"MAX_SIZE": 4, "TIMEOUT": 10},
+            },
+            alias="pool_load_test",
+        )
+
+    def server_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity WHERE application_name = %s",
+                [self.application_name],
+            )
+            return cursor.fetchone()[0]
+
+    def test_server_connections_bounded(self):
+        """Test the server sees at most max size connections of the pool."""
+        errors = []
+
+        def work():
+            try:
+                for _ in range(20):
+                    wrapper = self.make_wrapper()
+                    with wrapper.cursor() as cursor:
+                        cursor.execute("SELECT pg_sleep(0.005)")
+                    wrapper.close()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work) for _ in range(24)]
+        for thread in threads:
+            thread.start()
+        peak = 0
+        while any(thread.is_alive() for thread in threads):
+            peak = max(peak, self.server_connections())
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        self.make_wrapper().close_pools()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(peak, 0)
+        self.assertLessEqual(peak, 4)
+
+    def test_session_state_not_shared(self):
+        """Test the next checkout of a connection sees none of the session state."""
+        wrapper = self.make_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SET statement_timeout = 1234")
+            cursor.execute("CREATE TEMPORARY TABLE pool_scratch (id int)")
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = cursor.fetchone()[0]
+        wrapper.close()
+
+        wrapper = self.make_wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            self.assertEqual(cursor.fetchone()[0], pid)
+            cursor.execute("SHOW statement_timeout")
+            self.assertEqual(cursor.fetchone()[0], "0")
+            cursor.execute("SELECT to_regclass('pool_scratch')")
+            self.assertIsNone(cursor.fetchone()[0])
+            cursor.execute("SHOW TimeZone")
+            self.assertEqual(cursor.fetchone()[0], wrapper.timezone_name)
+        wrapper.close()
+        wrapper.close_pools()
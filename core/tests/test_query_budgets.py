@@ -0,0 +1,241 @@
+"""
+Test every API endpoint stays within its query budget at several sizes.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from core.query_budgets import QUERY_BUDGETS, budget_key, check_budget
+from todo_api.models import Task, TaskList, TaskStats
+
+PASSWORD = "userexample123"
+BUDGET_NAMESPACES = ("todo_api", "todo_api_async", "user_api", "auth_api")
+# Exchanges an authorization code with Google, which tests cannot reach
+UNBUDGETED = {("auth_api:google", "post")}
+# Database time varies with the machine, check it on demand only
+CHECK_DB_TIME = os.environ.get("QUERY_BUDGET_DB_MS", "").lower() in ("1", "true", "yes")
+
+
+def create_dataset(email, size):
+    """A user with size tasks spread over an inbox and up to 9 lists"""
+    user = get_user_model().objects.create_user(email=email, password=PASSWORD)
+    lists = TaskList.objects.bulk_create(
+        TaskList(name="inbox" if index == 0 else f"List {index}", created_by=user)
+        for index in range(min(size, 10))
+    )
+    now = timezone.now()
+    Task.objects.bulk_create(
+        (
+            Task(
+                title=f"Task {index} report" if index % 4 == 0 else f"Task {index}",
+                completed=index % 3 == 0,
+                due_date=now + timezone.timedelta(hours=index - size // 2)
+                if index % 2
+                else None,
+                task_list=lists[index % len(lists)],
+                created_by=user,
+            )
+            for index in range(size)
+        ),
+        batch_size=2000,
+    )
+    # bulk_create bypasses the task counters
+    TaskStats.objects.recount([user.pk])
+    return user, lists
+
+
+class QueryBudgetTestMixin:
+    """Send a request to every endpoint with `size` tasks in the database."""
+
+    size = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.lists = create_dataset("user@example.com", cls.size)
+        # Another user's rows must not change the cost of the requests
+        create_dataset("other@example.com", cls.size)
+        cls.task = Task.objects.filter(created_by=cls.user).first()
+        cls.task_list = cls.lists[-1]
+
+    def setUp(self):
+        # Budgets hold for the uncached path
+        cache.clear()
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user)
+        self.refresh = str(token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+
+    def assertWithinBudget(self, method, path, data=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(path, data, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 400, f"{method.upper()} {path}")
+        report = check_budget(
+            budget_key(response.wsgi_request), captured.captured_queries, CHECK_DB_TIME
+        )
+        if report is not None:
+            self.fail(f"{self.size} rows: {report}")
+
+    def task_url(self, task=None):
+        return reverse("todo_api:tasks-detail", args=[(task or self.task).task_uuid])
+
+    def list_url(self, task_list=None):
+        return reverse("todo_api:lists-detail", args=[(task_list or self.task_list).list_uuid])
+
+    def test_task_reads(self):
+        """Test reading tasks stays within budget."""
+        list_param = {"list": str(self.task_list.list_uuid)}
+        for path, params in (
+            (reverse("todo_api:tasks-list"), {}),
+            (reverse("todo_api:tasks-list"), list_param),
+            (self.task_url(), {}),
+            (reverse("todo_api:tasks-count"), {}),
+            (reverse("todo_api:tasks-count"), {"lists": "all"}),
+            (reverse("todo_api:tasks-count"), {"list": "upcoming"}),
+            (reverse("todo_api:tasks-upcoming"), {}),
+            (reverse("todo_api:tasks-upcoming"), {"from": "2000-01-01", "include_completed": "false"}),
+            (reverse("todo_api:tasks-agenda"), {}),
+            (reverse("todo_api:tasks-search"), {"q": "report"}),
+            (reverse("todo_api:tasks-export"), {}),
+            (reverse("todo_api:tasks-export"), {"output": "csv"}),
+            (reverse("todo_api:sync-changes"), {}),
+        ):
+            with self.subTest(path=path, params=params):
+                self.assertWithinBudget("get", path, params)
+
+    def test_task_writes(self):
+        """Test writing tasks stays within budget."""
+        tasks = list(Task.objects.filter(created_by=self.user)[:3])
+        self.assertWithinBudget(
+            "post",
+            reverse("todo_api:tasks-list"),
+            {"title": "New", "task_list": str(self.task_list.list_uuid)},
+        )
+        self.assertWithinBudget("patch", self.task_url(), {"completed": True})
+        self.assertWithinBudget("put", self.task_url(), {"title": "Renamed"})
+        self.assertWithinBudget(
+            "post",
+            reverse("todo_api:tasks-bulk"),
+            {
+                "create": [{"title": f"Bulk {index}"} for index in range(5)],
+                "update": [
+                    {"task_uuid": str(task.task_uuid), "completed": True} for task in tasks
+                ],
+                "delete": [str(tasks[-1].task_uuid)],
+            },
+        )
+        doomed = Task.objects.create(title="Doomed", created_by=self.user)
+        self.assertWithinBudget("delete", self.task_url(doomed))
+
+    def test_list_endpoints(self):
+        """Test task list endpoints stay within budget."""
+        self.assertWithinBudget("get", reverse("todo_api:lists-list"))
+        self.assertWithinBudget("get", self.list_url())
+        self.assertWithinBudget("post", reverse("todo_api:lists-list"), {"name": "New"})
+        self.assertWithinBudget("patch", self.list_url(), {"name": "Renamed"})
+        self.assertWithinBudget("put", self.list_url(), {"name": "Renamed again"})
+        # The list holds a share of the tasks, deleted with it
+        self.assertWithinBudget("delete", self.list_url())
+
+    def test_async_reads(self):
+        """Test the async read endpoints stay within budget."""
+        for path in (
+            reverse("todo_api_async:tasks-list"),
+            reverse("todo_api_async:tasks-upcoming"),
+            reverse("todo_api_async:tasks-count"),
+            reverse("todo_api_async:lists-list"),
+            reverse("todo_api_async:lists-detail", args=[self.task_list.list_uuid]),
+        ):
+            with self.subTest(path=path):
+                self.assertWithinBudget("get", path)
+
+    def test_user_and_auth(self):
+        """Test user and authentication endpoints stay within budget."""
+        self.assertWithinBudget("get", reverse("todo_api:api-root"))
+        self.assertWithinBudget("get", reverse("user_api:me"))
+        self.assertWithinBudget("post", reverse("auth_api:connection-verify"))
+        self.assertWithinBudget("post", reverse("token_refresh"), {"refresh": self.refresh})
+        self.client.credentials()
+        self.assertWithinBudget(
+            "post", reverse("rest_login"), {"username": self.user.email, "password": PASSWORD}
+        )
+
+
+class QueryBudgetOneRowTests(QueryBudgetTestMixin, TestCase):
+    size = 1
+
+
+class QueryBudgetHundredRowsTests(QueryBudgetTestMixin, TestCase):
+    size = 100
+
+
+class QueryBudgetTenThousandRowsTests(QueryBudgetTestMixin, TestCase):
+    size = 10000
+
+
+def iter_patterns(resolver, namespace=None):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield namespace, pattern
+
+
+class QueryBudgetRegistryTests(TestCase):
+    """Test the budget registry covers every endpoint."""
+
+    def test_every_action_has_a_budget(self):
+        """Test each route and action of the API apps declares a budget."""
+        missing = set()
+        for namespace, pattern in iter_patterns(get_resolver()):
+            if namespace not in BUDGET_NAMESPACES:
+                continue
+            route = f"{namespace}:{pattern.name}"
+            view = pattern.callback
+            actions = getattr(view, "actions", None)
+            if actions is not None:
+                keys = {
+                    (route, action)
+                    for action in actions.values()
+                    # Skip routes mapped to actions the viewset lacks
+                    if hasattr(view.cls, action)
+                }
+            elif hasattr(view, "view_class"):
+                keys = {
+                    (route, method)
+                    for method in view.view_class.http_method_names
+                    if method not in ("head", "options") and hasattr(view.view_class, method)
+                }
+            else:
+                keys = {(route, getattr(view, "action", "get"))}
+            missing |= keys - set(QUERY_BUDGETS) - UNBUDGETED
+
+        self.assertEqual(missing, set())
+
+    def test_report_lists_offending_sql(self):
+        """Test a request over budget is reported with its SQL."""
+        key = ("todo_api:tasks-agenda", "agenda_tasks")
+        captured = [{"sql": f"SELECT {index}", "time": "0.001"} for index in range(3)]
+
+        report = check_budget(key, captured)
+
+        self.assertIn("ran 3 queries", report)
+        self.assertIn("SELECT 2", report)
+        self.assertIsNone(check_budget(key, captured[:1]))
+
+    def test_db_time_checked_on_demand(self):
+        """Test slow queries within the query count only fail when time is checked."""
+        key = ("todo_api:tasks-agenda", "agenda_tasks")
+        captured = [{"sql": "SELECT 1", "time": "0.500"}]
+
+        self.assertIsNone(check_budget(key, captured))
+        self.assertIn("in 500.0 ms", check_budget(key, captured, check_time=True))
@@ -0,0 +1,63 @@
+"""
+Test renderers and parsers.
+"""
+import datetime
+import decimal
+import io
+import uuid
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+class TestFastJSON(SimpleTestCase):
+    """Test orjson backed renderer and parser."""
+
+    def setUp(self):
+        now = datetime.datetime(2024, 1, 25, 22, 44, 1, 123456, tzinfo=timezone.utc)
+        self.data = {
+            "id": 1,
+            "task_uuid": uuid.uuid4(),
+            "title": "Señal\u2028\u2029✓",
+            "completed": False,
+            "due_date": now,
+            "offset_date": now.astimezone(datetime.timezone(datetime.timedelta(hours=-3))),
+            "day": now.date(),
+            "amount": decimal.Decimal("1.5"),
+            "label": gettext_lazy("Inbox"),
+            "nested": [{"task_list": uuid.uuid4(), "due_date": None}],
+        }
+
+    def test_render_matches_json_renderer(self):
+        """Test output is identical to DRF's JSONRenderer."""
+        self.assertEqual(
+            FastJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+        )
+
+    def test_render_indent(self):
+        """Test indented output is identical to DRF's JSONRenderer."""
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_parse_matches_json_parser(self):
+        """Test parsing returns the same data as DRF's JSONParser."""
+        body = '{"title": "Señal", "items": [1, 2.5, null, true]}'.encode()
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+
+    def test_parse_error(self):
+        """Test malformed JSON raises a ParseError."""
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"title": '))
@@ -0,0 +1,194 @@
+"""
+Test the token bucket throttles.
+"""
+import importlib.util
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from core.throttling import (
+    check_throttle_cache,
+    get_take_token_script,
+    get_throttle_cache,
+    parse_rate,
+    take_token,
+)
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_EXPORT_URL = reverse("todo_api:tasks-export")
+ASYNC_TASKS_URL = reverse("todo_api_async:tasks-list")
+CONNECTION_URL = reverse("auth_api:connection-verify")
+LOGIN_URL = reverse("rest_login")
+
+RATES = {
+    "user_read": "2/min",
+    "user_write": "2/min",
+    "user_bulk": "1/min",
+    "anon_read": "2/min",
+    "anon_write": "2/min",
+    "anon_bulk": "1/min",
+    "user_dj_rest_auth": "2/min",
+    "anon_dj_rest_auth": "1/min",
+}
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": RATES}
+)
+class ThrottlingTests(TestCase):
+    """Test requests spend tokens of per-user and per-IP buckets."""
+
+    def setUp(self):
+        get_throttle_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        token = ClaimsTokenObtainPairSerializer.get_token(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        return client
+
+    def assertThrottled(self, res):
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Two tokens a minute come back every 30 seconds
+        self.assertIn(int(res["Retry-After"]), (29, 30))
+
+    def test_parse_rate(self):
+        """Test rates are parsed as tokens per period in seconds."""
+        self.assertEqual(parse_rate("600/min"), (600, 60))
+        self.assertEqual(parse_rate("10/s"), (10, 1))
+        self.assertIsNone(parse_rate(""))
+        self.assertIsNone(parse_rate(None))
+
+    def test_read_bucket_emptied(self):
+        """Test reads beyond the bucket get 429 with Retry-After."""
+        for _ in range(2):
+            self.assertEqual(self.client.get(TASKS_URL).status_code, status.HTTP_200_OK)
+
+        self.assertThrottled(self.client.get(TASKS_URL))
+
+    def test_scopes_have_separate_buckets(self):
+        """Test reads, writes and bulk requests spend different buckets."""
+        for _ in range(2):
+            self.client.get(TASKS_URL)
+
+        res = self.client.post(TASKS_URL, {"title": "Task"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        # Exports are reads in the bulk scope
+        self.assertEqual(self.client.get(TASKS_EXPORT_URL).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get(TASKS_EXPORT_URL).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    def test_users_have_separate_buckets(self):
+        """Test a user emptying a bucket leaves the others untouched."""
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="userexample123"
+        )
+        for _ in range(3):
+            self.client.get(TASKS_URL)
+
+        res = self.client_for(other).get(TASKS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills(self):
+        """Test tokens come back over the period of the rate."""
+        now = time.time()
+        with mock.patch("core.throttling.time") as clock:
+            clock.time.return_value = now
+            for _ in range(2):
+                self.client.get(TASKS_URL)
+            self.assertThrottled(self.client.get(TASKS_URL))
+
+            clock.time.return_value = now + 30
+            self.assertEqual(self.client.get(TASKS_URL).status_code, status.HTTP_200_OK)
+            self.assertThrottled(self.client.get(TASKS_URL))
+
+    def test_idle_bucket_holds_at_most_num_tokens(self):
+        """Test a bucket idle for less than two periods is merely full."""
+        now = time.time()
+        with mock.patch("core.throttling.time") as clock:
+            clock.time.return_value = now
+            for _ in range(2):
+                self.client.get(TASKS_URL)
+
+            clock.time.return_value = now + 114
+            statuses = [self.client.get(TASKS_URL).status_code for _ in range(4)]
+
+        self.assertEqual(statuses.count(status.HTTP_200_OK), 2)
+
+    def test_per_process_cache_reported(self):
+        """Test a warning is raised when buckets are not shared by workers."""
+        self.assertEqual([error.id for error in check_throttle_cache(None)], ["core.W001"])
+
+        rates = dict.fromkeys(RATES)
+        with override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}
+        ):
+            self.assertEqual(check_throttle_cache(None), [])
+
+    def test_anonymous_requests_limited_by_ip(self):
+        """Test anonymous requests spend the bucket of their IP address."""
+        credentials = {"username": "user@example.com", "password": "wrong"}
+        client = APIClient()
+
+        res = client.post(LOGIN_URL, credentials, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = client.post(LOGIN_URL, credentials, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+        res = client.post(LOGIN_URL, credentials, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_connection_costs_one_round_trip(self):
+        """Test a request to a bucket in use costs a single increment."""
+        self.client.post(CONNECTION_URL)
+        throttle_cache = get_throttle_cache()
+
+        with mock.patch.object(
+            throttle_cache, "incr", wraps=throttle_cache.incr
+        ) as incr, mock.patch.object(throttle_cache, "set", wraps=throttle_cache.set) as set_:
+            res = self.client.post(CONNECTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(incr.call_count, 1)
+        set_.assert_not_called()
+        self.assertThrottled(self.client.post(CONNECTION_URL))
+
+    def test_async_views_throttled(self):
+        """Test the async read views spend the read bucket."""
+        for _ in range(2):
+            self.assertEqual(self.client.get(ASYNC_TASKS_URL).status_code, status.HTTP_200_OK)
+
+        self.assertThrottled(self.client.get(ASYNC_TASKS_URL))
+        # Sync and async reads share the bucket
+        self.assertThrottled(self.client.get(TASKS_URL))
+
+    @skipUnless(importlib.util.find_spec("redis"), "redis is not installed")
+    def test_redis_script_on_primary_server(self):
+        """Test Redis buckets run the script on a client of the first server."""
+        location = "redis://primary:6379/0,redis://replica:6379/0"
+        caches = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": location}}
+        get_take_token_script.cache_clear()
+        self.addCleanup(get_take_token_script.cache_clear)
+        with override_settings(CACHES=caches), mock.patch("redis.Redis.from_url") as from_url:
+            script = from_url.return_value.register_script.return_value
+            script.return_value = 0
+            wait = take_token(get_throttle_cache(), "bucket", 10, 5, 20, 60)
+
+        self.assertEqual(wait, 0)
+        from_url.assert_called_once_with("redis://primary:6379/0")
+        script.assert_called_once_with(keys=[":1:bucket"], args=[10, 5, 20, 60])
@@ -0,0 +1,93 @@
+"""
+Test the request timing middleware.
+"""
+import json
+import re
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from core.timing import install_query_timer
+from todo_api.models import Task
+
+TASKS_URL = reverse("todo_api:tasks-list")
+ASYNC_TASKS_URL = reverse("todo_api_async:tasks-list")
+SERVER_TIMING = re.compile(
+    r'db;dur=([\d.]+);desc="(\d+) queries", serialize;dur=([\d.]+), total;dur=([\d.]+)'
+)
+
+
+async def fetch(method, *args, **kwargs):
+    return await method(*args, **kwargs)
+
+
+@override_settings(SERVER_TIMING_HEADER=True)
+class RequestTimingTests(TestCase):
+    """Test Server-Timing headers and slow request logs."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(title="Task", created_by=self.user)
+        # The test connection predates the middleware, which only wraps the
+        # existing connections of the threads serving sync requests
+        install_query_timer(connection)
+
+    def server_timing(self, response):
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        db, queries, serialize, total = match.groups()
+        return float(db), int(queries), float(serialize), float(total)
+
+    def test_server_timing_counts_queries(self):
+        """Test the header reports every query of the request."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TASKS_URL)
+
+        db, count, serialize, total = self.server_timing(res)
+        self.assertEqual(count, len(queries))
+        self.assertGreater(count, 0)
+        self.assertLessEqual(db, total)
+        self.assertLessEqual(serialize, total)
+
+    def test_async_view_queries_counted(self):
+        """Test queries run from async views are attributed to the request."""
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        res = async_to_sync(fetch)(
+            AsyncClient().get, ASYNC_TASKS_URL, authorization=f"Bearer {token}"
+        )
+
+        self.assertGreater(self.server_timing(res)[1], 0)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_server_timing_disabled(self):
+        """Test the header is left out when turned off."""
+        res = self.client.get(TASKS_URL)
+
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(REQUEST_SLOW_THRESHOLD_MS=0)
+    def test_slow_request_logged(self):
+        """Test requests above the threshold are logged as JSON."""
+        with self.assertLogs("todo_project.requests", "WARNING") as logs:
+            self.client.get(TASKS_URL)
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["event"], "slow_request")
+        self.assertEqual(entry["path"], TASKS_URL)
+        self.assertEqual(entry["status"], 200)
+        self.assertGreater(entry["queries"], 0)
+
+    def test_fast_request_not_logged(self):
+        """Test requests below the threshold are not logged."""
+        with self.assertNoLogs("todo_project.requests", "WARNING"):
+            self.client.get(TASKS_URL)
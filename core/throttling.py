@@ -0,0 +1,200 @@
+"""
+Token bucket throttles kept in the shared cache
+
+A bucket of `num` tokens is refilled over `period` for the rates of
+DEFAULT_THROTTLE_RATES written as "num/period". It is stored as the
+theoretical arrival time of the next request (GCRA) in microseconds:
+taking a token moves it to max(arrival, now) + interval, and the bucket
+is empty once it runs more than a period ahead of the clock. On Redis a
+script does this atomically in one round trip. Other caches increment
+the arrival time atomically and set it again when it fell behind the
+clock, a second round trip racing with concurrent requests of the same
+client. The buckets must live in a cache all workers share, see
+check_throttle_cache.
+
+Authenticated requests spend tokens of their user, anonymous requests
+tokens of their IP address. Requests are in the "read" scope for safe
+methods and "write" otherwise, unless the view sets `throttle_scope`.
+"""
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.checks import Warning
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """Return "num/period" as (num, seconds), None for an unlimited rate"""
+    if not rate:
+        return None
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+def get_throttle_cache_alias():
+    return getattr(settings, "THROTTLE_CACHE_ALIAS", "default")
+
+
+def get_throttle_cache():
+    return caches[get_throttle_cache_alias()]
+
+
+# Take a token, returning 0 or the microseconds to wait when empty
+TAKE_TOKEN = """
+local now = tonumber(ARGV[1])
+local arrival = math.max(tonumber(redis.call("GET", KEYS[1]) or 0), now)
+local wait = arrival + ARGV[2] - now - ARGV[3]
+if wait > 0 then
+    return wait
+end
+redis.call("SET", KEYS[1], arrival + ARGV[2], "EX", ARGV[4])
+return 0
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def get_take_token_script(alias):
+    """
+    TAKE_TOKEN registered on a client of the primary server of a Redis
+    cache, built from its LOCATION as the cache backend keeps its own
+    client private.
+    """
+    import redis
+
+    location = settings.CACHES[alias]["LOCATION"]
+    if isinstance(location, str):
+        location = location.split(",")
+    return redis.Redis.from_url(location[0]).register_script(TAKE_TOKEN)
+
+
+def increment(cache, key, delta):
+    """
+    Atomically add delta to an integer and return it, a missing key
+    counting as 0 and left for the caller to set.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        return delta
+
+
+def take_token(cache, key, now, interval, tolerance, timeout):
+    """
+    Move the arrival time of a bucket by one interval, returning 0, or
+    the microseconds to wait when the bucket is empty and left as is.
+    """
+    if isinstance(cache, RedisCache):
+        script = get_take_token_script(get_throttle_cache_alias())
+        key = cache.make_and_validate_key(key)
+        return int(script(keys=[key], args=[now, interval, tolerance, timeout]))
+
+    arrival = increment(cache, key, interval)
+    if arrival - interval < now:
+        # Missing, expired or behind the clock: count from now
+        cache.set(key, now + interval, timeout)
+        return 0
+    if arrival - now <= tolerance:
+        return 0
+    # Give the token back and keep the bucket while the client insists
+    increment(cache, key, -interval)
+    cache.touch(key, timeout)
+    return arrival - now - tolerance
+
+
+def check_throttle_cache(app_configs, **kwargs):
+    """Warn when the throttle buckets are kept in the memory of each process"""
+    rates = api_settings.DEFAULT_THROTTLE_RATES.values()
+    if not any(parse_rate(rate) for rate in rates):
+        return []
+    if isinstance(get_throttle_cache(), (LocMemCache, DummyCache)):
+        return [
+            Warning(
+                "Throttle buckets are not shared between processes.",
+                hint=(
+                    "Set CACHE_URL to a Redis server so every worker spends the "
+                    "same buckets, or turn the throttles off with empty "
+                    "THROTTLE_* rates."
+                ),
+                id="core.W001",
+            )
+        ]
+    return []
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle requests with a token bucket per scope and identity"""
+
+    # Prefix of the scopes in DEFAULT_THROTTLE_RATES
+    prefix = None
+
+    def get_identity(self, request):
+        """Return who spends the tokens, or None when not throttled"""
+        raise NotImplementedError(".get_identity() must be overridden")
+
+    def get_scope(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if scope is None:
+            scope = "read" if request.method in SAFE_METHODS else "write"
+        return f"{self.prefix}_{scope}"
+
+    def allow_request(self, request, view):
+        identity = self.get_identity(request)
+        if identity is None:
+            return True
+        scope = self.get_scope(request, view)
+        try:
+            rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[scope])
+        except KeyError:
+            raise ImproperlyConfigured(f"No throttle rate set for the {scope!r} scope.")
+        if rate is None:
+            return True
+        num, period = rate
+        interval = period * 1_000_000 // num
+        # A full bucket lets arrivals run one period ahead of the clock
+        tolerance = num * interval
+        key = f"throttle:{scope}:{identity}"
+        now = int(time.time() * 1_000_000)
+
+        # The key outlives the arrival time by a period at most
+        wait = take_token(get_throttle_cache(), key, now, interval, tolerance, 2 * period)
+        if not wait:
+            return True
+        self.wait_seconds = wait / 1_000_000
+        return False
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Buckets of authenticated users, scopes `user_<scope>`"""
+
+    prefix = "user"
+
+    def get_identity(self, request):
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Buckets of anonymous clients by IP address, scopes `anon_<scope>`"""
+
+    prefix = "anon"
+
+    def get_identity(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return None
+        return self.get_ident(request)
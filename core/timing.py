@@ -0,0 +1,54 @@
+"""
+Per-request timings of database queries and response serialization
+"""
+import contextvars
+import time
+
+# Timer of the request being handled, copied into sync_to_async threads
+current_timer = contextvars.ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Queries, DB time and serialization time of one request"""
+
+    __slots__ = ("started", "queries", "db", "serialize")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def query_timer(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's timer"""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries += 1
+        timer.db += time.perf_counter() - started
+
+
+def install_query_timer(connection, **kwargs):
+    """
+    Add query_timer to a connection's execute wrappers, once. Connection
+    objects are per thread, so this also runs on `connection_created`.
+    It goes first in the list: `connection.execute_wrapper()` blocks pop
+    the last wrapper when they exit.
+    """
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, query_timer)
+
+
+def add_serialize_time(started):
+    timer = current_timer.get()
+    if timer is not None:
+        timer.serialize += time.perf_counter() - started
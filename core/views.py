@@ -0,0 +1,24 @@
+"""
+Core views
+"""
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.metrics import generate_metrics
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Scrapers must send METRICS_TOKEN as a
+    bearer token, and the endpoint is not found while no token is set.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        raise Http404
+    expected = f"Bearer {token}"
+    if not hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", ""), expected):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from todo_api.models import Task, TaskList
+from todo_api.models import Task, TaskList, Tombstone
 
 admin.site.register(Task)
 admin.site.register(TaskList)
+admin.site.register(Tombstone)
@@ -0,0 +1,124 @@
+"""
+Date windows of upcoming tasks and agenda buckets in the user's timezone
+"""
+import datetime
+import zoneinfo
+
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
+
+BUCKETS = ("overdue", "today", "tomorrow", "this_week")
+
+
+def get_timezone(params):
+    """The IANA timezone of `?tz=`, defaulting to the server's TIME_ZONE"""
+    name = params.get("tz")
+    if not name:
+        return timezone.get_current_timezone()
+    try:
+        return zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValidationError({"tz": ["Unknown timezone."]})
+
+
+def start_of_day(day, tz):
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+
+
+def parse_bound(params, name, tz, end=False):
+    """
+    Return the (lookup, datetime) filtering due dates by a date or
+    datetime parameter. Naive values are read in tz and dates cover the
+    whole day, so `?to=2024-05-31` includes tasks due that evening.
+    """
+    value = params.get(name)
+    try:
+        # Dates first: parse_datetime() also accepts a bare date
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        if end:
+            return "lt", start_of_day(day + datetime.timedelta(days=1), tz)
+        return "gte", start_of_day(day, tz)
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, tz)
+        return ("lte" if end else "gte"), moment
+    raise ValidationError({name: ["Enter a valid date or datetime."]})
+
+
+def parse_flag(params, name, default):
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    if value in BooleanField.TRUE_VALUES:
+        return True
+    if value in BooleanField.FALSE_VALUES:
+        return False
+    raise ValidationError({name: ["Must be a valid boolean."]})
+
+
+def filter_upcoming(queryset, params):
+    """
+    Restrict a task queryset to dated tasks due between `?from=` and
+    `?to=`, leaving out completed tasks when `?include_completed=false`.
+    """
+    tz = get_timezone(params)
+    queryset = queryset.filter(due_date__isnull=False)
+    for name, end in (("from", False), ("to", True)):
+        if params.get(name):
+            lookup, moment = parse_bound(params, name, tz, end=end)
+            queryset = queryset.filter(**{f"due_date__{lookup}": moment})
+    if not parse_flag(params, "include_completed", default=True):
+        queryset = queryset.filter(completed=False)
+    return queryset
+
+
+def agenda_bounds(now, tz):
+    """
+    Starts of today, tomorrow and the day after, and the end of the week
+    (next Monday) in tz
+    """
+    today = timezone.localtime(now, tz).date()
+    days = [today + datetime.timedelta(days=offset) for offset in range(3)]
+    week_end = today + datetime.timedelta(days=7 - today.weekday())
+    return today, [start_of_day(day, tz) for day in (*days, week_end)]
+
+
+def agenda_queryset(queryset, bounds):
+    """
+    Uncompleted tasks due before the end of the agenda, annotated with
+    their bucket. The due date range is a single seek on the owner/due
+    date index and each task is labelled by the database.
+    """
+    today, tomorrow, day_after, week_end = bounds
+    return (
+        queryset.filter(
+            due_date__isnull=False,
+            due_date__lt=max(day_after, week_end),
+            completed=False,
+        )
+        .annotate(
+            bucket=Case(
+                When(due_date__lt=today, then=Value("overdue")),
+                When(due_date__lt=tomorrow, then=Value("today")),
+                When(due_date__lt=day_after, then=Value("tomorrow")),
+                default=Value("this_week"),
+                output_field=CharField(),
+            )
+        )
+        .order_by("due_date", "id")
+    )
+
+
+def group_by_bucket(buckets, items):
+    """Collect serialized tasks under their bucket, in due date order"""
+    grouped = {bucket: [] for bucket in BUCKETS}
+    for bucket, item in zip(buckets, items):
+        grouped[bucket].append(item)
+    return grouped
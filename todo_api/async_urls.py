@@ -0,0 +1,14 @@
+"""
+URLs mapping for the async todo_api read endpoints
+"""
+from django.urls import path
+from . import async_views
+
+app_name = 'todo_api_async'
+urlpatterns = [
+    path('tasks/', async_views.task_list, name='tasks-list'),
+    path('tasks/count/', async_views.task_count, name='tasks-count'),
+    path('tasks/upcoming/', async_views.task_upcoming, name='tasks-upcoming'),
+    path('lists/', async_views.list_list, name='lists-list'),
+    path('lists/<str:list_uuid>/', async_views.list_detail, name='lists-detail'),
+]
@@ -0,0 +1,298 @@
+"""
+Async views for the todo_api read endpoints, served under ASGI.
+
+DRF 3.14 views are synchronous, so these are plain Django async views
+reusing the serializers, pagination, conditional GET and response cache
+of the synchronous viewsets, and their authentication classes. JWT
+authentication, ETag checks and cache hits run on the event loop; queries
+go through `core.async_orm`.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import exceptions, status
+from rest_framework.authentication import (
+    BasicAuthentication,
+    SessionAuthentication,
+    get_authorization_header,
+)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.async_orm import aaggregate, aexists, aget, alist
+from core.renderers import FastJSONRenderer
+from core.throttling import UserTokenBucketThrottle
+from .agenda import filter_upcoming
+from .cache import get_response_cache, response_cache_key, stats
+from .conditional import collection_etag, collection_last_modified
+from .models import (
+    INBOX_NAME,
+    CollectionVersion,
+    Task,
+    TaskList,
+    TaskStats,
+    invalidate_inbox,
+)
+from .pagination import TaskCursorPagination, UpcomingTaskCursorPagination
+from .serializers import (
+    RowSerializer,
+    TaskCountSerializer,
+    TaskListCountSerializer,
+    TaskListSummarySerializer,
+    TaskSerializer,
+)
+from .views import (
+    count_aggregates,
+    filter_task_list,
+    parse_list_uuid,
+    task_list_aggregates,
+)
+
+renderer = FastJSONRenderer()
+
+
+def get_authenticators():
+    """Authenticators of the synchronous viewsets, in the same order"""
+    return [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+
+def sends_credentials(authenticator, request):
+    """False when the request holds nothing the authenticator reads"""
+    if isinstance(authenticator, BasicAuthentication):
+        return get_authorization_header(request).lower().startswith(b"basic ")
+    if isinstance(authenticator, SessionAuthentication):
+        return settings.SESSION_COOKIE_NAME in request.COOKIES
+    return True
+
+
+async def authenticate(request):
+    """
+    Return the authenticated user of the request, or raise NotAuthenticated.
+    JWTs are decoded on the event loop, other credentials are checked
+    through the database thread.
+    """
+    for authenticator in get_authenticators():
+        if not sends_credentials(authenticator, request):
+            continue
+        if hasattr(authenticator, "aauthenticate"):
+            result = await authenticator.aauthenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result[0]
+    raise exceptions.NotAuthenticated()
+
+
+async def check_throttle(request):
+    """Spend a read token of the user, raise Throttled when none is left"""
+    throttle = UserTokenBucketThrottle()
+    if not await sync_to_async(throttle.allow_request)(request, None):
+        raise exceptions.Throttled(throttle.wait())
+
+
+async def aget_collection_version(request):
+    version = getattr(request, "_collection_version", None)
+    if version is None:
+        version = await sync_to_async(CollectionVersion.objects.current)(
+            request.user.pk
+        )
+        request._collection_version = version
+    return version
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        renderer.render(data),
+        status=status_code,
+        content_type=renderer.media_type,
+    )
+
+
+def render_exception(request, exc):
+    """Render API exceptions the way DRF's exception handler does"""
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    response = render(data, exc.status_code)
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = "%d" % exc.wait
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.status_code = status.HTTP_401_UNAUTHORIZED
+        # Challenge of the first authenticator, as DRF answers
+        response["WWW-Authenticate"] = get_authenticators()[0].authenticate_header(request)
+    return response
+
+
+def async_read_view(action=None):
+    """
+    Turn an async handler returning response data into an async view.
+
+    Handlers receive an authenticated DRF request, throttled with the
+    read bucket of the user. With an action name,
+    the view answers If-None-Match/If-Modified-Since from the collection
+    version and serves the response cache, like collection_condition and
+    cached_response do for the synchronous views.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return HttpResponseNotAllowed(["GET", "HEAD"])
+            request = Request(request)
+            try:
+                request.user = await authenticate(request)
+                await check_throttle(request)
+                if action is None:
+                    return render(await handler(request, *args, **kwargs))
+                return await cached_view(request, action, handler, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_exception(request, exc)
+
+        # Label of the view in the request metrics
+        view.action = action or handler.__name__
+        return view
+
+    return decorator
+
+
+async def cached_view(request, action, handler, *args, **kwargs):
+    await aget_collection_version(request)
+    etag = quote_etag(collection_etag(request))
+    updated_at = collection_last_modified(request)
+    last_modified = updated_at.timestamp() if updated_at else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        cache = get_response_cache()
+        key = response_cache_key(request, action)
+        data = await cache.aget(key)
+        stats.record(hit=data is not None)
+        if data is not None:
+            response = render(data)
+            response["X-Cache"] = "HIT"
+        else:
+            data = await handler(request, *args, **kwargs)
+            response = render(data)
+            await cache.aset(key, data, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+            response["X-Cache"] = "MISS"
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+async def validate_task_list(task_list, message):
+    """Raise NotFound unless the `list` parameter names an existing list"""
+    if task_list in ("", "inbox"):
+        return
+    try:
+        list_uuid = parse_list_uuid(task_list)
+    except ValueError:
+        raise exceptions.NotFound({"message": message})
+    if not await aexists(TaskList.objects.filter(list_uuid=list_uuid)):
+        raise exceptions.NotFound({"detail": "Not found."})
+
+
+async def paginate_tasks(request, queryset, paginator):
+    rows = RowSerializer(TaskSerializer(context={"request": request}))
+    queryset = rows.get_queryset(queryset, extra_columns=paginator.ordering)
+    page = await paginator.apaginate_queryset(queryset, request)
+    return paginator.get_paginated_data(rows.to_representation(page))
+
+
+def get_task_queryset(request):
+    queryset = Task.objects.filter(created_by=request.user)
+    return filter_task_list(queryset, request.query_params.get("list", ""))
+
+
+@async_read_view("list")
+async def task_list(request):
+    """Async version of TaskViewSet.list"""
+    await validate_task_list(
+        request.query_params.get("list", ""),
+        "Task list was not found. We cannot list tasks.",
+    )
+    return await paginate_tasks(request, get_task_queryset(request), TaskCursorPagination())
+
+
+@async_read_view("upcoming_tasks")
+async def task_upcoming(request):
+    """Async version of TaskViewSet.upcoming_tasks"""
+    queryset = filter_upcoming(get_task_queryset(request), request.query_params)
+    return await paginate_tasks(request, queryset, UpcomingTaskCursorPagination())
+
+
+@async_read_view("count_tasks")
+async def task_count(request):
+    """Async version of TaskViewSet.count_tasks"""
+    if request.query_params.get("lists") == "all":
+        lists = TaskList.objects.filter(created_by=request.user).order_by("created_at", "id")
+        return TaskListCountSerializer(await alist(lists), many=True).data
+
+    task_list = request.query_params.get("list", "")
+    lists = TaskList.objects.filter(created_by=request.user)
+    if task_list == "upcoming":
+        tasks = Task.objects.filter(created_by=request.user, due_date__isnull=False)
+        counts = await aaggregate(tasks, **count_aggregates())
+    elif task_list == "inbox":
+        try:
+            counts = await aget(lists, name=INBOX_NAME)
+        except TaskList.DoesNotExist:
+            counts = TaskList()
+    elif task_list:
+        try:
+            counts = await aget(lists, list_uuid=parse_list_uuid(task_list))
+        except ValueError:
+            raise exceptions.NotFound({"message": "List was not found. We cannot count tasks."})
+        except TaskList.DoesNotExist:
+            raise exceptions.NotFound({"detail": "Not found."})
+    else:
+        try:
+            counts = await aget(TaskStats.objects.all(), user_id=request.user.pk)
+        except TaskStats.DoesNotExist:
+            counts = TaskStats(user_id=request.user.pk)
+    return TaskCountSerializer(counts).data
+
+
+@async_read_view("list")
+async def list_list(request):
+    """Async version of TaskListViewSet.list"""
+    lists = (
+        TaskList.objects.filter(created_by=request.user)
+        .annotate(**task_list_aggregates())
+        .order_by("created_at")
+    )
+    return TaskListSummarySerializer(
+        await alist(lists), many=True, context={"request": request}
+    ).data
+
+
+@async_read_view()
+async def list_detail(request, list_uuid):
+    """Async version of TaskListViewSet.retrieve"""
+    list_uuid = list_uuid.lower()
+    inbox = list_uuid == "inbox"
+    if inbox:
+        list_uuid = str(
+            await sync_to_async(TaskList.objects.get_inbox_uuid)(request.user.pk)
+        )
+    lists = TaskList.objects.filter(created_by=request.user).annotate(
+        **task_list_aggregates()
+    )
+    try:
+        task_list = await aget(lists, list_uuid__iexact=list_uuid)
+    except TaskList.DoesNotExist:
+        if not inbox:
+            raise exceptions.NotFound({"message": "List Not found."})
+        # The cached inbox was deleted by another process
+        invalidate_inbox(request.user.pk)
+        inbox_list = await sync_to_async(TaskList.objects.get_inbox)(request.user.pk)
+        task_list = await aget(lists, list_uuid=inbox_list.list_uuid)
+    return TaskListSummarySerializer(task_list, context={"request": request}).data
@@ -0,0 +1,86 @@
+"""
+Per-user response cache for todo_api read endpoints
+"""
+import functools
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.metrics import RESPONSE_CACHE_LOOKUPS
+from .conditional import get_collection_version
+
+
+class CacheStats:
+    """Hit and miss counters of the response cache in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def record(self, hit):
+        RESPONSE_CACHE_LOOKUPS.labels(result="hit" if hit else "miss").inc()
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ratio": self.hits / total if total else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def get_response_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def response_cache_key(request, action):
+    """
+    Key made of the user, the collection version and the request URI.
+    Writes bump the version so stale entries are never read again and
+    simply age out through the TTL and the backend's LRU eviction.
+    """
+    version = get_collection_version(request)
+    uri = hashlib.sha1(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return f"todo_api:{request.user.pk}:{version.version}:{action}:{uri}"
+
+
+def cached_response(view_method):
+    """Serve the view's response data from the cache when available"""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = response_cache_key(request, self.action)
+        data = cache.get(key)
+        stats.record(hit=data is not None)
+        if data is not None:
+            response = Response(data, status=status.HTTP_200_OK)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+            cache.set(key, response.data, timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
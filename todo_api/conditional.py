@@ -0,0 +1,51 @@
+"""
+Conditional GET support for todo_api collections
+"""
+import hashlib
+
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import CollectionVersion
+
+
+def get_collection_version(request):
+    """Return the requesting user's collection version, read once per request"""
+    version = getattr(request, "_collection_version", None)
+    if version is None:
+        version = CollectionVersion.objects.current(request.user.pk)
+        request._collection_version = version
+    return version
+
+
+def collection_etag(request, *args, **kwargs):
+    """Strong ETag derived from the user, collection version and request"""
+    version = get_collection_version(request)
+    key = ":".join(
+        [
+            str(request.user.pk),
+            str(version.version),
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def collection_last_modified(request, *args, **kwargs):
+    """
+    Last change of the collection, None while it is within the current
+    second: HTTP dates drop the fraction, so a date sent then would still
+    match after a later write in the same second and get a stale 304.
+    """
+    updated_at = get_collection_version(request).updated_at
+    if updated_at is None or int(updated_at.timestamp()) >= int(timezone.now().timestamp()):
+        return None
+    return updated_at
+
+
+# Answers If-None-Match/If-Modified-Since with 304 before the view runs
+collection_condition = method_decorator(
+    condition(etag_func=collection_etag, last_modified_func=collection_last_modified)
+)
@@ -0,0 +1,126 @@
+"""
+Streaming exports of a user's task lists and tasks
+"""
+import csv
+
+from django.conf import settings
+
+from core.renderers import FastJSONRenderer
+from .models import Task, TaskList
+
+LIST_COLUMNS = ("list_uuid", "name", "created_at")
+TASK_COLUMNS = (
+    "task_uuid",
+    "title",
+    "completed",
+    "due_date",
+    "created_at",
+    "task_list",
+    "task_list__name",
+)
+CSV_HEADER = (
+    "task_uuid",
+    "title",
+    "completed",
+    "due_date",
+    "created_at",
+    "list_uuid",
+    "list_name",
+)
+
+
+def get_chunk_size():
+    return getattr(settings, "TASKS_EXPORT_CHUNK_SIZE", 2000)
+
+
+def iter_task_rows(user_id):
+    """Tasks of a user joined with their list name, read in chunks"""
+    return (
+        Task.objects.filter(created_by_id=user_id)
+        .order_by("created_at", "id")
+        .values_list(*TASK_COLUMNS)
+        .iterator(chunk_size=get_chunk_size())
+    )
+
+
+def iter_list_rows(user_id):
+    return (
+        TaskList.objects.filter(created_by_id=user_id)
+        .order_by("created_at", "id")
+        .values_list(*LIST_COLUMNS)
+        .iterator(chunk_size=get_chunk_size())
+    )
+
+
+def buffered(lines):
+    """Join lines into chunks so the server does not write row by row"""
+    chunk_size = get_chunk_size()
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+    if buffer:
+        yield b"".join(buffer)
+
+
+def export_ndjson(user_id):
+    """
+    Yield one JSON document per line: every list first, typed "list",
+    then every task, typed "task", with its list uuid and name.
+    """
+    render = FastJSONRenderer().render
+
+    def lines():
+        for list_uuid, name, created_at in iter_list_rows(user_id):
+            yield render(
+                {
+                    "type": "list",
+                    "list_uuid": list_uuid,
+                    "name": name,
+                    "created_at": created_at,
+                }
+            ) + b"\n"
+        for row in iter_task_rows(user_id):
+            record = dict(zip(CSV_HEADER, row))
+            record["type"] = "task"
+            yield render(record) + b"\n"
+
+    return buffered(lines())
+
+
+class EchoBuffer:
+    """File-like object returning what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(user_id):
+    """Yield a CSV document with one row per task and its list name"""
+    writer = csv.writer(EchoBuffer())
+
+    def lines():
+        yield writer.writerow(CSV_HEADER).encode("utf-8")
+        for row in iter_task_rows(user_id):
+            task_uuid, title, completed, due_date, created_at, list_uuid, name = row
+            yield writer.writerow(
+                (
+                    task_uuid,
+                    title,
+                    completed,
+                    due_date.isoformat() if due_date else "",
+                    created_at.isoformat() if created_at else "",
+                    list_uuid or "",
+                    name or "",
+                )
+            ).encode("utf-8")
+
+    return buffered(lines())
+
+
+EXPORTERS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv"),
+}
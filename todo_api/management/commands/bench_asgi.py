@@ -0,0 +1,222 @@
+"""
+Django command to compare WSGI and ASGI throughput of the task read endpoints.
+"""
+import asyncio
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from todo_api.models import CollectionVersion, Task, TaskList
+
+ENDPOINTS = {
+    "tasks": ("/api/tasks/", "/api/async/tasks/"),
+    "upcoming": ("/api/tasks/upcoming/", "/api/async/tasks/upcoming/"),
+    "count": ("/api/tasks/count/", "/api/async/tasks/count/"),
+    "lists": ("/api/lists/", "/api/async/lists/"),
+}
+
+
+class Command(BaseCommand):
+    """
+    Start gunicorn on the synchronous endpoints and uvicorn on the async
+    ones, then hold the same number of keep-alive connections against
+    each server for a fixed duration. `--slow-send` delays the end of
+    every request to simulate slow clients holding a connection open.
+    """
+
+    help = "Benchmark WSGI (gunicorn) against ASGI (uvicorn) under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Threads per gunicorn worker"
+        )
+        parser.add_argument("--tasks", type=int, default=200)
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="tasks")
+        parser.add_argument(
+            "--slow-send", type=float, default=0.0, help="Seconds between request halves"
+        )
+        parser.add_argument(
+            "--use-cache",
+            action="store_true",
+            help="Repeat identical URLs so reads hit the response cache",
+        )
+        parser.add_argument("--targets", nargs="+", default=["wsgi", "asgi"])
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        unknown = set(options["targets"]) - {"wsgi", "asgi"}
+        if unknown:
+            raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}")
+        user = self.create_user(options["tasks"])
+        try:
+            token = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+            self.stdout.write(
+                f"{'target':>6} {'requests':>9} {'req/s':>9} {'p50 ms':>8} "
+                f"{'p99 ms':>8} {'errors':>7}"
+            )
+            sync_path, async_path = ENDPOINTS[options["endpoint"]]
+            for target in options["targets"]:
+                path = sync_path if target == "wsgi" else async_path
+                result = self.run_target(target, path, token, options)
+                self.stdout.write(
+                    f"{target:>6} {result['requests']:>9} {result['rps']:>9.0f} "
+                    f"{result['p50']:>8.1f} {result['p99']:>8.1f} {result['errors']:>7}"
+                )
+        finally:
+            user.delete()
+
+    def create_user(self, size):
+        """Committed synthetic data, visible to the server processes"""
+        user = get_user_model().objects.create_user(
+            email=f"bench{time.time_ns()}@example.com", password="benchpassword"
+        )
+        task_list = TaskList.objects.create(name="Bench", created_by=user)
+        Task.objects.bulk_create(
+            Task(
+                title=f"Task {index}",
+                created_by=user,
+                task_list=task_list,
+                completed=index % 3 == 0,
+            )
+            for index in range(size)
+        )
+        CollectionVersion.objects.bump(user.pk)
+        return user
+
+    def server_command(self, target, options):
+        bind = f"127.0.0.1:{options['port']}"
+        if target == "wsgi":
+            return [
+                sys.executable, "-m", "gunicorn", "todo_project.wsgi:application",
+                "--bind", bind,
+                "--workers", str(options["workers"]),
+                "--worker-class", "gthread",
+                "--threads", str(options["threads"]),
+                "--log-level", "warning",
+            ]
+        return [
+            sys.executable, "-m", "uvicorn", "todo_project.asgi:application",
+            "--host", "127.0.0.1",
+            "--port", str(options["port"]),
+            "--workers", str(options["workers"]),
+            "--no-access-log",
+            "--log-level", "warning",
+        ]
+
+    def run_target(self, target, path, token, options):
+        # Measure throughput, not the throttles
+        env = {**os.environ, "THROTTLE_USER_READ": ""}
+        server = subprocess.Popen(self.server_command(target, options), env=env)
+        try:
+            self.wait_for_server(options["port"], server)
+            return asyncio.run(self.load(path, token, options))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def wait_for_server(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("Server exited during startup")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not listen on port {port}")
+
+    async def load(self, path, token, options):
+        deadline = time.monotonic() + options["duration"]
+        counter = itertools.count()
+        latencies = []
+        errors = [0]
+
+        def request_bytes():
+            url = path
+            if not options["use_cache"]:
+                # Unique URLs bypass the ETag and the response cache
+                url = f"{path}?bench={next(counter)}"
+            return (
+                f"GET {url} HTTP/1.1\r\n"
+                f"Host: 127.0.0.1:{options['port']}\r\n"
+                f"Authorization: Bearer {token}\r\n"
+                "Accept: application/json\r\n"
+            ).encode("ascii"), b"\r\n"
+
+        async def connection():
+            reader = writer = None
+            while time.monotonic() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            "127.0.0.1", options["port"]
+                        )
+                    head, tail = request_bytes()
+                    started = time.perf_counter()
+                    writer.write(head)
+                    if options["slow_send"]:
+                        await writer.drain()
+                        await asyncio.sleep(options["slow_send"])
+                    writer.write(tail)
+                    await writer.drain()
+                    status_code = await read_response(reader)
+                    if status_code != 200:
+                        errors[0] += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors[0] += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        started = time.monotonic()
+        await asyncio.gather(*(connection() for _ in range(options["connections"])))
+        elapsed = time.monotonic() - started
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "p99": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+            "errors": errors[0],
+        }
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response and return its status code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise asyncio.IncompleteReadError(b"", None)
+    status_code = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status_code
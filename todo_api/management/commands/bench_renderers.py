@@ -0,0 +1,79 @@
+"""
+Django command to benchmark JSON renderers on task list payloads.
+"""
+import io
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    """Compare DRF's JSON renderer and parser with the orjson ones."""
+
+    help = "Benchmark JSONRenderer/JSONParser against FastJSONRenderer/FastJSONParser."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write(
+            f"{'tasks':>8} {'render ms':>10} {'fast ms':>8} {'speedup':>8}"
+            f" {'parse ms':>9} {'fast ms':>8} {'speedup':>8}"
+        )
+        for size in options["sizes"]:
+            data = self.task_page(size)
+            body = JSONRenderer().render(data)
+            render = self.best_of(lambda: JSONRenderer().render(data), options["repeat"])
+            fast_render = self.best_of(
+                lambda: FastJSONRenderer().render(data), options["repeat"]
+            )
+            parse = self.best_of(
+                lambda: JSONParser().parse(io.BytesIO(body)), options["repeat"]
+            )
+            fast_parse = self.best_of(
+                lambda: FastJSONParser().parse(io.BytesIO(body)), options["repeat"]
+            )
+            self.stdout.write(
+                f"{size:>8} {render * 1000:>10.2f} {fast_render * 1000:>8.2f}"
+                f" {render / fast_render:>7.1f}x {parse * 1000:>9.2f}"
+                f" {fast_parse * 1000:>8.2f} {parse / fast_parse:>7.1f}x"
+            )
+
+    def task_page(self, size):
+        """Build a /api/tasks/ response body as produced by the views"""
+        now = timezone.now()
+        task_list = uuid.uuid4()
+        return {
+            "next": "http://testserver/api/tasks/?cursor=eyJ2IjpbXX0",
+            "previous": None,
+            "results": [
+                {
+                    "id": i,
+                    "task_uuid": str(uuid.uuid4()),
+                    "title": f"Task {i}",
+                    "completed": i % 3 == 0,
+                    "due_date": (now + timezone.timedelta(hours=i)).isoformat()
+                    if i % 2
+                    else None,
+                    "task_list": task_list,
+                }
+                for i in range(size)
+            ],
+        }
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,86 @@
+"""
+Django command to benchmark the task list serializer paths.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from todo_api.models import Task, TaskList
+from todo_api.serializers import RowSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    """Compare TaskSerializer(many=True) with the values_list fast path."""
+
+    help = "Benchmark TaskSerializer against RowSerializer on synthetic tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'tasks':>8} {'serializer ms':>14} {'fast path ms':>13} {'speedup':>8}"
+        )
+        for size in options["sizes"]:
+            with transaction.atomic():
+                queryset = self.create_tasks(size)
+                # select_related keeps the baseline from measuring its N+1
+                baseline = queryset.select_related("task_list")
+                rows = RowSerializer(TaskSerializer())
+
+                def serialize():
+                    return renderer.render(
+                        TaskSerializer(baseline.all(), many=True).data
+                    )
+
+                def fast_path():
+                    return renderer.render(
+                        rows.to_representation(rows.get_queryset(queryset))
+                    )
+
+                if serialize() != fast_path():
+                    raise CommandError(f"Outputs differ for {size} tasks")
+                slow = self.best_of(serialize, options["repeat"])
+                fast = self.best_of(fast_path, options["repeat"])
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{size:>8} {slow * 1000:>14.1f} {fast * 1000:>13.1f} {slow / fast:>7.1f}x"
+            )
+
+    def create_tasks(self, size):
+        user = get_user_model().objects.create_user(
+            email=f"bench{time.time_ns()}@example.com", password="benchmark"
+        )
+        task_list = TaskList.objects.create(name="Benchmark", created_by=user)
+        now = timezone.now()
+        Task.objects.bulk_create(
+            (
+                Task(
+                    title=f"Task {i}",
+                    completed=i % 3 == 0,
+                    due_date=now + timezone.timedelta(hours=i) if i % 2 else None,
+                    task_list=task_list,
+                    created_by=user,
+                )
+                for i in range(size)
+            ),
+            batch_size=5000,
+        )
+        return Task.objects.filter(created_by=user).order_by("created_at", "id")
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
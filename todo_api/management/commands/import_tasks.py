@@ -0,0 +1,289 @@
+"""
+Django command to bulk import tasks from NDJSON or CSV files.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from todo_api.models import INBOX_NAME, CollectionVersion, Task, TaskList, TaskStats
+
+COPY_FIELDS = (
+    "task_uuid",
+    "title",
+    "completed",
+    "task_list",
+    "due_date",
+    "created_by",
+    "created_at",
+    "updated_at",
+    "sync_version",
+)
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def parse_date(value):
+    """Parse an ISO-8601 datetime, assuming the current timezone if naive."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid datetime {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def copy_value(value):
+    """Format a value for COPY CSV input, where an empty field is NULL."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class Command(BaseCommand):
+    """
+    Import tasks in batches without going through Task.save.
+
+    Input records use the layout of /api/tasks/export/: NDJSON documents
+    typed "list" or "task", or CSV rows with title, completed, due_date,
+    created_at and list_name columns. List names are resolved in batches
+    and missing lists are created. Each batch is committed on its own and
+    recorded in a checkpoint file so a failed import resumes where it
+    stopped. Task UUIDs derive from an import id kept in the checkpoint
+    and the record number, so a batch committed just before the import
+    died is not inserted twice when it resumes.
+    """
+
+    help = "Stream tasks from an NDJSON or CSV file into a user's lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Email of the owner")
+        parser.add_argument("--format", choices=["ndjson", "csv"])
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--checkpoint", help="Checkpoint file, defaults to <path>.checkpoint"
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore an existing checkpoint"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "ndjson")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+        try:
+            self.user_id = get_user_model().objects.get(email=options["user"]).pk
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+        self.lists = {}
+
+        state = None if options["restart"] else self.read_checkpoint(checkpoint)
+        resumed = state is not None
+        if state is None:
+            # Saved before the first batch commits, so any resume knows the id
+            state = {"import": str(uuid.uuid4()), "records": 0}
+            self.write_checkpoint(checkpoint, state)
+        self.namespace = uuid.UUID(state["import"])
+        position = state["records"]
+        if position:
+            self.stdout.write(f"Resuming after record {position}")
+
+        imported = 0
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as source:
+            records = itertools.islice(self.read_records(source, fmt), position, None)
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    break
+                batch_started = time.perf_counter()
+                with transaction.atomic():
+                    # Only the first batch after a resume may be committed already
+                    count = self.load_batch(batch, position, skip_existing=resumed)
+                resumed = False
+                position += len(batch)
+                imported += count
+                self.write_checkpoint(checkpoint, {**state, "records": position})
+                elapsed = time.perf_counter() - batch_started
+                self.stdout.write(
+                    f"{position:>10} records {count / elapsed:>10.0f} rows/sec"
+                )
+
+        elapsed = time.perf_counter() - started
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} tasks in {elapsed:.1f}s ({rate:.0f} rows/sec)"
+            )
+        )
+
+    def read_records(self, source, fmt):
+        """Yield raw records, parsing NDJSON lazily so skips stay cheap."""
+        if fmt == "csv":
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield line
+
+    def parse_record(self, record, number):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            kind = record.get("type") or "task"
+            if kind == "list":
+                name = (record.get("name") or "").strip()
+                if not name:
+                    raise ValueError("List name is required")
+                return kind, name
+            if kind != "task":
+                raise ValueError(f"Unknown record type {kind!r}")
+            title = (record.get("title") or "").strip()
+            if not title or len(title) > Task._meta.get_field("title").max_length:
+                raise ValueError("Title is required and must fit 255 characters")
+            return kind, {
+                "title": title,
+                "completed": parse_bool(record.get("completed")),
+                "due_date": parse_date(record.get("due_date")),
+                "created_at": parse_date(record.get("created_at")),
+                "list_name": (record.get("list_name") or "").strip() or INBOX_NAME,
+            }
+        except (ValueError, TypeError, AttributeError) as error:
+            raise CommandError(f"Record {number}: {error}")
+
+    def load_batch(self, batch, position, skip_existing=False):
+        """
+        Resolve the lists of a batch then write its tasks at once. With
+        skip_existing, tasks already imported by a previous run are left out.
+        """
+        tasks = []
+        names = set()
+        for number, record in enumerate(batch, start=position + 1):
+            kind, value = self.parse_record(record, number)
+            if kind == "list":
+                names.add(value)
+            else:
+                tasks.append((number, value))
+                names.add(value["list_name"])
+        # Bulk writes bypass Task.save: rows of the batch share a version
+        version = CollectionVersion.objects.bump(self.user_id)
+        self.resolve_lists(names, version)
+
+        now = timezone.now()
+        rows = [
+            Task(
+                task_uuid=uuid.uuid5(self.namespace, str(number)),
+                title=task["title"],
+                completed=task["completed"],
+                task_list_id=self.lists[task["list_name"]],
+                due_date=task["due_date"],
+                created_by_id=self.user_id,
+                created_at=task["created_at"] or now,
+                updated_at=now,
+                sync_version=version,
+            )
+            for number, task in tasks
+        ]
+        if skip_existing:
+            existing = set(
+                Task.objects.filter(task_uuid__in=[row.task_uuid for row in rows]).values_list(
+                    "task_uuid", flat=True
+                )
+            )
+            rows = [row for row in rows if row.task_uuid not in existing]
+        if rows:
+            if connection.vendor == "postgresql":
+                self.copy_tasks(rows)
+            else:
+                self.create_tasks(rows)
+            TaskStats.objects.record_tasks(
+                self.user_id, added=[(row.task_list_id, row.completed) for row in rows]
+            )
+        return len(rows)
+
+    def resolve_lists(self, names, version):
+        """Map list names to list_uuid, creating the lists that are missing."""
+        missing = names - self.lists.keys()
+        if INBOX_NAME in missing:
+            self.lists[INBOX_NAME] = TaskList.objects.get_inbox_uuid(self.user_id)
+            missing.discard(INBOX_NAME)
+        if not missing:
+            return
+        existing = (
+            TaskList.objects.filter(created_by_id=self.user_id, name__in=missing)
+            .order_by("-created_at", "-id")
+            .values_list("name", "list_uuid")
+        )
+        # Descending order leaves the oldest list of each name in the dict
+        self.lists.update(existing)
+        created = TaskList.objects.bulk_create(
+            TaskList(name=name, created_by_id=self.user_id, sync_version=version)
+            for name in sorted(missing - self.lists.keys())
+        )
+        self.lists.update((task_list.name, task_list.list_uuid) for task_list in created)
+
+    def create_tasks(self, rows):
+        """
+        Insert a batch keeping the imported created_at. A raw insert reads
+        the values set on the rows instead of calling pre_save, where
+        auto_now_add would overwrite them.
+        """
+        fields = [field for field in Task._meta.concrete_fields if not field.primary_key]
+        batch_size = connection.ops.bulk_batch_size(fields, rows) or len(rows)
+        for start in range(0, len(rows), batch_size):
+            Task._base_manager._insert(rows[start:start + batch_size], fields=fields, raw=True)
+
+    def copy_tasks(self, rows):
+        """Stream a batch to PostgreSQL through COPY FROM STDIN."""
+        fields = [Task._meta.get_field(name) for name in COPY_FIELDS]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([copy_value(getattr(row, field.attname)) for field in fields])
+        buffer.seek(0)
+        table = connection.ops.quote_name(Task._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+
+    def read_checkpoint(self, checkpoint):
+        """Return the import id and committed records, None without a checkpoint."""
+        if not os.path.exists(checkpoint):
+            return None
+        with open(checkpoint, encoding="utf-8") as file:
+            state = json.load(file)
+        # Checkpoints of older versions carry no import id
+        state.setdefault("import", str(uuid.uuid4()))
+        return state
+
+    def write_checkpoint(self, checkpoint, state):
+        """Record committed progress, replacing the file atomically."""
+        temporary = f"{checkpoint}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temporary, checkpoint)
@@ -0,0 +1,71 @@
+"""
+Django command to repair drifted task counters.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo_api.models import TaskStats
+
+
+class Command(BaseCommand):
+    """
+    Count the tasks of every user again and fix the counters stored on
+    their lists and stats rows which drifted, for instance after rows were
+    written by hand or through bulk queries. Users are processed in chunks
+    ordered by primary key, each chunk in its own transaction which keeps
+    the lists and stats of its users locked only while they are counted.
+    """
+
+    help = "Recount the tasks of each list and user and fix drifted counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", help="Email of a user to recount")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Users per transaction")
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report drift without fixing it"
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+        users = get_user_model().objects.order_by("pk")
+        if options["user"]:
+            users = users.filter(email__in=options["user"])
+            missing = set(options["user"]) - set(users.values_list("email", flat=True))
+            if missing:
+                raise CommandError(f"Users {', '.join(sorted(missing))} do not exist")
+
+        checked = fixed_lists = fixed_users = 0
+        started = time.perf_counter()
+        last = None
+        while True:
+            chunk = users if last is None else users.filter(pk__gt=last)
+            user_ids = list(chunk.values_list("pk", flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            with transaction.atomic():
+                lists, stats = TaskStats.objects.recount(user_ids)
+                if options["dry_run"]:
+                    transaction.set_rollback(True)
+            checked += len(user_ids)
+            fixed_lists += lists
+            fixed_users += stats
+            last = user_ids[-1]
+            if lists or stats:
+                self.stdout.write(
+                    f"{checked} users checked, {lists} lists and {stats} users "
+                    f"{'drifted' if options['dry_run'] else 'fixed'} in this chunk"
+                )
+
+        verb = "drifted" if options["dry_run"] else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recounted {checked} users in {time.perf_counter() - started:.1f}s: "
+                f"{fixed_lists} lists and {fixed_users} users {verb}."
+            )
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 4.0 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+def merge_inboxes(apps, schema_editor):
+    """Keep one inbox per user and move tasks into their owner's inbox."""
+    TaskList = apps.get_model('todo_api', 'TaskList')
+    Task = apps.get_model('todo_api', 'Task')
+
+    inboxes = {}
+    for inbox in TaskList.objects.filter(name='inbox').order_by('created_at', 'id'):
+        kept = inboxes.setdefault(inbox.created_by_id, inbox)
+        if kept.pk != inbox.pk:
+            Task.objects.filter(task_list_id=inbox.list_uuid).update(task_list_id=kept.list_uuid)
+            inbox.delete()
+
+    # Tasks used to be attached to whichever inbox was created first
+    misplaced = Task.objects.filter(task_list__name='inbox').exclude(
+        task_list__created_by=models.F('created_by')
+    )
+    for user_id in misplaced.values_list('created_by', flat=True).distinct():
+        inbox = inboxes.get(user_id)
+        if inbox is None:
+            inbox = inboxes[user_id] = TaskList.objects.create(name='inbox', created_by_id=user_id)
+        misplaced.filter(created_by=user_id).update(task_list_id=inbox.list_uuid)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_inboxes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_api', '0002_merge_inboxes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='tasklist',
+            constraint=models.UniqueConstraint(condition=models.Q(('name', 'inbox')), fields=('created_by',), name='unique_inbox_per_user'),
+        ),
+    ]
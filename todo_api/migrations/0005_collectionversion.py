@@ -0,0 +1,36 @@
+# Generated by Django 4.0 on 2026-10-18 10:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def seed_versions(apps, schema_editor):
+    """Give existing users a version row so deletes can bump it."""
+    User = apps.get_model('core', 'User')
+    CollectionVersion = apps.get_model('todo_api', 'CollectionVersion')
+    now = django.utils.timezone.now()
+    CollectionVersion.objects.bulk_create(
+        CollectionVersion(user_id=user_id, version=1, updated_at=now)
+        for user_id in User.objects.values_list('userId', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('todo_api', '0004_task_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='collection_version', serialize=False, to='core.user')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
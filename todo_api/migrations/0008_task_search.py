@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Frozen copy of the search index DDL of todo_api/search.py at the time
+# of this migration, later changes to it get a migration of their own.
+POSTGRESQL_INSTALL = (
+    "ALTER TABLE todo_api_task ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', title)) STORED",
+    "CREATE INDEX IF NOT EXISTS task_search_idx ON todo_api_task USING GIN (search_vector)",
+)
+POSTGRESQL_UNINSTALL = (
+    "DROP INDEX IF EXISTS task_search_idx",
+    "ALTER TABLE todo_api_task DROP COLUMN IF EXISTS search_vector",
+)
+SQLITE_INSTALL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_api_task_fts USING fts5("
+    "title, content='todo_api_task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS todo_api_task_fts_ai AFTER INSERT ON todo_api_task BEGIN "
+    "INSERT INTO todo_api_task_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_api_task_fts_ad AFTER DELETE ON todo_api_task BEGIN "
+    "INSERT INTO todo_api_task_fts(todo_api_task_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS todo_api_task_fts_au AFTER UPDATE OF title ON todo_api_task "
+    "BEGIN INSERT INTO todo_api_task_fts(todo_api_task_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO todo_api_task_fts(rowid, title) VALUES (new.id, new.title); END",
+    "INSERT INTO todo_api_task_fts(todo_api_task_fts) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    "DROP TRIGGER IF EXISTS todo_api_task_fts_ai",
+    "DROP TRIGGER IF EXISTS todo_api_task_fts_ad",
+    "DROP TRIGGER IF EXISTS todo_api_task_fts_au",
+    "DROP TABLE IF EXISTS todo_api_task_fts",
+)
+
+
+def run(statements):
+    """Run the statements of the schema editor's backend, others have no index"""
+
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in statements.get(vendor, ()):
+            schema_editor.execute(statement, params=None)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo_api', '0007_backfill_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRESQL_INSTALL, "sqlite": SQLITE_INSTALL}),
+            run({"postgresql": POSTGRESQL_UNINSTALL, "sqlite": SQLITE_UNINSTALL}),
+        ),
+    ]
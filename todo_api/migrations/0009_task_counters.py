@@ -0,0 +1,71 @@
+# Generated by Django 4.0 on 2026-10-18 11:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_tasks(apps, schema_editor):
+    """Start the counters from the tasks already stored."""
+    Task = apps.get_model('todo_api', 'Task')
+    TaskList = apps.get_model('todo_api', 'TaskList')
+    TaskStats = apps.get_model('todo_api', 'TaskStats')
+
+    def list_count(**filters):
+        tasks = (
+            Task.objects.filter(task_list=OuterRef('list_uuid'), **filters)
+            .order_by()
+            .values('task_list')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Coalesce(Subquery(tasks), 0)
+
+    TaskList.objects.update(
+        task_count=list_count(), completed_count=list_count(completed=True)
+    )
+    TaskStats.objects.bulk_create(
+        (
+            TaskStats(
+                user_id=row['created_by'],
+                task_count=row['tasks'],
+                completed_count=row['completed'],
+            )
+            for row in Task.objects.filter(created_by__isnull=False)
+            .values('created_by')
+            .annotate(tasks=Count('id'), completed=Count('id', filter=Q(completed=True)))
+            .order_by()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('todo_api', '0008_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to='core.user')),
+                ('task_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tasklist',
+            name='task_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_tasks, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,33 @@
-from django.db import models
+from collections import defaultdict
+
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
+INBOX_NAME = "inbox"
+
+# Process-level cache of inbox list_uuid by user id. Entries are only
+# stored once the transaction that read or created the inbox commits.
+# Other processes may delete the inbox meanwhile: writes notice it when
+# the counters of the list are not found, see TaskListManager.replace_inbox.
+_inbox_cache = {}
+INBOX_CACHE_SIZE = 10000
+
+
+def with_sync_fields(kwargs):
+    """
+    Save arguments writing the sync version and modification time along
+    with the update_fields of a partial save, which delta sync relies on.
+    """
+    update_fields = kwargs.get("update_fields")
+    if update_fields:
+        kwargs = {**kwargs, "update_fields": {*update_fields, "sync_version", "updated_at"}}
+    return kwargs
+
 
 class Task(models.Model):
     """Task object."""
@@ -21,20 +47,129 @@ class Task(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=False, null=True
     )
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+    # Collection version of the owner when the task was last written
+    sync_version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_by", "task_list", "created_at"],
+                name="task_owner_list_created_idx",
+            ),
+            models.Index(
+                fields=["created_by", "sync_version", "id"],
+                name="task_owner_sync_idx",
+            ),
+            models.Index(
+                fields=["created_by", "due_date"],
+                condition=models.Q(due_date__isnull=False),
+                name="task_owner_due_date_idx",
+            ),
+            models.Index(
+                fields=["created_by", "completed"],
+                name="task_owner_completed_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        if self.task_list is None:
-            exists = TaskList.objects.filter(name="inbox").exists()
-            if not exists:
-                TaskList.objects.create(name="inbox", created_by=self.created_by)
-            inbox = TaskList.objects.get(name="inbox")
-            self.task_list = inbox
-        super().save(*args, **kwargs)
+        inbox = self.task_list_id is None
+        if inbox:
+            self.task_list_id = TaskList.objects.get_inbox_uuid(self.created_by_id)
+        update_fields = kwargs.get("update_fields")
+        counted = update_fields is None or bool(
+            {"task_list", "task_list_id", "completed"} & set(update_fields)
+        )
+        # The version row stays locked until the write commits, so rows
+        # become visible to sync in version order
+        with transaction.atomic(savepoint=False):
+            stored = self.stored_counted_state() if counted else []
+            self.sync_version = CollectionVersion.objects.bump(self.created_by_id) or 0
+            super().save(*args, **with_sync_fields(kwargs))
+            if counted:
+                missing = TaskStats.objects.record_tasks(
+                    self.created_by_id,
+                    added=[(self.task_list_id, self.completed)],
+                    removed=stored,
+                )
+                if missing and inbox:
+                    self.task_list_id = TaskList.objects.replace_inbox(
+                        self.created_by_id, self.task_list_id
+                    )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            stored = self.stored_counted_state()
+            deleted = super().delete(*args, **kwargs)
+            Tombstone.objects.record(self.created_by_id, Tombstone.TASK, [self.task_uuid])
+            TaskStats.objects.record_tasks(self.created_by_id, removed=stored)
+        return deleted
+
+    def stored_counted_state(self):
+        """
+        Return the stored (task_list_id, completed) of the task in a list,
+        empty when it is not saved yet. The row stays locked until the
+        write commits so concurrent toggles cannot count twice.
+        """
+        if self.pk is None:
+            return []
+        return list(
+            Task.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("task_list_id", "completed")
+        )
 
     def __str__(self):
         return self.title
 
 
+def invalidate_inbox(user_id):
+    """Forget the cached inbox of a user."""
+    _inbox_cache.pop(user_id, None)
+
+
+def _remember_inbox(user_id, list_uuid):
+    if len(_inbox_cache) >= INBOX_CACHE_SIZE:
+        _inbox_cache.clear()
+    _inbox_cache[user_id] = list_uuid
+
+
+class TaskListManager(models.Manager):
+    """TaskList manager to resolve the inbox of each user."""
+
+    def get_inbox(self, user_id):
+        """Atomically get or create the inbox list of a user."""
+        inbox, _ = self.get_or_create(name=INBOX_NAME, created_by_id=user_id)
+        list_uuid = inbox.list_uuid
+        transaction.on_commit(lambda: _remember_inbox(user_id, list_uuid))
+        return inbox
+
+    def get_inbox_uuid(self, user_id):
+        """Return the inbox list_uuid of a user, cached per process."""
+        list_uuid = _inbox_cache.get(user_id)
+        if list_uuid is None:
+            list_uuid = self.get_inbox(user_id).list_uuid
+        return list_uuid
+
+    def replace_inbox(self, user_id, list_uuid):
+        """
+        Move the tasks just written to a cached inbox which another process
+        deleted to the current inbox, in the transaction writing them, and
+        return the list_uuid of the current inbox.
+        """
+        invalidate_inbox(user_id)
+        inbox_uuid = self.get_inbox(user_id).list_uuid
+        stranded = Task.objects.filter(created_by_id=user_id, task_list_id=list_uuid)
+        completed = list(stranded.values_list("completed", flat=True))
+        stranded.update(task_list_id=inbox_uuid)
+        TaskStats.objects.record_tasks(
+            user_id,
+            added=[(inbox_uuid, done) for done in completed],
+            removed=[(list_uuid, done) for done in completed],
+        )
+        return inbox_uuid
+
+
 class TaskList(models.Model):
     """TaskList object."""
 
@@ -44,9 +179,348 @@ class TaskList(models.Model):
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=False, null=True
     )
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
+    sync_version = models.PositiveBigIntegerField(default=0)
+    # Kept in step by TaskStats.objects.record_tasks, see recount_tasks
+    task_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    objects = TaskListManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at"],
+                name="tasklist_owner_created_idx",
+            ),
+            models.Index(
+                fields=["created_by", "sync_version", "id"],
+                name="tasklist_owner_sync_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by"],
+                condition=models.Q(name=INBOX_NAME),
+                name="unique_inbox_per_user",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        # A renamed list may have been the cached inbox
+        invalidate_inbox(self.created_by_id)
+        with transaction.atomic(savepoint=False):
+            self.sync_version = CollectionVersion.objects.bump(self.created_by_id) or 0
+            super().save(*args, **with_sync_fields(kwargs))
+
+    def delete(self, *args, **kwargs):
+        # Tasks of the list are deleted with it, clients drop them with
+        # the list tombstone
+        with transaction.atomic(savepoint=False):
+            # Locked so no task is counted in the list while it goes away
+            counts = (
+                TaskList.objects.select_for_update()
+                .filter(pk=self.pk)
+                .values_list("task_count", "completed_count")
+                .first()
+            )
+            deleted = super().delete(*args, **kwargs)
+            Tombstone.objects.record(self.created_by_id, Tombstone.LIST, [self.list_uuid])
+            if counts is not None:
+                TaskStats.objects.increment(self.created_by_id, -counts[0], -counts[1])
+        return deleted
+
+    @property
+    def uncompleted_count(self):
+        return self.task_count - self.completed_count
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_delete, sender=TaskList)
+def forget_deleted_inbox(sender, instance, **kwargs):
+    invalidate_inbox(instance.created_by_id)
+    # Only existing rows are bumped: the owner may be deleted in cascade
+    CollectionVersion.objects.bump(instance.created_by_id, create=False)
+
+
+class CollectionVersionManager(models.Manager):
+    """CollectionVersion manager to bump and read user versions."""
+
+    def bump(self, user_id, create=True):
+        """
+        Increment the version of the user's tasks and lists and return it.
+        Returns None when the user has no version row and create is False.
+        """
+        if user_id is None:
+            return None
+        now = timezone.now()
+        version = self._increment(user_id, now)
+        if version is not None or not create:
+            return version
+        try:
+            with transaction.atomic():
+                self.create(user_id=user_id, version=1, updated_at=now)
+            return 1
+        except IntegrityError:
+            # Created concurrently, bump the existing row instead
+            return self._increment(user_id, now)
+
+    def _increment(self, user_id, now):
+        connection = connections[self.db]
+        returning = connection.vendor == "postgresql" or (
+            connection.vendor == "sqlite" and connection.features.can_return_columns_from_insert
+        )
+        if returning:
+            # UPDATE ... RETURNING saves reading the version back
+            opts = self.model._meta
+            quote = connection.ops.quote_name
+            version = quote(opts.get_field("version").column)
+            updated_at = opts.get_field("updated_at")
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {quote(opts.db_table)} "
+                    f"SET {version} = {version} + 1, {quote(updated_at.column)} = %s "
+                    f"WHERE {quote(opts.pk.column)} = %s RETURNING {version}",
+                    [
+                        updated_at.get_db_prep_value(now, connection),
+                        opts.pk.get_db_prep_value(user_id, connection),
+                    ],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+        updated = self.filter(user_id=user_id).update(
+            version=F("version") + 1, updated_at=now
+        )
+        if not updated:
+            return None
+        return self.filter(user_id=user_id).values_list("version", flat=True).get()
+
+    def current(self, user_id):
+        """Return the version row of a user, unsaved if never written."""
+        try:
+            return self.get(user_id=user_id)
+        except self.model.DoesNotExist:
+            return self.model(user_id=user_id, version=0, updated_at=None)
+
+
+class CollectionVersion(models.Model):
+    """Version of a user's task and list collections, bumped on writes."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="collection_version",
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    objects = CollectionVersionManager()
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class TaskStatsManager(models.Manager):
+    """TaskStats manager to keep task counters in step with task writes."""
+
+    def record_tasks(self, user_id, added=(), removed=()):
+        """
+        Count tasks added and removed, given as (task_list_id, completed)
+        pairs, in their lists and in the stats of the user. A task moved or
+        toggled is removed in its stored state and added in its new one.
+        Runs in the transaction writing the tasks, at most two queries.
+        Returns the number of the lists which no longer exist.
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        for sign, tasks in ((1, added), (-1, removed)):
+            for list_uuid, completed in tasks:
+                deltas[list_uuid][0] += sign
+                deltas[list_uuid][1] += sign if completed else 0
+        deltas = {list_uuid: delta for list_uuid, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return 0
+        lists = {list_uuid: delta for list_uuid, delta in deltas.items() if list_uuid}
+        missing = 0
+        if lists:
+            # One UPDATE moves the counters of every list touched
+            changes = {}
+            for index, field in enumerate(("task_count", "completed_count")):
+                whens = [
+                    When(list_uuid=list_uuid, then=Value(delta[index]))
+                    for list_uuid, delta in lists.items()
+                    if delta[index]
+                ]
+                if whens:
+                    changes[field] = F(field) + Case(*whens, default=Value(0))
+            missing = len(lists) - TaskList.objects.filter(list_uuid__in=lists).update(**changes)
+        self.increment(
+            user_id,
+            sum(delta[0] for delta in deltas.values()),
+            sum(delta[1] for delta in deltas.values()),
+        )
+        return missing
+
+    def increment(self, user_id, tasks=0, completed=0):
+        """Add to the task counters of a user, creating its stats row."""
+        if user_id is None or not (tasks or completed):
+            return
+        changes = {
+            "task_count": F("task_count") + tasks,
+            "completed_count": F("completed_count") + completed,
+        }
+        if self.filter(user_id=user_id).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                self.create(user_id=user_id, task_count=tasks, completed_count=completed)
+        except IntegrityError:
+            # Created concurrently, update the existing row instead
+            self.filter(user_id=user_id).update(**changes)
+
+    def current(self, user_id):
+        """Return the stats row of a user, unsaved if it has no tasks."""
+        try:
+            return self.get(user_id=user_id)
+        except self.model.DoesNotExist:
+            return self.model(user_id=user_id)
+
+    def recount(self, user_ids):
+        """
+        Count the tasks of users again and fix the counters of their lists
+        and stats which drifted. The lists and stats of the users stay
+        locked until the transaction commits. Returns the number of lists
+        and of users fixed.
+        """
+        user_ids = list(user_ids)
+        with transaction.atomic():
+            lists = list(
+                TaskList.objects.select_for_update()
+                .filter(created_by_id__in=user_ids)
+                .only("id", "list_uuid", "created_by", "task_count", "completed_count")
+            )
+            stats = {
+                row.user_id: row
+                for row in self.select_for_update().filter(user_id__in=user_ids)
+            }
+            counts = {"tasks": Count("id"), "completed": Count("id", filter=Q(completed=True))}
+            list_counts = {
+                row["task_list"]: row
+                for row in Task.objects.filter(task_list__created_by_id__in=user_ids)
+                .values("task_list")
+                .annotate(**counts)
+                .order_by()
+            }
+            user_counts = {
+                row["created_by"]: row
+                for row in Task.objects.filter(created_by_id__in=user_ids)
+                .values("created_by")
+                .annotate(**counts)
+                .order_by()
+            }
+
+            fixed_lists = []
+            for task_list in lists:
+                row = list_counts.get(task_list.list_uuid, {"tasks": 0, "completed": 0})
+                if (task_list.task_count, task_list.completed_count) != (
+                    row["tasks"],
+                    row["completed"],
+                ):
+                    task_list.task_count = row["tasks"]
+                    task_list.completed_count = row["completed"]
+                    fixed_lists.append(task_list)
+            fixed_stats, missing_stats = [], []
+            for user_id in user_ids:
+                row = user_counts.get(user_id, {"tasks": 0, "completed": 0})
+                current = stats.get(user_id) or self.model(user_id=user_id)
+                if (current.task_count, current.completed_count) == (
+                    row["tasks"],
+                    row["completed"],
+                ):
+                    continue
+                current.task_count = row["tasks"]
+                current.completed_count = row["completed"]
+                (fixed_stats if user_id in stats else missing_stats).append(current)
+
+            TaskList.objects.bulk_update(fixed_lists, ["task_count", "completed_count"])
+            self.bulk_update(fixed_stats, ["task_count", "completed_count"])
+            self.bulk_create(missing_stats)
+            # Cached counts of the users are stale
+            fixed_users = {task_list.created_by_id for task_list in fixed_lists}
+            fixed_users |= {row.user_id for row in fixed_stats + missing_stats}
+            for user_id in fixed_users:
+                CollectionVersion.objects.bump(user_id, create=False)
+        return len(fixed_lists), len(fixed_stats) + len(missing_stats)
+
+
+class TaskStats(models.Model):
+    """Task counters of a user, read instead of counting its tasks."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="task_stats",
+    )
+    task_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+
+    objects = TaskStatsManager()
+
+    @property
+    def uncompleted_count(self):
+        return self.task_count - self.completed_count
+
+    def __str__(self):
+        return f"{self.user_id} {self.completed_count}/{self.task_count}"
+
+
+class TombstoneManager(models.Manager):
+    """Tombstone manager to record deletions under a new version."""
+
+    def record(self, user_id, kind, object_uuids, version=None):
+        """
+        Record deleted objects under version, or under a new version of the
+        owner. Skipped when the owner, and so its version, is being deleted.
+        """
+        if version is None:
+            version = CollectionVersion.objects.bump(user_id, create=False)
+        if version is None or not object_uuids:
+            return []
+        return self.bulk_create(
+            self.model(
+                user_id=user_id, kind=kind, object_uuid=object_uuid, sync_version=version
+            )
+            for object_uuid in object_uuids
+        )
+
+
+class Tombstone(models.Model):
+    """Deleted task or list, kept so clients can sync the deletion."""
+
+    TASK = "task"
+    LIST = "list"
+    KIND_CHOICES = [(TASK, "Task"), (LIST, "List")]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="tombstones"
+    )
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_uuid = models.UUIDField()
+    sync_version = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = TombstoneManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "sync_version", "id"],
+                name="tombstone_user_sync_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_uuid}"
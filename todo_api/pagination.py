@@ -0,0 +1,180 @@
+"""
+Pagination classes for todo_api
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.async_orm import alist
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination seeking on a composite (field, id) key.
+
+    Every page is fetched with a `WHERE (field, id) > (value, id)` seek
+    so the database walks the index instead of skipping OFFSET rows.
+    """
+
+    ordering = ("created_at", "id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, "TASKS_PAGE_SIZE", 100)
+        max_page_size = getattr(settings, "TASKS_MAX_PAGE_SIZE", 1000)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        if requested <= 0:
+            return page_size
+        return min(requested, max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, field) for field in self.ordering]
+        values = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+        payload = json.dumps({"v": values, "r": reverse}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values, reverse = payload["v"], bool(payload["r"])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def seek_filter(self, values, reverse):
+        """Build the lexicographic `(a, b) > (x, y)` predicate for the key."""
+        lookup = "lt" if reverse else "gt"
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {f: values[i] for i, f in enumerate(self.ordering[:index])}
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[index]})
+        return condition
+
+    def get_page_queryset(self, queryset, request):
+        """Order and seek the queryset, returning one row past the page"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.values, self.reverse = self.decode_cursor(request)
+
+        if self.reverse:
+            order_by = ["-" + field for field in self.ordering]
+        else:
+            order_by = list(self.ordering)
+        queryset = queryset.order_by(*order_by)
+        if self.values is not None:
+            try:
+                queryset = queryset.filter(self.seek_filter(self.values, self.reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[: self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        try:
+            rows = list(queryset)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return self.set_page(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset for async views"""
+        queryset = self.get_page_queryset(queryset, request)
+        try:
+            rows = await alist(queryset)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return self.set_page(rows)
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        # Moving backwards always leaves a page behind us and vice versa.
+        if self.reverse:
+            self.has_next = self.values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.values is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def get_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(row, reverse)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.get_link(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            # Empty page reached through a cursor: restart from the top.
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.get_link(self.first, reverse=True)
+
+    def get_paginated_data(self, data):
+        return OrderedDict(
+            [
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class TaskCursorPagination(KeysetPagination):
+    """Tasks ordered by creation date"""
+
+    ordering = ("created_at", "id")
+
+
+class UpcomingTaskCursorPagination(KeysetPagination):
+    """Scheduled tasks ordered by due date"""
+
+    ordering = ("due_date", "id")
+
+
+class SearchTaskCursorPagination(KeysetPagination):
+    """Search results ordered by relevance, most relevant first"""
+
+    ordering = ("search_rank", "id")
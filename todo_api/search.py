@@ -0,0 +1,140 @@
+"""
+Full-text search of task titles
+
+PostgreSQL indexes titles in a generated tsvector column with a GIN index,
+SQLite in an external content FTS5 table kept in step by triggers. Both
+are maintained by the database on every insert, update and delete, so
+bulk writes and COPY imports are indexed without going through save().
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import Task
+
+TASK_TABLE = Task._meta.db_table
+FTS_TABLE = f"{TASK_TABLE}_fts"
+SEARCH_CONFIG = "simple"
+
+POSTGRESQL_INSTALL = (
+    f"ALTER TABLE {TASK_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', title)) STORED",
+    f"CREATE INDEX IF NOT EXISTS task_search_idx ON {TASK_TABLE} USING GIN (search_vector)",
+)
+POSTGRESQL_UNINSTALL = (
+    "DROP INDEX IF EXISTS task_search_idx",
+    f"ALTER TABLE {TASK_TABLE} DROP COLUMN IF EXISTS search_vector",
+)
+
+# Triggers of the external content table, see https://sqlite.org/fts5.html
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": (
+        f"AFTER INSERT ON {TASK_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title); END"
+    ),
+    f"{FTS_TABLE}_ad": (
+        f"AFTER DELETE ON {TASK_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); END"
+    ),
+    f"{FTS_TABLE}_au": (
+        f"AFTER UPDATE OF title ON {TASK_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title) VALUES (new.id, new.title); END"
+    ),
+}
+
+
+def install_search_index(connection):
+    """Create the search index of the connection's backend and fill it"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for statement in POSTGRESQL_INSTALL:
+                cursor.execute(statement)
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"title, content='{TASK_TABLE}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            for name, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for statement in POSTGRESQL_UNINSTALL:
+                cursor.execute(statement)
+        elif connection.vendor == "sqlite":
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def repair_search_index(using, **kwargs):
+    """
+    post_migrate receiver. SQLite migrations altering the task table
+    rebuild it, which drops its triggers: reinstall them and reindex.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+            [TASK_TABLE],
+        )
+        installed = {name for name, in cursor.fetchall()}
+    if not installed.issuperset(SQLITE_TRIGGERS):
+        install_search_index(connection)
+
+
+def fts_query(terms):
+    """Match every term of the user's input as a literal FTS5 string"""
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms.split())
+
+
+def search_tasks(queryset, terms):
+    """
+    Filter a task queryset to the tasks matching terms and annotate them
+    with `search_rank`, which is lower for more relevant tasks so results
+    can be keyset paginated in ascending (search_rank, id) order.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+        vector = RawSQL(
+            f'"{TASK_TABLE}"."search_vector"', [], output_field=SearchVectorField()
+        )
+        # float8 so the rank read into a cursor compares equal on the next page
+        rank = Cast(SearchRank(vector, query), FloatField())
+        return queryset.alias(search_vector=vector).filter(
+            search_vector=query
+        ).annotate(search_rank=-rank)
+    if vendor == "sqlite":
+        match = fts_query(terms)
+        matches = RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        )
+        # bm25() is negative and lower for better matches. LIMIT -1 keeps
+        # SQLite from flattening the scores into a MATCH run per task: they
+        # are computed once per query and looked up by rowid.
+        rank = RawSQL(
+            f"SELECT score FROM (SELECT rowid AS task_id, bm25({FTS_TABLE}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT -1) "
+            f'WHERE task_id = "{TASK_TABLE}"."id"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+    condition = Q()
+    for term in terms.split():
+        condition &= Q(title__icontains=term)
+    return queryset.filter(condition).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
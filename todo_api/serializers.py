@@ -1,11 +1,70 @@
-from rest_framework import serializers
+from django.utils import timezone
+from django.utils.encoding import smart_str
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from rest_framework.serializers import ModelSerializer
-from todo_api.models import Task, TaskList
+from todo_api.models import INBOX_NAME, Task, TaskList, Tombstone
 
 from core.serializers import UserSerializer
+import uuid
 
 
-class TaskListSerializer(ModelSerializer):
+def get_sparse_fields(request, field_names):
+    """
+    Return the field names kept by the `fields` and `omit` query params.
+    Unknown names are ignored and only GET requests are narrowed.
+    """
+    if request is None or request.method != "GET":
+        return list(field_names)
+    selected = list(field_names)
+    fields = request.query_params.get("fields")
+    omit = request.query_params.get("omit")
+    if fields:
+        wanted = {name.strip() for name in fields.split(",")}
+        selected = [name for name in selected if name in wanted]
+    if omit:
+        omitted = {name.strip() for name in omit.split(",")}
+        selected = [name for name in selected if name not in omitted]
+    return selected
+
+
+class SparseFieldsMixin:
+    """Serialize only the fields selected with `?fields=` and `?omit=`"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        selected = set(get_sparse_fields(request, self.fields))
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+
+class TaskListUUIDField(serializers.SlugRelatedField):
+    """
+    Task list referenced by list_uuid. When the serializer context holds
+    preloaded `task_lists` they are used instead of one query per item.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", TaskList.objects.all())
+        super().__init__(slug_field="list_uuid", **kwargs)
+
+    def to_internal_value(self, data):
+        task_lists = self.context.get("task_lists")
+        if task_lists is None:
+            return super().to_internal_value(data)
+        try:
+            return task_lists[uuid.UUID(str(data))]
+        except ValueError:
+            self.fail("invalid")
+        except KeyError:
+            self.fail(
+                "does_not_exist", slug_name=self.slug_field, value=smart_str(data)
+            )
+
+
+class TaskListSerializer(SparseFieldsMixin, ModelSerializer):
     """Serializer for TaskList instances"""
 
     class Meta:
@@ -18,8 +77,40 @@ class TaskListSerializer(ModelSerializer):
         )
         read_only_fields = ("id", "list_uuid")
 
+    def validate_name(self, value):
+        """Each user owns a single inbox"""
+        request = self.context.get("request")
+        if value == INBOX_NAME and request is not None:
+            inboxes = TaskList.objects.filter(name=INBOX_NAME, created_by=request.user)
+            if self.instance is not None:
+                inboxes = inboxes.exclude(pk=self.instance.pk)
+            if inboxes.exists():
+                raise serializers.ValidationError("Inbox list already exists.")
+        return value
+
+
+class TaskListSummarySerializer(TaskListSerializer):
+    """
+    TaskList with the task counts stored on it and the next due date read
+    from the `task_list_aggregates()` annotation. Lists loaded without
+    it, such as a list just created, have no next due date.
+    """
+
+    next_due_date = serializers.DateTimeField(default=None, read_only=True)
+
+    class Meta(TaskListSerializer.Meta):
+        fields = TaskListSerializer.Meta.fields + (
+            "task_count",
+            "completed_count",
+            "next_due_date",
+        )
+        read_only_fields = TaskListSerializer.Meta.read_only_fields + (
+            "task_count",
+            "completed_count",
+        )
+
 
-class TaskSerializer(ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, ModelSerializer):
     """Serializer for Task instances to list tasks"""
 
     class Meta:
@@ -41,12 +132,23 @@ class TaskSerializer(ModelSerializer):
 class TaskCountSerializer(serializers.Serializer):
     """Serializer for counting tasks"""
 
-    total = serializers.IntegerField(default=0, read_only=True)
-    completed = serializers.IntegerField(default=0, read_only=True)
-    uncompleted = serializers.IntegerField(default=0, read_only=True)
+    total = serializers.IntegerField(default=0, read_only=True, source="task_count")
+    completed = serializers.IntegerField(
+        default=0, read_only=True, source="completed_count"
+    )
+    uncompleted = serializers.IntegerField(
+        default=0, read_only=True, source="uncompleted_count"
+    )
 
 
-class TaskDetailSerializer(ModelSerializer):
+class TaskListCountSerializer(TaskCountSerializer):
+    """Serializer for counting tasks of each list"""
+
+    list_uuid = serializers.UUIDField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class TaskDetailSerializer(SparseFieldsMixin, ModelSerializer):
     """Serializer for Task instances to detail"""
 
     created_by = UserSerializer(many=False, read_only=True)
@@ -74,6 +176,7 @@ class TaskCreateSerializer(ModelSerializer):
     """Serializer for Task instances to create"""
 
     created_by = UserSerializer(many=False, read_only=True)
+    task_list = TaskListUUIDField(required=False, allow_null=True)
 
     class Meta:
         model = Task
@@ -90,3 +193,129 @@ class TaskCreateSerializer(ModelSerializer):
             "id",
             "task_uuid",
         )
+
+
+class TaskSyncSerializer(ModelSerializer):
+    """Serializer for Task instances returned by delta sync"""
+
+    # Read the list_uuid from the row instead of loading the list
+    task_list = serializers.UUIDField(source="task_list_id", read_only=True)
+
+    class Meta:
+        model = Task
+        fields = (
+            "id",
+            "task_uuid",
+            "title",
+            "completed",
+            "due_date",
+            "task_list",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class TaskListSyncSerializer(ModelSerializer):
+    """Serializer for TaskList instances returned by delta sync"""
+
+    class Meta:
+        model = TaskList
+        fields = (
+            "id",
+            "list_uuid",
+            "name",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class TombstoneSerializer(ModelSerializer):
+    """Serializer for deleted tasks and lists returned by delta sync"""
+
+    class Meta:
+        model = Tombstone
+        fields = (
+            "kind",
+            "object_uuid",
+            "deleted_at",
+        )
+        read_only_fields = fields
+
+
+def _datetime_converter(field):
+    """Precompile DateTimeField.to_representation for ISO 8601 output"""
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+class RowSerializer:
+    """
+    Read-only fast path for a ModelSerializer, building its representation
+    from `values_list()` rows with one precompiled converter per field.
+    Raises ValueError for serializers with fields it cannot compile.
+    """
+
+    def __init__(self, serializer):
+        model = serializer.Meta.model
+        self.names = []
+        self.columns = []
+        self.converters = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            convert = self.compile_field(model, field)
+            if convert is not None:
+                self.converters.append((name, len(self.columns), convert))
+            self.names.append(name)
+            self.columns.append(field.source)
+
+    def compile_field(self, model, field):
+        if isinstance(field, serializers.SlugRelatedField):
+            # The foreign key column already holds the slug of the target
+            model_field = model._meta.get_field(field.source)
+            if model_field.target_field.name != field.slug_field:
+                raise ValueError(f"Cannot compile related field {field.field_name}")
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            return _datetime_converter(field)
+        if isinstance(field, serializers.UUIDField):
+            return field.to_representation
+        if isinstance(field, (serializers.BooleanField, serializers.IntegerField)):
+            return None
+        if type(field) is serializers.CharField:
+            return None
+        raise ValueError(f"Cannot compile field {field.field_name}")
+
+    def get_queryset(self, queryset, extra_columns=()):
+        """Return named rows holding the serialized and extra columns"""
+        extra = [column for column in extra_columns if column not in self.columns]
+        return queryset.values_list(*self.columns, *extra, named=True)
+
+    def to_representation(self, rows):
+        names, converters = self.names, self.converters
+        data = []
+        for row in rows:
+            # zip() stops before the extra columns appended to each row
+            item = dict(zip(names, row))
+            for name, index, convert in converters:
+                value = row[index]
+                if value is not None:
+                    item[name] = convert(value)
+            data.append(item)
+        return data
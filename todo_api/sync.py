@@ -0,0 +1,84 @@
+"""
+Delta sync of a user's task lists, tasks and deletions
+"""
+import base64
+import heapq
+import itertools
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .models import Task, TaskList, Tombstone
+from .serializers import TaskListSyncSerializer, TaskSyncSerializer, TombstoneSerializer
+
+# Changes are ordered by (sync_version, source, id). Every row written by
+# a user takes a new version of the user's collection, so the order only
+# moves forward and a token never skips a committed change.
+SOURCES = (
+    ("lists", TaskList, "created_by", TaskListSyncSerializer),
+    ("tasks", Task, "created_by", TaskSyncSerializer),
+    ("deleted", Tombstone, "user", TombstoneSerializer),
+)
+INVALID_TOKEN_MESSAGE = "Invalid sync token."
+
+
+def encode_token(position):
+    payload = ".".join(str(value) for value in position)
+    return base64.urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+
+
+def decode_token(token):
+    """Return the (sync_version, source, id) position of a token"""
+    try:
+        payload = base64.urlsafe_b64decode(token.encode("ascii")).decode("ascii")
+        version, source, pk = (int(value) for value in payload.split("."))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValidationError({"since": [INVALID_TOKEN_MESSAGE]})
+    if version < 0 or not -1 <= source < len(SOURCES):
+        raise ValidationError({"since": [INVALID_TOKEN_MESSAGE]})
+    return version, source, pk
+
+
+def seek_filter(position, source):
+    """Rows of a source ordered after position, as an index range scan"""
+    version, after_source, pk = position
+    condition = Q(sync_version__gt=version)
+    if source > after_source:
+        condition |= Q(sync_version=version)
+    elif source == after_source:
+        condition |= Q(sync_version=version, id__gt=pk)
+    return Q(sync_version__gte=version) & condition
+
+
+def get_changes(user, since, limit):
+    """
+    Return up to limit changes after the `since` token with the token to
+    resume from. Each source is read with one query on its
+    (owner, sync_version, id) index, then the sources are merged.
+    """
+    position = decode_token(since) if since else None
+    streams = []
+    for source, (_, model, owner, _) in enumerate(SOURCES):
+        rows = model.objects.filter(**{owner: user})
+        if position is not None:
+            rows = rows.filter(seek_filter(position, source))
+        rows = rows.order_by("sync_version", "id")[: limit + 1]
+        streams.append([((row.sync_version, source, row.id), row) for row in rows])
+
+    changes = list(itertools.islice(heapq.merge(*streams, key=lambda item: item[0]), limit + 1))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        position = changes[-1][0]
+    elif position is None:
+        # Nothing written yet: resume from before the first change
+        position = (0, -1, 0)
+
+    data = {name: [] for name, *_ in SOURCES}
+    for (_, source, _), row in changes:
+        data[SOURCES[source][0]].append(row)
+    for name, _, _, serializer_class in SOURCES:
+        data[name] = serializer_class(data[name], many=True).data
+    data["sync_token"] = encode_token(position)
+    data["has_more"] = has_more
+    return data
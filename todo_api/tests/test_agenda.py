@@ -0,0 +1,158 @@
+import datetime
+import zoneinfo
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task
+
+TASKS_UPCOMING_URL = reverse("todo_api:tasks-upcoming")
+TASKS_AGENDA_URL = reverse("todo_api:tasks-agenda")
+
+NEW_YORK = zoneinfo.ZoneInfo("America/New_York")
+# Wednesday 2024-05-15, 06:00 in New York
+NOW = datetime.datetime(2024, 5, 15, 10, 0, tzinfo=datetime.timezone.utc)
+
+
+def local(*args):
+    return datetime.datetime(*args, tzinfo=NEW_YORK)
+
+
+class TaskDatesTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, title, due_date=None, **kwargs):
+        return Task.objects.create(
+            title=title, created_by=self.user, due_date=due_date, **kwargs
+        )
+
+
+class TestUpcomingWindow(TaskDatesTestCase):
+    """Test windowing /api/tasks/upcoming/"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_task("Last year", local(2023, 5, 15, 9), completed=True)
+        self.create_task("Monday", local(2024, 5, 13, 9))
+        self.create_task("Friday night", local(2024, 5, 17, 23))
+        self.create_task("Done friday", local(2024, 5, 17, 9), completed=True)
+        self.create_task("Next month", local(2024, 6, 15, 9))
+        self.create_task("Someday")
+
+    def titles(self, **params):
+        res = self.client.get(TASKS_UPCOMING_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in res.data["results"]]
+
+    def test_no_window_lists_every_dated_task(self):
+        """Test upcoming without parameters keeps listing all dated tasks"""
+        self.assertEqual(
+            self.titles(),
+            ["Last year", "Monday", "Done friday", "Friday night", "Next month"],
+        )
+
+    def test_window_includes_whole_days(self):
+        """Test date bounds cover the whole days in the given timezone"""
+        titles = self.titles(
+            **{"from": "2024-05-14", "to": "2024-05-17", "tz": "America/New_York"}
+        )
+
+        self.assertEqual(titles, ["Done friday", "Friday night"])
+
+    def test_window_naive_datetimes_read_in_timezone(self):
+        """Test naive datetime bounds are read in the given timezone"""
+        titles = self.titles(
+            **{"from": "2024-05-17T12:00:00", "tz": "America/New_York"}
+        )
+
+        self.assertEqual(titles, ["Friday night", "Next month"])
+
+    def test_exclude_completed(self):
+        """Test include_completed=false leaves out completed tasks"""
+        titles = self.titles(include_completed="false")
+
+        self.assertEqual(titles, ["Monday", "Friday night", "Next month"])
+
+    def test_invalid_parameters_rejected(self):
+        """Test invalid dates, flags and timezones return bad request"""
+        for params in (
+            {"from": "yesterday"},
+            {"to": "2024-02-30"},
+            {"include_completed": "maybe"},
+            {"tz": "Mars/Olympus"},
+        ):
+            res = self.client.get(TASKS_UPCOMING_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+@mock.patch("django.utils.timezone.now", return_value=NOW)
+class TestAgenda(TaskDatesTestCase):
+    """Test the buckets of /api/tasks/agenda/"""
+
+    def agenda(self, **params):
+        res = self.client.get(TASKS_AGENDA_URL, {"tz": "America/New_York", **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_tasks_bucketed_in_timezone(self, _):
+        """Test tasks are bucketed by the local day they are due"""
+        self.create_task("Yesterday", local(2024, 5, 14, 12))
+        self.create_task("Tonight", local(2024, 5, 15, 23))
+        self.create_task("Tomorrow", local(2024, 5, 16, 9))
+        self.create_task("Saturday", local(2024, 5, 18, 9))
+        self.create_task("Sunday night", local(2024, 5, 19, 23, 30))
+        self.create_task("Next week", local(2024, 5, 20, 9))
+        self.create_task("Done", local(2024, 5, 14, 9), completed=True)
+        self.create_task("Someday")
+
+        data = self.agenda()
+
+        self.assertEqual(data["date"], "2024-05-15")
+        self.assertEqual(data["timezone"], "America/New_York")
+        buckets = {
+            bucket: [item["title"] for item in data[bucket]]
+            for bucket in ("overdue", "today", "tomorrow", "this_week")
+        }
+        self.assertEqual(
+            buckets,
+            {
+                "overdue": ["Yesterday"],
+                "today": ["Tonight"],
+                "tomorrow": ["Tomorrow"],
+                "this_week": ["Saturday", "Sunday night"],
+            },
+        )
+
+    def test_tomorrow_can_be_next_week(self, now):
+        """Test tomorrow is still listed on the last day of the week"""
+        now.return_value = local(2024, 5, 19, 9)
+        self.create_task("Monday", local(2024, 5, 20, 9))
+
+        data = self.agenda()
+
+        self.assertEqual([item["title"] for item in data["tomorrow"]], ["Monday"])
+        self.assertEqual(data["this_week"], [])
+
+    def test_agenda_is_one_query(self, _):
+        """Test every bucket is read with a single query"""
+        self.create_task("Today", local(2024, 5, 15, 9))
+        self.create_task("Tomorrow", local(2024, 5, 16, 9))
+
+        with self.assertNumQueries(1):
+            self.agenda()
+
+    def test_invalid_timezone_rejected(self, _):
+        """Test an unknown timezone returns bad request"""
+        res = self.client.get(TASKS_AGENDA_URL, {"tz": "Nowhere"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
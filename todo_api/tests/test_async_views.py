@@ -0,0 +1,180 @@
+import base64
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, RequestFactory, TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auth_api.authentication import StatelessJWTCookieAuthentication
+from auth_api.serializers import ClaimsTokenObtainPairSerializer
+from todo_api.models import Task, TaskList
+
+ASYNC_TASKS_URL = reverse("todo_api_async:tasks-list")
+ASYNC_TASKS_COUNT_URL = reverse("todo_api_async:tasks-count")
+ASYNC_TASKS_UPCOMING_URL = reverse("todo_api_async:tasks-upcoming")
+ASYNC_LISTS_URL = reverse("todo_api_async:lists-list")
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_COUNT_URL = reverse("todo_api:tasks-count")
+TASKS_UPCOMING_URL = reverse("todo_api:tasks-upcoming")
+LISTS_URL = reverse("todo_api:lists-list")
+
+
+async def fetch(method, *args, **kwargs):
+    return await method(*args, **kwargs)
+
+
+def async_list_detail_url(list_uuid):
+    return reverse("todo_api_async:lists-detail", args=[list_uuid])
+
+
+class TestAsyncReadViews(TestCase):
+    """Test the async read endpoints match their synchronous versions"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(user=self.user)
+        self.task_list = TaskList.objects.create(name="Work", created_by=self.user)
+        Task.objects.create(title="Inbox task", created_by=self.user)
+        Task.objects.create(
+            title="Work task",
+            created_by=self.user,
+            task_list=self.task_list,
+            completed=True,
+            due_date=timezone.now(),
+        )
+
+    def get(self, url, data=None, **headers):
+        # AsyncClient takes raw ASGI header names
+        headers["authorization"] = f"Bearer {self.token}"
+        return async_to_sync(fetch)(self.client.get, url, data or {}, **headers)
+
+    def assertSameAsSync(self, async_url, sync_url, data=None):
+        res = self.get(async_url, data)
+        expected = self.sync_client.get(sync_url, data or {})
+
+        self.assertEqual(res.status_code, expected.status_code)
+        content = res.content.replace(b"/api/async/", b"/api/")
+        self.assertEqual(json.loads(content), json.loads(expected.content))
+
+    def test_task_list(self):
+        """Test listing tasks"""
+        self.assertSameAsSync(ASYNC_TASKS_URL, TASKS_URL, {"page_size": 1})
+        self.assertSameAsSync(
+            ASYNC_TASKS_URL, TASKS_URL, {"list": str(self.task_list.list_uuid)}
+        )
+
+    def test_task_list_invalid_list(self):
+        """Test listing tasks of an invalid list returns not found"""
+        self.assertSameAsSync(ASYNC_TASKS_URL, TASKS_URL, {"list": "not-a-uuid"})
+
+    def test_task_count(self):
+        """Test counting tasks"""
+        self.assertSameAsSync(ASYNC_TASKS_COUNT_URL, TASKS_COUNT_URL)
+        self.assertSameAsSync(ASYNC_TASKS_COUNT_URL, TASKS_COUNT_URL, {"lists": "all"})
+        self.assertSameAsSync(ASYNC_TASKS_COUNT_URL, TASKS_COUNT_URL, {"list": "upcoming"})
+
+    def test_task_upcoming(self):
+        """Test listing upcoming tasks"""
+        self.assertSameAsSync(ASYNC_TASKS_UPCOMING_URL, TASKS_UPCOMING_URL)
+
+    def test_lists(self):
+        """Test listing and retrieving task lists"""
+        self.assertSameAsSync(ASYNC_LISTS_URL, LISTS_URL)
+        res = self.get(async_list_detail_url(self.task_list.list_uuid))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)["name"], "Work")
+
+    def test_list_detail_not_found(self):
+        """Test retrieving a missing list returns not found"""
+        res = self.get(async_list_detail_url("00000000-0000-0000-0000-000000000000"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(json.loads(res.content), {"message": "List Not found."})
+
+    def test_unchanged_collection_not_modified(self):
+        """Test a matching If-None-Match is answered with 304"""
+        etag = self.get(ASYNC_TASKS_URL)["ETag"]
+
+        res = self.get(ASYNC_TASKS_URL, **{"if-none-match": etag})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_response_is_cached(self):
+        """Test repeated reads are served from the response cache"""
+        self.assertEqual(self.get(ASYNC_TASKS_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.get(ASYNC_TASKS_URL)["X-Cache"], "HIT")
+
+    def test_authentication_required(self):
+        """Test anonymous requests are rejected"""
+        res = async_to_sync(fetch)(AsyncClient().get, ASYNC_TASKS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("WWW-Authenticate", res)
+
+    def test_session_and_basic_authentication(self):
+        """Test the credentials of the sync viewsets are accepted"""
+        client = AsyncClient()
+        client.force_login(self.user)
+        res = async_to_sync(fetch)(client.get, ASYNC_TASKS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        basic = base64.b64encode(b"user@example.com:userexample123").decode()
+        res = async_to_sync(fetch)(
+            AsyncClient().get, ASYNC_TASKS_URL, authorization=f"Basic {basic}"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_writes_not_allowed(self):
+        """Test the async endpoints are read only"""
+        res = async_to_sync(fetch)(
+            self.client.post,
+            ASYNC_TASKS_URL, {"title": "Task"}, authorization=f"Bearer {self.token}"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class TestAsyncAuthentication(TestCase):
+    """Test authenticating from async views"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.factory = RequestFactory()
+
+    def test_claims_authenticate_without_query(self):
+        """Test tokens with claims authenticate on the event loop"""
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with self.assertNumQueries(0):
+            user, _ = async_to_sync(StatelessJWTCookieAuthentication().aauthenticate)(
+                request
+            )
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_token_without_claims_loads_user(self):
+        """Test tokens without claims load the user from the database"""
+        token = AccessToken.for_user(self.user)
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with self.assertNumQueries(1):
+            user, _ = async_to_sync(StatelessJWTCookieAuthentication().aauthenticate)(
+                request
+            )
+
+        self.assertEqual(user.email, self.user.email)
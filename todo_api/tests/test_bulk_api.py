@@ -0,0 +1,151 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task, TaskList, _remember_inbox
+
+TASKS_BULK_URL = reverse("todo_api:tasks-bulk")
+
+
+def create_user(email="user@example.com", password="userexample123"):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_task(user, **params):
+    payload = {"title": "Task", "completed": False}
+    payload.update(params)
+    return Task.objects.create(created_by=user, **payload)
+
+
+class TestBulkTaskAPI(TestCase):
+    """Test bulk task operations"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(user=self.user)
+        self.task_list = TaskList.objects.create(name="List", created_by=self.user)
+
+    def bulk(self, payload):
+        return self.client.post(TASKS_BULK_URL, payload, format="json")
+
+    def test_bulk_create_update_delete(self):
+        """Test applying every kind of operation in one request"""
+        task = create_task(user=self.user)
+        removed = create_task(user=self.user)
+        payload = {
+            "create": [
+                {"title": "In list", "task_list": str(self.task_list.list_uuid)},
+                {"title": "In inbox"},
+            ],
+            "update": [{"task_uuid": str(task.task_uuid), "completed": True}],
+            "delete": [str(removed.task_uuid)],
+        }
+
+        res = self.bulk(payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["status"] for r in res.data["create"]], ["created"] * 2)
+        self.assertEqual(res.data["update"][0]["status"], "updated")
+        self.assertEqual(res.data["delete"][0]["status"], "deleted")
+        task.refresh_from_db()
+        self.assertTrue(task.completed)
+        self.assertFalse(Task.objects.filter(pk=removed.pk).exists())
+        created = Task.objects.get(title="In list")
+        inboxed = Task.objects.get(title="In inbox")
+        self.assertEqual(created.task_list, self.task_list)
+        self.assertEqual(inboxed.task_list, TaskList.objects.get_inbox(self.user.pk))
+        self.assertEqual(created.created_by, self.user)
+
+    def test_bulk_query_count_is_constant(self):
+        """Test the number of queries does not grow with the items"""
+        TaskList.objects.get_inbox(self.user.pk)
+
+        def payload(size):
+            tasks = [create_task(user=self.user) for _ in range(size * 2)]
+            return {
+                "create": [
+                    {"title": f"Task {i}", "task_list": str(self.task_list.list_uuid)}
+                    for i in range(size)
+                ],
+                "update": [
+                    {"task_uuid": str(t.task_uuid), "title": "Updated"}
+                    for t in tasks[:size]
+                ],
+                "delete": [str(t.task_uuid) for t in tasks[size:]],
+            }
+
+        small, large = payload(2), payload(50)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.bulk(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            res = self.bulk(large)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_bulk_invalid_item_applies_nothing(self):
+        """Test a single invalid item rejects the whole request"""
+        payload = {
+            "create": [{"title": "Valid"}, {"title": ""}],
+            "delete": ["not-a-uuid"],
+        }
+
+        res = self.bulk(payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["create"][0], {})
+        self.assertIn("title", res.data["create"][1])
+        self.assertIn("task_uuid", res.data["delete"][0])
+        self.assertFalse(Task.objects.filter(title="Valid").exists())
+
+    def test_bulk_create_to_inbox_deleted_by_another_process(self):
+        """Test tasks created to a stale cached inbox move to the current one"""
+        with self.captureOnCommitCallbacks(execute=True):
+            stale = TaskList.objects.get_inbox(self.user.pk)
+        stale.delete()
+        # Another worker deleted it, this one still holds the list_uuid
+        _remember_inbox(self.user.pk, stale.list_uuid)
+
+        res = self.bulk({"create": [{"title": "One"}, {"title": "Two"}]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        inbox = TaskList.objects.get(name="inbox", created_by=self.user)
+        self.assertEqual(inbox.task_count, 2)
+        self.assertEqual(Task.objects.filter(task_list=inbox).count(), 2)
+
+    def test_bulk_body_must_be_object(self):
+        """Test JSON bodies other than an object of arrays are rejected"""
+        for payload in ([1, 2], "x", {"create": {"title": "T"}}, {"delete": "x"}):
+            with self.subTest(payload=payload):
+                res = self.bulk(payload)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", self.bulk([1, 2]).data)
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_limited_to_user(self):
+        """Test other users tasks and lists cannot be touched"""
+        user_two = create_user(email="usertwo@example.com")
+        other_task = create_task(user=user_two)
+        other_list = TaskList.objects.create(name="Other", created_by=user_two)
+
+        res = self.bulk({"create": [{"title": "T", "task_list": str(other_list.list_uuid)}]})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.bulk(
+            {
+                "update": [{"task_uuid": str(other_task.task_uuid), "title": "Mine"}],
+                "delete": [str(other_task.task_uuid)],
+            }
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["update"][0]["status"], "not_found")
+        self.assertEqual(res.data["delete"][0]["status"], "not_found")
+        other_task.refresh_from_db()
+        self.assertEqual(other_task.title, "Task")
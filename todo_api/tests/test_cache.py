@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.cache import stats
+from todo_api.models import Task
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_COUNT_URL = reverse("todo_api:tasks-count")
+TASKS_LISTS_URL = reverse("todo_api:lists-list")
+
+
+class TestResponseCache(TestCase):
+    """Test cached responses of the read endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(title="Task", created_by=self.user)
+        stats.reset()
+
+    def test_repeated_read_is_served_from_cache(self):
+        """Test a second read only looks up the collection version"""
+        first = self.client.get(TASKS_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(TASKS_URL)
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(stats.as_dict(), {"hits": 1, "misses": 1, "ratio": 0.5})
+
+    def test_query_params_are_part_of_the_key(self):
+        """Test different query params are cached separately"""
+        self.client.get(TASKS_COUNT_URL)
+        res = self.client.get(TASKS_COUNT_URL, {"list": "upcoming"})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["total"], 0)
+
+    def test_write_invalidates_cached_reads(self):
+        """Test saving a task bumps the generation used in the key"""
+        self.client.get(TASKS_COUNT_URL)
+        Task.objects.create(title="Other", created_by=self.user)
+
+        res = self.client.get(TASKS_COUNT_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["total"], 2)
+
+    def test_cache_is_scoped_to_user(self):
+        """Test users never read each other's cached responses"""
+        self.client.get(TASKS_LISTS_URL)
+        user_two = get_user_model().objects.create_user(
+            email="usertwo@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=user_two)
+
+        res = self.client.get(TASKS_LISTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data, [])
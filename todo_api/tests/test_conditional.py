@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import CollectionVersion, Task, TaskList
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_COUNT_URL = reverse("todo_api:tasks-count")
+TASKS_LISTS_URL = reverse("todo_api:lists-list")
+
+
+def create_user(email="user@example.com", password="userexample123"):
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+class TestConditionalCollections(TestCase):
+    """Test ETag and Last-Modified on task and list collections"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(user=self.user)
+        Task.objects.create(title="Task", created_by=self.user)
+
+    def test_collections_return_validators(self):
+        """Test collections expose a strong ETag and Last-Modified"""
+        CollectionVersion.objects.filter(user_id=self.user.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(seconds=2)
+        )
+        for url in (TASKS_URL, TASKS_COUNT_URL, TASKS_LISTS_URL):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertFalse(res["ETag"].startswith("W/"))
+            self.assertIn("Last-Modified", res)
+
+    def test_unchanged_collection_not_modified(self):
+        """Test a matching If-None-Match returns 304 with a single query"""
+        etag = self.client.get(TASKS_URL)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_last_modified_within_changed_second(self):
+        """Test Last-Modified waits for the second of the last write to pass"""
+        # A later write in this second would keep the same HTTP date
+        res = self.client.get(TASKS_URL)
+        self.assertNotIn("Last-Modified", res)
+
+        version = CollectionVersion.objects.current(self.user.pk)
+        later = version.updated_at + timezone.timedelta(seconds=1)
+        with mock.patch("todo_api.conditional.timezone.now", return_value=later):
+            res = self.client.get(TASKS_URL)
+        self.assertEqual(res["Last-Modified"], http_date(version.updated_at.timestamp()))
+
+    def test_task_write_changes_etag(self):
+        """Test creating, updating or deleting a task bumps the version"""
+        etag = self.client.get(TASKS_COUNT_URL)["ETag"]
+        task = Task.objects.create(title="Other", created_by=self.user)
+        res = self.client.get(TASKS_COUNT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res["ETag"]
+        task.delete()
+        res = self.client.get(TASKS_COUNT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_delete_changes_etag(self):
+        """Test deleting a task list bumps the version"""
+        task_list = TaskList.objects.create(name="List", created_by=self.user)
+        etag = self.client.get(TASKS_LISTS_URL)["ETag"]
+
+        task_list.delete()
+        res = self.client.get(TASKS_LISTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_etag_is_scoped_to_user(self):
+        """Test another user with the same version gets a different ETag"""
+        user_two = create_user(email="usertwo@example.com")
+        Task.objects.create(title="Task", created_by=user_two)
+        self.assertEqual(
+            CollectionVersion.objects.current(user_two.pk).version,
+            CollectionVersion.objects.current(self.user.pk).version,
+        )
+        etag = self.client.get(TASKS_URL)["ETag"]
+
+        self.client.force_authenticate(user=user_two)
+        res = self.client.get(TASKS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
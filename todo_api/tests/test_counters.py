@@ -0,0 +1,186 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from todo_api.models import Task, TaskList, TaskStats
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_BULK_URL = reverse("todo_api:tasks-bulk")
+TASKS_COUNT_URL = reverse("todo_api:tasks-count")
+
+
+def task_url(task):
+    return reverse("todo_api:tasks-detail", args=[task.task_uuid])
+
+
+def list_url(task_list):
+    return reverse("todo_api:lists-detail", args=[task_list.list_uuid])
+
+
+class TestTaskCounters(TestCase):
+    """Test task counters follow task writes"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.work = TaskList.objects.create(name="Work", created_by=self.user)
+        self.home = TaskList.objects.create(name="Home", created_by=self.user)
+
+    def assertCounts(self, expected):
+        """Compare the counters of the user and lists to a recount"""
+        stats = TaskStats.objects.current(self.user.pk)
+        counts = {"user": (stats.task_count, stats.completed_count)}
+        for task_list in TaskList.objects.filter(created_by=self.user):
+            counts[task_list.name] = (task_list.task_count, task_list.completed_count)
+        self.assertEqual(counts, expected)
+        self.assertEqual(TaskStats.objects.recount([self.user.pk]), (0, 0))
+
+    def test_create_toggle_move_and_delete(self):
+        """Test the counters of the lists and of the user through the API"""
+        res = self.client.post(
+            TASKS_URL, {"title": "Report", "task_list": str(self.work.list_uuid)}
+        )
+        task = Task.objects.get(task_uuid=res.data["task_uuid"])
+        self.client.post(TASKS_URL, {"title": "Inbox task"})
+        self.assertCounts({"user": (2, 0), "Work": (1, 0), "Home": (0, 0), "inbox": (1, 0)})
+
+        self.client.patch(task_url(task), {"completed": True})
+        self.client.patch(task_url(task), {"completed": True})
+        self.assertCounts({"user": (2, 1), "Work": (1, 1), "Home": (0, 0), "inbox": (1, 0)})
+
+        self.client.put(
+            task_url(task),
+            {"title": "Report", "completed": True, "task_list": str(self.home.list_uuid)},
+        )
+        self.assertCounts({"user": (2, 1), "Work": (0, 0), "Home": (1, 1), "inbox": (1, 0)})
+
+        self.client.delete(task_url(task))
+        self.assertCounts({"user": (1, 0), "Work": (0, 0), "Home": (0, 0), "inbox": (1, 0)})
+
+    def test_delete_list(self):
+        """Test the tasks of a deleted list leave the user counters"""
+        Task.objects.create(title="Done", completed=True, task_list=self.work, created_by=self.user)
+        Task.objects.create(title="Todo", task_list=self.home, created_by=self.user)
+
+        res = self.client.delete(list_url(self.work))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounts({"user": (1, 0), "Home": (1, 0)})
+
+    def test_bulk_operations(self):
+        """Test bulk creates, updates and deletes move the counters at once"""
+        moved = Task.objects.create(title="Moved", task_list=self.work, created_by=self.user)
+        deleted = Task.objects.create(
+            title="Deleted", completed=True, task_list=self.work, created_by=self.user
+        )
+
+        res = self.client.post(
+            TASKS_BULK_URL,
+            {
+                "create": [
+                    {"title": "New", "task_list": str(self.home.list_uuid), "completed": True},
+                    {"title": "Inbox"},
+                ],
+                "update": [
+                    {"task_uuid": str(moved.task_uuid), "task_list": str(self.home.list_uuid)},
+                    {"task_uuid": str(moved.task_uuid), "completed": True},
+                ],
+                "delete": [str(deleted.task_uuid)],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts({"user": (3, 2), "Work": (0, 0), "Home": (2, 2), "inbox": (1, 0)})
+
+    def test_bulk_update_without_list_moves_to_inbox(self):
+        """Test a bulk update clearing the list moves the task to the inbox"""
+        task = Task.objects.create(title="Moved", task_list=self.work, created_by=self.user)
+
+        res = self.client.post(
+            TASKS_BULK_URL,
+            {"update": [{"task_uuid": str(task.task_uuid), "task_list": None}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        task.refresh_from_db()
+        self.assertEqual(task.task_list.name, "inbox")
+        self.assertCounts({"user": (1, 0), "Work": (0, 0), "Home": (0, 0), "inbox": (1, 0)})
+
+    def test_count_reads_counters(self):
+        """Test counting reads the stored counters"""
+        Task.objects.create(title="Done", completed=True, task_list=self.work, created_by=self.user)
+        Task.objects.create(title="Todo", task_list=self.work, created_by=self.user)
+
+        # Collection version lookup and the stats row
+        with self.assertNumQueries(2):
+            res = self.client.get(TASKS_COUNT_URL)
+        by_list = self.client.get(TASKS_COUNT_URL, {"list": str(self.work.list_uuid)})
+
+        self.assertEqual(res.data, {"total": 2, "completed": 1, "uncompleted": 1})
+        self.assertEqual(by_list.data, {"total": 2, "completed": 1, "uncompleted": 1})
+
+    def test_count_other_user_list_not_found(self):
+        """Test the counters of another user's list are not readable"""
+        other = get_user_model().objects.create_user(email="other@example.com")
+        task_list = TaskList.objects.create(name="Private", created_by=other)
+
+        res = self.client.get(TASKS_COUNT_URL, {"list": str(task_list.list_uuid)})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestRecountTasksCommand(TestCase):
+    """Test the recount_tasks management command"""
+
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(email=f"user{index}@example.com")
+            for index in range(3)
+        ]
+        self.lists = [
+            TaskList.objects.create(name="Work", created_by=user) for user in self.users
+        ]
+        # bulk_create bypasses the counters
+        Task.objects.bulk_create(
+            Task(title=f"Task {index}", completed=index == 0, task_list=task_list, created_by=user)
+            for user, task_list in zip(self.users, self.lists)
+            for index in range(2)
+        )
+
+    def recount(self, **options):
+        stdout = io.StringIO()
+        call_command("recount_tasks", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_recount_fixes_drift(self):
+        """Test drifted lists and users are fixed chunk by chunk"""
+        output = self.recount(chunk_size=2)
+
+        self.assertIn("Recounted 3 users", output)
+        self.assertIn("3 lists and 3 users fixed", output)
+        for user, task_list in zip(self.users, self.lists):
+            task_list.refresh_from_db()
+            stats = TaskStats.objects.get(user=user)
+            self.assertEqual((task_list.task_count, task_list.completed_count), (2, 1))
+            self.assertEqual((stats.task_count, stats.completed_count), (2, 1))
+        self.assertIn("0 lists and 0 users fixed", self.recount())
+
+    def test_dry_run(self):
+        """Test a dry run reports drift without fixing it"""
+        output = self.recount(dry_run=True, user=[self.users[0].email])
+
+        self.assertIn("1 lists and 1 users drifted", output)
+        self.lists[0].refresh_from_db()
+        self.assertEqual(self.lists[0].task_count, 0)
+        self.assertFalse(TaskStats.objects.exists())
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task, TaskList
+
+TASKS_EXPORT_URL = reverse("todo_api:tasks-export")
+
+
+class TestTaskExport(TestCase):
+    """Test streaming exports of tasks and lists"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.task_list = TaskList.objects.create(name="Work", created_by=self.user)
+        self.first = Task.objects.create(title="First", created_by=self.user)
+        self.second = Task.objects.create(
+            title="Second, quoted",
+            created_by=self.user,
+            task_list=self.task_list,
+            due_date=timezone.now(),
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="userexample123"
+        )
+        Task.objects.create(title="Other", created_by=other)
+
+    def read(self, res):
+        return b"".join(res.streaming_content).decode("utf-8")
+
+    def test_export_ndjson(self):
+        """Test lists then tasks are streamed one JSON document per line"""
+        res = self.client.get(TASKS_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in self.read(res).splitlines()]
+        self.assertEqual(
+            [(r["type"], r.get("name") or r.get("title")) for r in records],
+            [
+                ("list", "Work"),
+                ("list", "inbox"),
+                ("task", "First"),
+                ("task", "Second, quoted"),
+            ],
+        )
+        self.assertEqual(records[3]["list_name"], "Work")
+        self.assertEqual(records[3]["list_uuid"], str(self.task_list.list_uuid))
+
+    def test_export_csv(self):
+        """Test tasks are streamed as CSV rows with their list name"""
+        res = self.client.get(TASKS_EXPORT_URL, {"output": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self.read(res))))
+        self.assertEqual([row["title"] for row in rows], ["First", "Second, quoted"])
+        self.assertEqual(rows[0]["list_name"], "inbox")
+        self.assertEqual(rows[1]["list_name"], "Work")
+        self.assertEqual(rows[1]["due_date"], self.second.due_date.isoformat())
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=1)
+    def test_export_is_chunked(self):
+        """Test the body is produced in chunks rather than all at once"""
+        res = self.client.get(TASKS_EXPORT_URL)
+
+        self.assertEqual(len(list(res.streaming_content)), 4)
+
+    def test_unsupported_output_rejected(self):
+        """Test unknown outputs return bad request"""
+        res = self.client.get(TASKS_EXPORT_URL, {"output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_authentication(self):
+        """Test anonymous users cannot export"""
+        res = APIClient().get(TASKS_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
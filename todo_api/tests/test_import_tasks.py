@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from todo_api.management.commands.import_tasks import Command
+from todo_api.models import CollectionVersion, Task, TaskList, TaskStats
+
+TASKS_EXPORT_URL = reverse("todo_api:tasks-export")
+
+
+class TestImportTasksCommand(TestCase):
+    """Test the import_tasks management command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def ndjson(self, records):
+        return "".join(json.dumps(record) + "\n" for record in records)
+
+    def run_import(self, path, **options):
+        options.setdefault("stdout", io.StringIO())
+        call_command("import_tasks", path, user=self.user.email, **options)
+
+    def test_import_ndjson(self):
+        """Test tasks are imported into their lists, creating missing ones"""
+        existing = TaskList.objects.create(name="Work", created_by=self.user)
+        path = self.write(
+            "tasks.ndjson",
+            self.ndjson(
+                [
+                    {"type": "list", "name": "Empty"},
+                    {"type": "task", "title": "In work", "list_name": "Work"},
+                    {
+                        "title": "In home",
+                        "list_name": "Home",
+                        "completed": True,
+                        "due_date": "2030-01-01T10:00:00Z",
+                        "created_at": "2020-01-01T10:00:00Z",
+                    },
+                    {"title": "No list"},
+                ]
+            ),
+        )
+
+        self.run_import(path, batch_size=2)
+
+        tasks = {task.title: task for task in Task.objects.filter(created_by=self.user)}
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(tasks["In work"].task_list_id, existing.list_uuid)
+        self.assertEqual(tasks["In home"].task_list.name, "Home")
+        self.assertTrue(tasks["In home"].completed)
+        self.assertEqual(tasks["In home"].created_at.year, 2020)
+        self.assertEqual(tasks["No list"].task_list.name, "inbox")
+        self.assertEqual(
+            sorted(TaskList.objects.values_list("name", flat=True)),
+            ["Empty", "Home", "Work", "inbox"],
+        )
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.task_count, stats.completed_count), (3, 1))
+        home = TaskList.objects.get(name="Home")
+        self.assertEqual((home.task_count, home.completed_count), (1, 1))
+
+    def test_import_keeps_field_options(self):
+        """Test created_at is kept without changing the shared field options"""
+        created_at = Task._meta.get_field("created_at")
+        path = self.write(
+            "tasks.ndjson", self.ndjson([{"title": "Old", "created_at": "2020-01-01T10:00:00Z"}])
+        )
+
+        with mock.patch.object(created_at, "pre_save", side_effect=AssertionError):
+            self.run_import(path)
+
+        self.assertTrue(created_at.auto_now_add)
+        self.assertEqual(Task.objects.get(title="Old").created_at.year, 2020)
+
+    def test_import_csv(self):
+        """Test CSV rows are imported"""
+        path = self.write(
+            "tasks.csv",
+            "title,completed,due_date,list_name\n"
+            '"Quoted, title",true,,Work\n'
+            "Plain,false,2030-01-01T10:00:00,\n",
+        )
+
+        self.run_import(path)
+
+        self.assertEqual(
+            sorted(
+                Task.objects.values_list("title", "completed", "task_list__name")
+            ),
+            [("Plain", False, "inbox"), ("Quoted, title", True, "Work")],
+        )
+
+    def test_import_bumps_collection_version(self):
+        """Test cached collections are invalidated by an import"""
+        version = CollectionVersion.objects.current(self.user.pk).version
+        path = self.write("tasks.ndjson", self.ndjson([{"title": "Task"}]))
+
+        self.run_import(path)
+
+        self.assertGreater(CollectionVersion.objects.current(self.user.pk).version, version)
+
+    def test_resume_from_checkpoint(self):
+        """Test a failed import resumes after the last committed batch"""
+        records = [{"title": "First"}, {"title": "Second"}, {"title": ""}]
+        path = self.write("tasks.ndjson", self.ndjson(records))
+
+        with self.assertRaisesMessage(CommandError, "Record 3"):
+            self.run_import(path, batch_size=2)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertTrue(os.path.exists(f"{path}.checkpoint"))
+
+        records[2]["title"] = "Third"
+        self.write("tasks.ndjson", self.ndjson(records))
+        self.run_import(path, batch_size=2)
+
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)),
+            ["First", "Second", "Third"],
+        )
+
+    def test_resume_after_unrecorded_batch(self):
+        """Test a batch committed before its checkpoint is not imported twice"""
+        records = [{"title": "First"}, {"title": "Second"}, {"title": "Third"}]
+        path = self.write("tasks.ndjson", self.ndjson(records))
+        write_checkpoint = Command.write_checkpoint
+
+        def crash_after_first_batch(command, checkpoint, state):
+            if state["records"]:
+                raise KeyboardInterrupt
+            write_checkpoint(command, checkpoint, state)
+
+        with mock.patch.object(Command, "write_checkpoint", crash_after_first_batch):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Task.objects.count(), 2)
+
+        self.run_import(path, batch_size=2)
+
+        self.assertEqual(
+            sorted(Task.objects.values_list("title", flat=True)),
+            ["First", "Second", "Third"],
+        )
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual(stats.task_count, 3)
+
+    def test_export_round_trip(self):
+        """Test an export can be imported back for another user"""
+        task_list = TaskList.objects.create(name="Work", created_by=self.user)
+        Task.objects.create(
+            title="Task", created_by=self.user, task_list=task_list, due_date=timezone.now()
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        content = b"".join(client.get(TASKS_EXPORT_URL).streaming_content)
+        path = self.write("export.ndjson", content.decode("utf-8"))
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="userexample123"
+        )
+
+        call_command("import_tasks", path, user=other.email, stdout=io.StringIO())
+
+        self.assertEqual(
+            list(Task.objects.filter(created_by=other).values_list("title", "task_list__name")),
+            [("Task", "Work")],
+        )
+
+    def test_unknown_user_rejected(self):
+        """Test importing for a missing user fails"""
+        path = self.write("tasks.ndjson", "")
+
+        with self.assertRaises(CommandError):
+            call_command("import_tasks", path, user="missing@example.com")
@@ -0,0 +1,101 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from todo_api.agenda import agenda_bounds, agenda_queryset
+from todo_api.models import Task, TaskList
+from todo_api.views import TaskViewSet, TaskListViewSet
+
+
+def get_view_queryset(viewset, user, params=None):
+    """Return the queryset a viewset builds for a GET request"""
+    request = Request(APIRequestFactory().get("/", params or {}))
+    request.user = user
+    view = viewset()
+    view.request = request
+    view.format_kwarg = None
+    return view.get_queryset()
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are PostgreSQL only")
+class TestQueryPlans(TestCase):
+    """Test the hot view querysets are served by an index"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.task_list = TaskList.objects.create(name="List", created_by=self.user)
+        for i in range(20):
+            Task.objects.create(
+                title=f"Task {i}",
+                created_by=self.user,
+                task_list=self.task_list if i % 2 else None,
+                due_date=timezone.now() if i % 3 else None,
+            )
+        with connection.cursor() as cursor:
+            # Tiny tables are always cheaper to scan sequentially
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertIndexScan(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan, msg=plan)
+
+    def owner_index(self):
+        """Name of the index Django adds to the created_by foreign key"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Task._meta.db_table
+            )
+        return next(
+            name
+            for name, constraint in constraints.items()
+            if constraint["index"] and constraint["columns"] == ["created_by_id"]
+        )
+
+    def test_task_list_uses_index(self):
+        """Test listing tasks seeks the owner index"""
+        queryset = get_view_queryset(TaskViewSet, self.user)
+        self.assertIndexScan(queryset.order_by("created_at", "id"), self.owner_index())
+
+    def test_task_list_by_list_uses_index(self):
+        """Test listing tasks of a list seeks the owner/list index"""
+        params = {"list": str(self.task_list.list_uuid)}
+        queryset = get_view_queryset(TaskViewSet, self.user, params)
+        self.assertIndexScan(
+            queryset.order_by("created_at", "id"), "task_owner_list_created_idx"
+        )
+
+    def test_upcoming_uses_partial_index(self):
+        """Test upcoming tasks seek the partial due date index"""
+        queryset = get_view_queryset(TaskViewSet, self.user)
+        queryset = queryset.filter(due_date__isnull=False).order_by("due_date", "id")
+        self.assertIndexScan(queryset, "task_owner_due_date_idx")
+
+    def test_agenda_uses_partial_index(self):
+        """Test the agenda is one range seek on the due date index"""
+        queryset = get_view_queryset(TaskViewSet, self.user)
+        _, bounds = agenda_bounds(timezone.now(), timezone.utc)
+        self.assertIndexScan(agenda_queryset(queryset, bounds), "task_owner_due_date_idx")
+
+    def test_count_uses_index(self):
+        """Test counting completed tasks reads the owner/completed index"""
+        queryset = get_view_queryset(TaskViewSet, self.user)
+        self.assertIndexScan(
+            queryset.filter(completed=True).order_by(), "task_owner_completed_idx"
+        )
+
+    def test_task_lists_uses_index(self):
+        """Test listing task lists seeks the owner index"""
+        queryset = get_view_queryset(TaskListViewSet, self.user)
+        self.assertIndexScan(queryset, "tasklist_owner_created_idx")
@@ -1,7 +1,8 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
-from todo_api.models import Task, TaskList
+from todo_api.models import Task, TaskList, TaskStats, _remember_inbox
 
 from django.utils import timezone
 
@@ -45,3 +46,70 @@ class TestsModels(TestCase):
         self.task.due_date = due_date
         self.task.save()
         self.assertEqual(self.task.due_date, due_date)
+
+
+class TestsInboxResolver(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testexample12345'
+        )
+        self.user_two = get_user_model().objects.create_user(
+            email='usertwo@example.com',
+            password='testexample12345'
+        )
+
+    def test_task_without_list_uses_owner_inbox(self):
+        """Test each user's tasks land in their own inbox"""
+        task = Task.objects.create(title='Task', created_by=self.user)
+        task_two = Task.objects.create(title='Task', created_by=self.user_two)
+
+        self.assertEqual(task.task_list.created_by, self.user)
+        self.assertEqual(task_two.task_list.created_by, self.user_two)
+        self.assertEqual(TaskList.objects.filter(name='inbox').count(), 2)
+
+    def test_get_inbox_is_unique_per_user(self):
+        """Test resolving the inbox twice returns the same list"""
+        inbox = TaskList.objects.get_inbox(self.user.pk)
+        self.assertEqual(TaskList.objects.get_inbox(self.user.pk), inbox)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TaskList.objects.create(name='inbox', created_by=self.user)
+
+    def test_cached_inbox_costs_one_insert(self):
+        """Test creating a task with a cached inbox skips list queries"""
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskList.objects.get_inbox_uuid(self.user.pk)
+        TaskStats.objects.create(user=self.user)
+
+        # The task INSERT, the collection version bump and the counters
+        # of the inbox and of the user
+        with self.assertNumQueries(4):
+            Task.objects.create(title='Task', created_by=self.user)
+
+    def test_deleted_inbox_is_forgotten(self):
+        """Test deleting the inbox invalidates the cached list_uuid"""
+        with self.captureOnCommitCallbacks(execute=True):
+            inbox = TaskList.objects.get_inbox(self.user.pk)
+        inbox.delete()
+
+        task = Task.objects.create(title='Task', created_by=self.user)
+
+        self.assertNotEqual(task.task_list_id, inbox.list_uuid)
+        self.assertTrue(TaskList.objects.filter(list_uuid=task.task_list_id).exists())
+
+    def test_inbox_deleted_by_another_process(self):
+        """Test a task saved to a stale cached inbox moves to the current one"""
+        with self.captureOnCommitCallbacks(execute=True):
+            inbox = TaskList.objects.get_inbox(self.user.pk)
+        inbox.delete()
+        # Another worker deleted it, this one still holds the list_uuid
+        _remember_inbox(self.user.pk, inbox.list_uuid)
+
+        task = Task.objects.create(title='Task', completed=True, created_by=self.user)
+
+        current = TaskList.objects.get(name='inbox', created_by=self.user)
+        self.assertEqual(task.task_list_id, current.list_uuid)
+        self.assertEqual(Task.objects.get(pk=task.pk).task_list_id, current.list_uuid)
+        self.assertEqual((current.task_count, current.completed_count), (1, 1))
+        stats = TaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.task_count, stats.completed_count), (1, 1))
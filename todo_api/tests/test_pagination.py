@@ -0,0 +1,100 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_UPCOMING_URL = reverse("todo_api:tasks-upcoming")
+
+
+def create_task(user, **params):
+    payload = {"title": "Task", "completed": False}
+    payload.update(params)
+    return Task.objects.create(created_by=user, **payload)
+
+
+class TestTaskCursorPagination(TestCase):
+    """Test keyset pagination of task collections"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url, params):
+        """Follow next links and return the ids of every page"""
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([task["id"] for task in res.data["results"]])
+            if res.data["next"] is None:
+                return pages, res
+            res = self.client.get(res.data["next"])
+
+    def test_list_pages_follow_created_at_and_id(self):
+        """Test pages cover every task once even with equal created_at"""
+        tasks = [create_task(user=self.user, title=f"task {i}") for i in range(5)]
+        Task.objects.filter(id__in=[t.id for t in tasks[1:4]]).update(
+            created_at=tasks[1].created_at
+        )
+
+        pages, _ = self.walk(TASKS_URL, {"page_size": 2})
+
+        expected = list(
+            Task.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_list_previous_link_returns_prior_page(self):
+        """Test previous cursor seeks back to the page before"""
+        for i in range(5):
+            create_task(user=self.user, title=f"task {i}")
+
+        first = self.client.get(TASKS_URL, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(back.status_code, status.HTTP_200_OK)
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    @override_settings(TASKS_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        """Test page_size cannot exceed the server-side maximum"""
+        for i in range(5):
+            create_task(user=self.user, title=f"task {i}")
+
+        res = self.client.get(TASKS_URL, {"page_size": 500})
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIsNotNone(res.data["next"])
+
+    def test_invalid_cursor_not_found(self):
+        """Test a tampered cursor returns 404"""
+        res = self.client.get(TASKS_URL, {"cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_upcoming_pages_follow_due_date(self):
+        """Test upcoming tasks are paginated by due date"""
+        now = timezone.now()
+        for days in (3, 1, 2):
+            create_task(user=self.user, due_date=now + timezone.timedelta(days=days))
+        create_task(user=self.user)
+
+        pages, _ = self.walk(TASKS_UPCOMING_URL, {"page_size": 2})
+
+        expected = list(
+            Task.objects.filter(due_date__isnull=False)
+            .order_by("due_date", "id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(sum(pages, []), expected)
@@ -0,0 +1,71 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from todo_api.models import Task, TaskList
+from todo_api.serializers import RowSerializer, TaskListSerializer, TaskSerializer
+
+TASKS_URL = reverse("todo_api:tasks-list")
+
+
+class TestRowSerializer(TestCase):
+    """Test the values_list fast path of TaskSerializer"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.task_list = TaskList.objects.create(name="List", created_by=self.user)
+        now = timezone.now()
+        Task.objects.create(title="Plain", created_by=self.user)
+        Task.objects.create(
+            title="Dated",
+            completed=True,
+            created_by=self.user,
+            task_list=self.task_list,
+            due_date=now.replace(microsecond=0),
+        )
+        Task.objects.create(
+            title="Précis ✓",
+            created_by=self.user,
+            due_date=now + timezone.timedelta(days=400),
+        )
+        self.queryset = Task.objects.order_by("created_at", "id")
+
+    def test_output_is_byte_identical(self):
+        """Test rendered rows match TaskSerializer byte for byte"""
+        rows = RowSerializer(TaskSerializer())
+        renderer = JSONRenderer()
+
+        expected = renderer.render(TaskSerializer(self.queryset, many=True).data)
+        fast = renderer.render(rows.to_representation(rows.get_queryset(self.queryset)))
+
+        self.assertEqual(fast, expected)
+
+    def test_extra_columns_are_not_serialized(self):
+        """Test pagination columns stay out of the representation"""
+        rows = RowSerializer(TaskSerializer())
+        data = rows.to_representation(
+            rows.get_queryset(self.queryset, extra_columns=("created_at", "id"))
+        )
+        self.assertEqual(data, TaskSerializer(self.queryset, many=True).data)
+
+    def test_unsupported_serializer_rejected(self):
+        """Test serializers with unknown field types are not compiled"""
+        with self.assertRaises(ValueError):
+            RowSerializer(TaskListSerializer())
+
+    def test_list_view_query_count_is_constant(self):
+        """Test listing tasks does not load task lists row by row"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        # Collection version lookup and the page of rows
+        with self.assertNumQueries(2):
+            res = client.get(TASKS_URL)
+
+        self.assertEqual(len(res.data["results"]), 3)
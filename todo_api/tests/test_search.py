@@ -0,0 +1,115 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task, TaskList
+
+TASKS_SEARCH_URL = reverse("todo_api:tasks-search")
+TASKS_BULK_URL = reverse("todo_api:tasks-bulk")
+
+
+class TestTaskSearch(TestCase):
+    """Test full-text search through /api/tasks/search/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.task_list = TaskList.objects.create(name="Work", created_by=self.user)
+
+    def create_task(self, title, **kwargs):
+        return Task.objects.create(title=title, created_by=self.user, **kwargs)
+
+    def search(self, q, **params):
+        res = self.client.get(TASKS_SEARCH_URL, {"q": q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def titles(self, q, **params):
+        return [item["title"] for item in self.search(q, **params)["results"]]
+
+    def test_search_matches_every_term(self):
+        """Test only tasks containing all the terms are returned"""
+        self.create_task("Buy milk")
+        self.create_task("Buy bread", task_list=self.task_list)
+        self.create_task("Call mom")
+
+        self.assertEqual(sorted(self.titles("buy")), ["Buy bread", "Buy milk"])
+        self.assertEqual(self.titles("buy milk"), ["Buy milk"])
+        self.assertEqual(self.titles("dentist"), [])
+
+    def test_results_ranked_by_relevance(self):
+        """Test tasks matching the terms more often come first"""
+        self.create_task("Report draft for the quarterly meeting")
+        self.create_task("Report report report")
+
+        self.assertEqual(
+            self.titles("report"),
+            ["Report report report", "Report draft for the quarterly meeting"],
+        )
+
+    def test_index_follows_writes(self):
+        """Test saved, bulk written and deleted tasks are reindexed"""
+        task = self.create_task("Water plants")
+        task.title = "Feed cat"
+        task.save()
+        self.client.post(
+            TASKS_BULK_URL, {"create": [{"title": "Feed dog"}]}, format="json"
+        )
+
+        self.assertEqual(self.titles("plants"), [])
+        self.assertEqual(sorted(self.titles("feed")), ["Feed cat", "Feed dog"])
+
+        task.delete()
+        self.assertEqual(self.titles("feed"), ["Feed dog"])
+
+    def test_pages_follow_the_cursor(self):
+        """Test paging returns every match exactly once"""
+        for index in range(5):
+            self.create_task(f"Shopping {'item ' * index}")
+        titles = []
+        data = self.search("shopping", page_size=2)
+        while True:
+            titles += [item["title"] for item in data["results"]]
+            if not data["next"]:
+                break
+            data = self.client.get(data["next"]).data
+
+        self.assertEqual(len(titles), 5)
+        self.assertEqual(len(set(titles)), 5)
+
+    def test_search_filtered_by_list(self):
+        """Test ?list= restricts the search to a task list"""
+        self.create_task("Plan trip")
+        self.create_task("Plan sprint", task_list=self.task_list)
+
+        titles = self.titles("plan", list=str(self.task_list.list_uuid))
+
+        self.assertEqual(titles, ["Plan sprint"])
+
+    def test_search_syntax_is_escaped(self):
+        """Test quotes and operators in the terms are matched literally"""
+        self.create_task('Fix "NEAR" OR bug')
+
+        self.assertEqual(self.titles('"near OR'), ['Fix "NEAR" OR bug'])
+        self.assertEqual(self.titles('"'), [])
+
+    def test_other_users_tasks_hidden(self):
+        """Test a user never finds another user's tasks"""
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="userexample123"
+        )
+        Task.objects.create(title="Secret plan", created_by=other)
+
+        self.assertEqual(self.titles("secret"), [])
+
+    def test_terms_required(self):
+        """Test searching without terms returns bad request"""
+        res = self.client.get(TASKS_SEARCH_URL, {"q": "  "})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
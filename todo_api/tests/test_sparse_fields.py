@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task, TaskList
+
+TASKS_URL = reverse("todo_api:tasks-list")
+TASKS_UPCOMING_URL = reverse("todo_api:tasks-upcoming")
+TASKS_LISTS_URL = reverse("todo_api:lists-list")
+
+
+def task_detail_url(task_uuid):
+    return reverse("todo_api:tasks-detail", args=[task_uuid])
+
+
+class TestSparseFields(TestCase):
+    """Test ?fields= and ?omit= on task and list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(
+            title="Task", created_by=self.user, due_date=timezone.now()
+        )
+
+    def test_fields_selects_task_fields(self):
+        """Test only the requested fields are serialized"""
+        res = self.client.get(TASKS_URL, {"fields": "task_uuid,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [{"task_uuid": str(self.task.task_uuid), "title": "Task"}],
+        )
+
+    def test_omit_drops_task_fields(self):
+        """Test omitted fields are removed from upcoming tasks"""
+        res = self.client.get(TASKS_UPCOMING_URL, {"omit": "task_list,due_date"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data["results"][0]), {"id", "task_uuid", "title", "completed"}
+        )
+
+    def test_fields_pushed_down_to_queryset(self):
+        """Test columns outside the selection are not read"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TASKS_URL, {"fields": "title"})
+
+        task_select = [q["sql"] for q in queries if 'FROM "todo_api_task"' in q["sql"]]
+        self.assertEqual(len(task_select), 1)
+        self.assertIn('"todo_api_task"."title"', task_select[0])
+        self.assertNotIn('"todo_api_task"."completed"', task_select[0])
+        self.assertNotIn('"todo_api_task"."task_uuid"', task_select[0])
+
+    def test_fields_on_task_detail(self):
+        """Test nested detail fields can be dropped"""
+        res = self.client.get(
+            task_detail_url(self.task.task_uuid), {"omit": "created_by,task_list"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("created_by", res.data)
+        self.assertNotIn("task_list", res.data)
+        self.assertEqual(res.data["title"], "Task")
+
+    def test_fields_on_task_lists(self):
+        """Test task lists support sparse fieldsets"""
+        TaskList.objects.create(name="List", created_by=self.user)
+
+        res = self.client.get(TASKS_LISTS_URL, {"fields": "name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{"name": "inbox"}, {"name": "List"}])
+
+    def test_fields_ignored_on_writes(self):
+        """Test writes always return the full representation"""
+        res = self.client.post(f"{TASKS_URL}?fields=title", {"title": "New"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("task_uuid", res.data)
@@ -0,0 +1,160 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from todo_api.models import Task, TaskList, Tombstone
+
+SYNC_CHANGES_URL = reverse("todo_api:sync-changes")
+TASKS_BULK_URL = reverse("todo_api:tasks-bulk")
+
+
+class TestSyncChanges(TestCase):
+    """Test delta sync through /api/sync/changes/"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.task_list = TaskList.objects.create(name="Work", created_by=self.user)
+        self.task = Task.objects.create(
+            title="Task", created_by=self.user, task_list=self.task_list
+        )
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        res = self.client.get(SYNC_CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync(self):
+        """Test syncing without a token returns every list and task"""
+        data = self.sync()
+
+        self.assertEqual([item["name"] for item in data["lists"]], ["Work"])
+        self.assertEqual([item["title"] for item in data["tasks"]], ["Task"])
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+        self.assertIn("updated_at", data["tasks"][0])
+
+    def test_only_changes_since_token(self):
+        """Test a token returns only the rows written after it"""
+        token = self.sync()["sync_token"]
+        self.assertEqual(self.sync(token)["tasks"], [])
+
+        self.task.title = "Renamed"
+        self.task.save()
+        data = self.sync(token)
+
+        self.assertEqual([item["title"] for item in data["tasks"]], ["Renamed"])
+        self.assertEqual(data["lists"], [])
+        self.assertEqual(self.sync(data["sync_token"])["tasks"], [])
+
+    def test_partial_saves_are_synced(self):
+        """Test a save with update_fields writes the version sync reads"""
+        token = self.sync()["sync_token"]
+
+        self.task.title = "Renamed"
+        self.task.save(update_fields=["title"])
+        self.task_list.name = "Home"
+        self.task_list.save(update_fields=["name"])
+        data = self.sync(token)
+
+        self.assertEqual([item["title"] for item in data["tasks"]], ["Renamed"])
+        self.assertEqual([item["name"] for item in data["lists"]], ["Home"])
+
+    def test_deletions_are_synced(self):
+        """Test deleted tasks and lists are returned as tombstones"""
+        token = self.sync()["sync_token"]
+        task_uuid = self.task.task_uuid
+        self.task.delete()
+        self.task_list.delete()
+
+        data = self.sync(token)
+
+        self.assertEqual(
+            [(item["kind"], item["object_uuid"]) for item in data["deleted"]],
+            [
+                (Tombstone.TASK, str(task_uuid)),
+                (Tombstone.LIST, str(self.task_list.list_uuid)),
+            ],
+        )
+
+    def test_bulk_writes_are_synced(self):
+        """Test bulk creates, updates and deletes are stamped for sync"""
+        other = Task.objects.create(title="Other", created_by=self.user)
+        token = self.sync()["sync_token"]
+
+        self.client.post(
+            TASKS_BULK_URL,
+            {
+                "create": [{"title": "New"}],
+                "update": [{"task_uuid": str(self.task.task_uuid), "completed": True}],
+                "delete": [str(other.task_uuid)],
+            },
+            format="json",
+        )
+        data = self.sync(token)
+
+        self.assertEqual(
+            sorted(item["title"] for item in data["tasks"]), ["New", "Task"]
+        )
+        self.assertEqual(
+            [item["object_uuid"] for item in data["deleted"]], [str(other.task_uuid)]
+        )
+
+    def test_pages_follow_the_token(self):
+        """Test paging with has_more returns every change exactly once"""
+        self.client.post(
+            TASKS_BULK_URL,
+            {"create": [{"title": f"Bulk {index}"} for index in range(3)]},
+            format="json",
+        )
+        token, names, titles, pages = None, [], [], 0
+        while True:
+            data = self.sync(token, page_size=2)
+            names += [item["name"] for item in data["lists"]]
+            titles += [item["title"] for item in data["tasks"]]
+            token = data["sync_token"]
+            pages += 1
+            if not data["has_more"]:
+                break
+
+        # The bulk tasks share a version and are split across pages
+        self.assertEqual(sorted(names), ["Work", "inbox"])
+        self.assertEqual(sorted(titles), ["Bulk 0", "Bulk 1", "Bulk 2", "Task"])
+        self.assertEqual(pages, 3)
+
+    def test_other_users_changes_hidden(self):
+        """Test a user never syncs another user's rows"""
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="userexample123"
+        )
+        Task.objects.create(title="Hidden", created_by=other)
+
+        data = self.sync()
+
+        self.assertNotIn("Hidden", [item["title"] for item in data["tasks"]])
+
+    def test_query_count_is_constant(self):
+        """Test a sync reads each source with one query"""
+        with self.assertNumQueries(3):
+            self.sync()
+
+    def test_invalid_token_rejected(self):
+        """Test malformed tokens return bad request"""
+        res = self.client.get(SYNC_CHANGES_URL, {"since": "not-a-token"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_take_increasing_versions(self):
+        """Test every write is stamped with a newer version"""
+        version = self.task.sync_version
+        self.task.save()
+
+        self.assertGreater(self.task.sync_version, version)
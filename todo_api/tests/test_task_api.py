@@ -76,7 +76,7 @@ class TestPrivateTaskAPI(TestCase):
         serializer = TaskSerializer(tasks, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_tasks_failure_list_not_found(self):
         """Test retrieve list of tasks failure list not found"""
@@ -104,8 +104,8 @@ class TestPrivateTaskAPI(TestCase):
         serializer = TaskSerializer(tasks, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 3)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_tasks_limited_to_user(self):
         """Test retrieve list of tasks limited to user"""
@@ -120,8 +120,8 @@ class TestPrivateTaskAPI(TestCase):
         serializer = TaskSerializer(tasks, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data["results"], serializer.data)
+        self.assertEqual(len(res.data["results"]), 2)
 
     def test_retrieve_task_details(self):
         """Test retrieving task's details from uuid4."""
@@ -203,11 +203,11 @@ class TestPrivateTaskAPI(TestCase):
         serializer_task3 = TaskSerializer(task3)
         serializer_task4 = TaskSerializer(task4)
 
-        self.assertEqual(len(res.data), 2)
-        self.assertIn(serializer_task.data, res.data)
-        self.assertIn(serializer_task2.data, res.data)
-        self.assertNotIn(serializer_task3.data, res.data)
-        self.assertNotIn(serializer_task4.data, res.data)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIn(serializer_task.data, res.data["results"])
+        self.assertIn(serializer_task2.data, res.data["results"])
+        self.assertNotIn(serializer_task3.data, res.data["results"])
+        self.assertNotIn(serializer_task4.data, res.data["results"])
 
     def test_filter_task_by_empty_list(self):
         list = create_list(user=self.user, name="shopping")
@@ -226,10 +226,10 @@ class TestPrivateTaskAPI(TestCase):
         serializer_task3 = TaskSerializer(task3)
         serializer_task4 = TaskSerializer(task4)
 
-        self.assertNotIn(serializer_task, res.data)
-        self.assertNotIn(serializer_task2, res.data)
-        self.assertIn(serializer_task3.data, res.data)
-        self.assertIn(serializer_task4.data, res.data)
+        self.assertNotIn(serializer_task, res.data["results"])
+        self.assertNotIn(serializer_task2, res.data["results"])
+        self.assertIn(serializer_task3.data, res.data["results"])
+        self.assertIn(serializer_task4.data, res.data["results"])
 
     def test_partial_update_task(self):
         """Test updating a task with patch"""
@@ -341,3 +341,49 @@ class TestPrivateTaskAPI(TestCase):
         self.assertEqual(
             res.data["message"], "List was not found. We cannot count tasks."
         )
+
+    def test_retrieve_count_upcoming_tasks_limited_to_user(self):
+        """Test counting upcoming tasks ignores other users tasks"""
+        user_two = create_user(email="email@test.com", password="userexample123")
+        create_task(user=user_two, due_date=timezone.now())
+        create_task(user=self.user, due_date=timezone.now(), completed=True)
+
+        res = self.client.get(TASKS_COUNT_URL, {"list": "upcoming"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["total"], 1)
+        self.assertEqual(res.data["completed"], 1)
+        self.assertEqual(res.data["uncompleted"], 0)
+
+    def test_retrieve_count_tasks_single_query(self):
+        """Test counting tasks runs a single aggregate query"""
+        create_task(user=self.user, completed=True)
+        create_task(user=self.user, completed=False)
+
+        # Collection version lookup and the aggregate
+        with self.assertNumQueries(2):
+            res = self.client.get(TASKS_COUNT_URL)
+
+        self.assertEqual(res.data["total"], 2)
+        self.assertEqual(res.data["completed"], 1)
+        self.assertEqual(res.data["uncompleted"], 1)
+
+    def test_retrieve_count_tasks_for_all_lists(self):
+        """Test counting tasks of every list in one request"""
+        list = create_list(user=self.user, name="shopping")
+        list2 = create_list(user=self.user, name="job")
+        create_list(user=create_user(email="email@test.com"), name="other")
+        create_task(user=self.user, completed=True, task_list=list)
+        create_task(user=self.user, completed=False, task_list=list)
+
+        # Collection version lookup and the grouped aggregate
+        with self.assertNumQueries(2):
+            res = self.client.get(TASKS_COUNT_URL, {"lists": "all"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        counts = {item["list_uuid"]: item for item in res.data}
+        self.assertEqual(len(counts), 2)
+        self.assertEqual(counts[str(list.list_uuid)]["total"], 2)
+        self.assertEqual(counts[str(list.list_uuid)]["completed"], 1)
+        self.assertEqual(counts[str(list2.list_uuid)]["total"], 0)
+        self.assertEqual(counts[str(list2.list_uuid)]["name"], "job")
@@ -1,12 +1,13 @@
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from todo_api.models import TaskList
-from todo_api.serializers import TaskListSerializer
+from todo_api.models import Task, TaskList, _remember_inbox
+from todo_api.serializers import TaskListSummarySerializer
 
 TASKS_LISTS_URL = reverse("todo_api:lists-list")
 
@@ -56,7 +57,7 @@ class TestPrivateTaskListAPI(TestCase):
         res = self.client.get(TASKS_LISTS_URL)
 
         tasks_list = TaskList.objects.all().order_by("created_at")
-        serializer = TaskListSerializer(tasks_list, many=True)
+        serializer = TaskListSummarySerializer(tasks_list, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -76,7 +77,7 @@ class TestPrivateTaskListAPI(TestCase):
         tasks_list = TaskList.objects.filter(created_by=self.user).order_by(
             "created_at"
         )
-        serializer = TaskListSerializer(tasks_list, many=True)
+        serializer = TaskListSummarySerializer(tasks_list, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -102,6 +103,20 @@ class TestPrivateTaskListAPI(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertTrue(exists)
 
+    def test_retrieve_inbox_deleted_by_another_process(self):
+        """Test the inbox is found again once its cached list_uuid is stale"""
+        url = list_detail_url("inbox")
+        with self.captureOnCommitCallbacks(execute=True):
+            stale = self.client.get(url).data["list_uuid"]
+        TaskList.objects.get(list_uuid=stale).delete()
+        # Another worker deleted it, this one still holds the list_uuid
+        _remember_inbox(self.user.pk, stale)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["list_uuid"], stale)
+
     def test_retrieve_unique_inbox_for_each_account(self):
         """Test retrieve and create unique inbox for account"""
         user_two = get_user_model().objects.create(
@@ -136,3 +151,90 @@ class TestPrivateTaskListAPI(TestCase):
         res = self.client.patch(url, {"name": "new name"})
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         self.assertNotEqual(list.name, "new name")
+
+    def test_create_second_inbox_failure(self):
+        """Test a user cannot create a second inbox list"""
+        self.client.get(list_detail_url("inbox"))
+        res = self.client.post(TASKS_LISTS_URL, {"name": "inbox"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            TaskList.objects.filter(name="inbox", created_by=self.user).count(), 1
+        )
+
+
+class TestTaskListCountsAPI(TestCase):
+    """Test task counts returned with the task lists"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userexample123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now().replace(microsecond=0)
+        self.work = create_task_list(user=self.user, name="Work")
+        self.empty = create_task_list(user=self.user, name="Empty")
+        for title, completed, days in (
+            ("Report", False, 3),
+            ("Slides", False, 1),
+            ("Review", False, None),
+            ("Mail", True, -2),
+        ):
+            Task.objects.create(
+                title=title,
+                completed=completed,
+                due_date=self.now + timezone.timedelta(days=days) if days else None,
+                task_list=self.work,
+                created_by=self.user,
+            )
+
+    def test_list_returns_counts(self):
+        """Test each list carries its counts and next due date"""
+        res = self.client.get(TASKS_LISTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        work, empty = res.data
+        self.assertEqual(work["task_count"], 4)
+        self.assertEqual(work["completed_count"], 1)
+        # Completed tasks are not due anymore
+        self.assertEqual(
+            work["next_due_date"],
+            (self.now + timezone.timedelta(days=1)).isoformat().replace("+00:00", "Z"),
+        )
+        self.assertEqual(empty["task_count"], 0)
+        self.assertEqual(empty["completed_count"], 0)
+        self.assertIsNone(empty["next_due_date"])
+
+    def test_list_counts_in_one_query(self):
+        """Test the counts do not add a query per list"""
+        for index in range(5):
+            create_task_list(user=self.user, name=f"List {index}")
+
+        # The collection version and the annotated lists
+        with self.assertNumQueries(2):
+            res = self.client.get(TASKS_LISTS_URL)
+
+        self.assertEqual(len(res.data), 7)
+
+    def test_retrieve_returns_counts(self):
+        """Test a single list carries its counts, the inbox included"""
+        Task.objects.create(title="Inbox task", created_by=self.user)
+
+        res = self.client.get(list_detail_url(self.work.list_uuid))
+        inbox = self.client.get(list_detail_url("inbox"))
+
+        self.assertEqual(res.data["task_count"], 4)
+        self.assertEqual(res.data["completed_count"], 1)
+        self.assertEqual(inbox.data["task_count"], 1)
+        self.assertIsNone(inbox.data["next_due_date"])
+
+    def test_counts_follow_task_changes(self):
+        """Test cached lists are refreshed when a task changes"""
+        self.client.get(TASKS_LISTS_URL)
+        task = Task.objects.get(title="Slides")
+        task.completed = True
+        task.save()
+
+        res = self.client.get(TASKS_LISTS_URL)
+
+        self.assertEqual(res.data[0]["completed_count"], 2)
@@ -4,7 +4,7 @@ URLs mapping for todo_api
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from .views import (
-    TaskViewSet, TaskListViewSet
+    TaskViewSet, TaskListViewSet, SyncChangesView
 )
 
 router = DefaultRouter()
@@ -16,5 +16,6 @@ urlpatterns = [
     path('', include(router.urls)),
     path('tasks/count/', TaskViewSet.as_view({'GET': 'count'}), name='tasks-count'),
     path('tasks/upcoming/', TaskViewSet.as_view({'GET': 'upcoming'}), name='tasks-upcoming'),
+    path('sync/changes/', SyncChangesView.as_view(), name='sync-changes'),
     path('lists/find-by-name/', TaskListViewSet.as_view({'GET': 'find-by-name'}), name='lists-find-by-name'),
 ]
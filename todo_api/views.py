@@ -2,48 +2,150 @@
 Views for todo_api endpoints
 """
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import permissions, viewsets, status
-from .models import Task, TaskList
+from .models import (
+    INBOX_NAME,
+    CollectionVersion,
+    Task,
+    TaskList,
+    TaskStats,
+    Tombstone,
+    invalidate_inbox,
+)
 from .serializers import (
     TaskSerializer,
     TaskDetailSerializer,
     TaskCreateSerializer,
-    TaskListSerializer,
+    TaskListSummarySerializer,
     TaskCountSerializer,
+    TaskListCountSerializer,
+    RowSerializer,
+    get_sparse_fields,
+)
+from .pagination import (
+    KeysetPagination,
+    SearchTaskCursorPagination,
+    TaskCursorPagination,
+    UpcomingTaskCursorPagination,
+)
+from .conditional import collection_condition
+from .cache import cached_response
+from .agenda import (
+    agenda_bounds,
+    agenda_queryset,
+    filter_upcoming,
+    get_timezone,
+    group_by_bucket,
 )
+from .export import EXPORTERS
+from .search import search_tasks
+from .sync import get_changes
 
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from urllib.parse import unquote
 import uuid
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+def parse_uuid(value):
+    """Return value as UUID or None when it is not a valid one"""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def parse_list_uuid(task_list):
+    """Decode a URL-encoded `list` parameter into a UUID, or raise ValueError"""
+    task_list = unquote(task_list)
+    return uuid.UUID(str(task_list).lower().replace(" ", "-"))
+
+
+def filter_task_list(queryset, task_list):
+    """Restrict a task queryset to the inbox or to a task list UUID"""
+    if task_list == "inbox":
+        return queryset.filter(task_list__name="inbox")
+    if task_list:
+        return queryset.filter(task_list__list_uuid=parse_list_uuid(task_list))
+    return queryset
+
+
+def count_aggregates(prefix=""):
+    """
+    Return total, completed and uncompleted aggregates for tasks.
+    Aliases must not shadow Task fields referenced by the filters.
+    """
+    completed = f"{prefix}completed"
+    return {
+        "task_count": Count(f"{prefix}id"),
+        "completed_count": Count(f"{prefix}id", filter=Q(**{completed: True})),
+        "uncompleted_count": Count(f"{prefix}id", filter=Q(**{completed: False})),
+    }
+
+
+def task_list_aggregates():
+    """
+    Return the next due date of uncompleted tasks to annotate on task
+    lists, computed in the query loading them. Task counts are stored on
+    the lists.
+    """
+    return {"next_due_date": Min("task__due_date", filter=Q(task__completed=False))}
+
+
+class SparseFieldsViewMixin:
+    """Load only the model fields needed by `?fields=` and `?omit=`"""
+
+    # Fields always loaded for lookups and cursor pagination
+    sparse_required_fields = ("id",)
+
+    def apply_sparse_fields(self, queryset):
+        params = self.request.query_params
+        if self.request.method != "GET" or not (params.get("fields") or params.get("omit")):
+            return queryset
+        serializer_fields = self.get_serializer_class()().fields
+        selected = get_sparse_fields(self.request, serializer_fields)
+        model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+        sources = {serializer_fields[name].source for name in selected}
+        return queryset.only(
+            *(model_fields & sources), *self.sparse_required_fields
+        )
+
+
+class TaskViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Class for viewset tasks"""
 
     model = Task
     serializer_class = TaskDetailSerializer
     queryset = Task.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = TaskCursorPagination
     lookup_field = "task_uuid"
+    sparse_required_fields = ("id", "created_at", "due_date")
+    # Read or write bucket by method, actions may pick another scope
+    throttle_scope = None
 
     def get_queryset(self):
-        queryset = self.queryset.filter(created_by=self.request.user)
-        task_list = self.request.query_params.get("list", "")
-        if task_list:
-            if task_list == "inbox":
-                queryset = queryset.filter(task_list__name="inbox")
-            elif task_list == "":
-                queryset = queryset
-            else:
-                task_list = unquote(task_list)  # Decode the URL-encoded string
-                task_list = str(task_list).lower().replace(" ", "-")
-                task_list = uuid.UUID(task_list)
-                queryset = queryset.filter(task_list__list_uuid=task_list)
+        queryset = self.filter_task_list(
+            self.queryset.filter(created_by=self.request.user)
+        )
+        queryset = self.apply_sparse_fields(queryset)
         return queryset.order_by("created_at").distinct()
 
+    def filter_task_list(self, queryset):
+        """Restrict the queryset to the task list in the query parameters"""
+        return filter_task_list(queryset, self.request.query_params.get("list", ""))
+
     # override get method
+    @collection_condition
+    @cached_response
     def list(self, request, *args, **kwargs):
         """
         Return the list of tasks for the authenticated user,
@@ -51,13 +153,13 @@ class TaskViewSet(viewsets.ModelViewSet):
         If the list is not specified, return the list of tasks in the inbox.
         In case inbox is not created, create it. If the list is not found,
         it wil return a 404 error.
+        Results are cursor paginated on (created_at, id), use `page_size`
+        to change the page length and follow `next`/`previous` links.
         """
         task_list = self.request.query_params.get("list", "")
         if task_list != "inbox" and task_list != "":
             try:
-                task_list = unquote(task_list)  # Decode the URL-encoded string
-                task_list = str(task_list).lower().replace(" ", "-")
-                list_uuid = uuid.UUID(task_list)
+                list_uuid = parse_list_uuid(task_list)
                 exists = get_object_or_404(TaskList, list_uuid=list_uuid)
                 if not exists:
                     return Response(
@@ -69,12 +171,33 @@ class TaskViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND,
                     data={"message": "Task list was not found. We cannot list tasks."},
                 )
-        return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.paginate_rows(queryset, self.paginator)
+
+    def get_row_serializer(self):
+        """Compiled read-only fast path of TaskSerializer, if available"""
+        try:
+            return RowSerializer(TaskSerializer(context=self.get_serializer_context()))
+        except ValueError:
+            return None
+
+    def paginate_rows(self, queryset, paginator):
+        """Paginate and serialize tasks, through the fast path if possible"""
+        rows = self.get_row_serializer()
+        if rows is None:
+            page = paginator.paginate_queryset(queryset, self.request, view=self)
+            serializer = TaskSerializer(
+                page, many=True, context=self.get_serializer_context()
+            )
+            return paginator.get_paginated_response(serializer.data)
+        queryset = rows.get_queryset(queryset, extra_columns=paginator.ordering)
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(rows.to_representation(page))
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search_tasks", "agenda_tasks"):
             return TaskSerializer
-        elif self.action == "create" or self.action == "update":
+        elif self.action in ("create", "update", "bulk_tasks"):
             return TaskCreateSerializer
         elif self.action == "count_tasks":
             return TaskCountSerializer
@@ -84,101 +207,349 @@ class TaskViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
     @action(methods=["GET"], detail=False, url_path="count")
+    @collection_condition
+    @cached_response
     def count_tasks(self, queryset, *args, **kwargs):
         """
         Count completed tasks and retrieve count.
         If a task list is specified in the query parameters, it will count
         the tasks in that list.
         If the list is not found, it will return a 404 error.
+        Use `lists=all` to count the tasks of every list at once.
+        Counts are read from the counters of the lists and of TaskStats,
+        only upcoming tasks are counted on each request.
         """
+        if self.request.query_params.get("lists") == "all":
+            # Counters are stored on each list
+            lists = TaskList.objects.filter(created_by=self.request.user).order_by(
+                "created_at", "id"
+            )
+            serializer = TaskListCountSerializer(lists, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
         task_list = self.request.query_params.get("list", None)
         if task_list == "upcoming":
-            # Count upcoming tasks
-            tasks = Task.objects.filter(due_date__isnull=False)
-            tasks_completed = tasks.filter(completed=True).count()
-            tasks_uncompleted = tasks.filter(completed=False).count()
-            data = {
-                "total": tasks.count(),
-                "completed": tasks_completed,
-                "uncompleted": tasks_uncompleted,
-            }
+            # Count upcoming tasks, the only counts not stored
+            tasks = Task.objects.filter(created_by=self.request.user, due_date__isnull=False)
+            counts = tasks.aggregate(**count_aggregates())
+        elif task_list == "inbox":
+            # An inbox not created yet holds no tasks
+            inbox = TaskList.objects.filter(created_by=self.request.user, name=INBOX_NAME)
+            counts = inbox.first() or TaskList()
+        elif task_list:
+            # Count listed tasks using UUID
+            try:
+                list_uuid = parse_list_uuid(task_list)
+            except ValueError:
+                # If the conversion fails, handle the error gracefully
+                return Response(
+                    status=status.HTTP_404_NOT_FOUND,
+                    data={"message": "List was not found. We cannot count tasks."},
+                )
+            counts = get_object_or_404(
+                TaskList, created_by=self.request.user, list_uuid=list_uuid
+            )
         else:
-            # Count inbox tasks or listed tasks using UUID
-            if task_list and task_list != "inbox":
-                try:
-                    task_list = unquote(task_list)  # Decode the URL-encoded string
-                    task_list = str(task_list).lower().replace(" ", "-")
-                    list_uuid = uuid.UUID(task_list)
-                    exists = get_object_or_404(TaskList, list_uuid=list_uuid)
-                    if not exists:
-                        return Response(
-                            status=status.HTTP_404_NOT_FOUND,
-                            body={
-                                "message": "List was not found. We can not count tasks."
-                            },
-                        )
-                except ValueError:
-                    # If the conversion fails, handle the error gracefully
-                    return Response(
-                        status=status.HTTP_404_NOT_FOUND,
-                        data={"message": "List was not found. We cannot count tasks."},
-                    )
-            tasks = self.get_queryset().count()
-            tasks_completed = self.get_queryset().filter(completed=True).count()
-            tasks_uncompleted = self.get_queryset().filter(completed=False).count()
-            data = {
-                "total": tasks,
-                "completed": tasks_completed,
-                "uncompleted": tasks_uncompleted,
-            }
+            # A single primary key read of the user's counters
+            counts = TaskStats.objects.current(self.request.user.pk)
 
-        serializer = TaskCountSerializer(data, many=False)
+        serializer = TaskCountSerializer(counts, many=False)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(
+        methods=["POST"], detail=False, url_path="bulk", url_name="bulk", throttle_scope="bulk"
+    )
+    def bulk_tasks(self, request, *args, **kwargs):
+        """
+        Create, update and delete many tasks in a single transaction.
+        The body holds `create` and `update` arrays of task payloads, where
+        updates carry their `task_uuid`, and a `delete` array of task uuids.
+        Every item is validated before anything is written and the number
+        of queries does not grow with the number of items.
+        """
+        if not isinstance(request.data, dict):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        "Expected an object of create, update and delete arrays."
+                    ]
+                },
+            )
+        creates = request.data.get("create", [])
+        updates = request.data.get("update", [])
+        deletes = request.data.get("delete", [])
+        if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"message": "Operations must be sent as arrays."},
+            )
+        max_operations = getattr(settings, "TASKS_BULK_MAX_OPERATIONS", 1000)
+        if len(creates) + len(updates) + len(deletes) > max_operations:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"message": f"Bulk requests are limited to {max_operations} operations."},
+            )
+
+        # Resolve every referenced list with one query for the serializers
+        list_uuids = {
+            parse_uuid(item["task_list"])
+            for item in creates + updates
+            if isinstance(item, dict) and item.get("task_list")
+        }
+        list_uuids.discard(None)
+        context = self.get_serializer_context()
+        context["task_lists"] = {}
+        if list_uuids:
+            context["task_lists"] = {
+                task_list.list_uuid: task_list
+                for task_list in TaskList.objects.filter(
+                    created_by=request.user, list_uuid__in=list_uuids
+                )
+            }
+        create_serializer = TaskCreateSerializer(data=creates, many=True, context=context)
+        update_serializer = TaskCreateSerializer(
+            data=updates, many=True, partial=True, context=context
+        )
+        errors = {}
+        if not create_serializer.is_valid():
+            errors["create"] = create_serializer.errors
+        update_errors = [{} for _ in updates]
+        if not update_serializer.is_valid():
+            update_errors = update_serializer.errors
+        update_uuids = []
+        for index, item in enumerate(updates):
+            task_uuid = parse_uuid(item.get("task_uuid")) if isinstance(item, dict) else None
+            if task_uuid is None:
+                update_errors[index]["task_uuid"] = ["Must be a valid UUID."]
+            update_uuids.append(task_uuid)
+        if any(update_errors):
+            errors["update"] = update_errors
+        delete_uuids = [parse_uuid(item) for item in deletes]
+        if None in delete_uuids:
+            errors["delete"] = [
+                {} if task_uuid else {"task_uuid": ["Must be a valid UUID."]}
+                for task_uuid in delete_uuids
+            ]
+        if errors:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=errors)
+
+        results = {"create": [], "update": [], "delete": []}
+        with transaction.atomic():
+            # Bulk queries bypass Task.save and Task.delete: every row
+            # written by the request is stamped with this version
+            version = CollectionVersion.objects.bump(request.user.pk)
+            now = timezone.now()
+            # Locked so the counters see the stored state of each task
+            owned = {
+                task.task_uuid: task
+                for task in Task.objects.select_for_update().filter(
+                    created_by=request.user,
+                    task_uuid__in=set(update_uuids) | set(delete_uuids),
+                )
+            }
+
+            tasks = [
+                Task(created_by=request.user, sync_version=version, **data)
+                for data in create_serializer.validated_data
+            ]
+            # Tasks created or moved without a list go to the inbox, as in Task.save
+            inbox_uuid = None
+            if any(task.task_list_id is None for task in tasks) or any(
+                "task_list" in data and data["task_list"] is None
+                for data in update_serializer.validated_data
+            ):
+                inbox_uuid = TaskList.objects.get_inbox_uuid(request.user.pk)
+                for task in tasks:
+                    if task.task_list_id is None:
+                        task.task_list_id = inbox_uuid
+            Task.objects.bulk_create(tasks)
+            added = [(task.task_list_id, task.completed) for task in tasks]
+            removed = []
+            for task in tasks:
+                results["create"].append(
+                    {"id": task.id, "task_uuid": task.task_uuid, "status": "created"}
+                )
+
+            changed, fields = {}, set()
+            for task_uuid, data in zip(update_uuids, update_serializer.validated_data):
+                task = owned.get(task_uuid)
+                if task is not None:
+                    removed.append((task.task_list_id, task.completed))
+                    for field, value in data.items():
+                        setattr(task, field, value)
+                    if task.task_list_id is None:
+                        task.task_list_id = inbox_uuid
+                    added.append((task.task_list_id, task.completed))
+                    task.sync_version, task.updated_at = version, now
+                    fields.update(data, ["sync_version", "updated_at"])
+                    changed[task.pk] = task
+                results["update"].append(
+                    {
+                        "task_uuid": task_uuid,
+                        "status": "updated" if task is not None else "not_found",
+                    }
+                )
+            if changed and fields:
+                Task.objects.bulk_update(changed.values(), fields)
+
+            deleted = [task_uuid for task_uuid in delete_uuids if task_uuid in owned]
+            if deleted:
+                removed += [
+                    (owned[task_uuid].task_list_id, owned[task_uuid].completed)
+                    for task_uuid in deleted
+                ]
+                Task.objects.filter(created_by=request.user, task_uuid__in=deleted).delete()
+                Tombstone.objects.record(
+                    request.user.pk, Tombstone.TASK, deleted, version=version
+                )
+            missing = TaskStats.objects.record_tasks(request.user.pk, added, removed)
+            if missing and inbox_uuid:
+                TaskList.objects.replace_inbox(request.user.pk, inbox_uuid)
+            for task_uuid in delete_uuids:
+                results["delete"].append(
+                    {
+                        "task_uuid": task_uuid,
+                        "status": "deleted" if task_uuid in owned else "not_found",
+                    }
+                )
+
+        return Response(results, status=status.HTTP_200_OK)
+
     @action(methods=["GET"], detail=False, url_path="upcoming")
+    @collection_condition
+    @cached_response
     def upcoming_tasks(self, request, *args, **kwargs):
         """
-        List all upcoming tasks scheduled ordered by date
+        List all upcoming tasks scheduled ordered by date.
+        `?from=` and `?to=` take dates or datetimes, read in the `?tz=`
+        timezone when naive, and `?include_completed=false` hides done tasks.
         """
-        tasks = self.get_queryset().filter(due_date__isnull=False).order_by("due_date")
-        serializer = TaskSerializer(tasks, many=True)
-        return Response(serializer.data)
+        tasks = filter_upcoming(self.get_queryset(), request.query_params)
+        return self.paginate_rows(tasks.order_by("due_date"), UpcomingTaskCursorPagination())
 
+    @action(methods=["GET"], detail=False, url_path="agenda", url_name="agenda")
+    def agenda_tasks(self, request, *args, **kwargs):
+        """
+        Uncompleted tasks which are overdue or due today, tomorrow or
+        later this week in the `?tz=` timezone. Not cached: the buckets
+        move at midnight without the collection changing.
+        """
+        tz = get_timezone(request.query_params)
+        today, bounds = agenda_bounds(timezone.now(), tz)
+        tasks = agenda_queryset(self.get_queryset(), bounds)
+        rows = self.get_row_serializer()
+        if rows is None:
+            tasks = list(tasks)
+            items = TaskSerializer(
+                tasks, many=True, context=self.get_serializer_context()
+            ).data
+        else:
+            tasks = list(rows.get_queryset(tasks, extra_columns=("bucket",)))
+            items = rows.to_representation(tasks)
+        data = {"date": today.isoformat(), "timezone": str(tz)}
+        data.update(group_by_bucket((task.bucket for task in tasks), items))
+        return Response(data)
 
-class TaskListViewSet(viewsets.ModelViewSet):
+    @action(methods=["GET"], detail=False, url_path="search", url_name="search")
+    @collection_condition
+    @cached_response
+    def search_tasks(self, request, *args, **kwargs):
+        """
+        Full-text search of the user's task titles with `?q=`, most
+        relevant first. Results are cursor paginated on (rank, id).
+        """
+        terms = request.query_params.get("q", "").strip()
+        if not terms:
+            return Response(
+                {"detail": "Search terms are required in the q parameter."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        tasks = search_tasks(self.get_queryset(), terms)
+        return self.paginate_rows(tasks, SearchTaskCursorPagination())
+
+    @action(
+        methods=["GET"], detail=False, url_path="export", url_name="export", throttle_scope="bulk"
+    )
+    def export_tasks(self, request, *args, **kwargs):
+        """
+        Stream every list and task of the user as NDJSON (default) or CSV
+        """
+        # ?format= is reserved by DRF for renderer selection
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORTERS:
+            return Response(
+                {"detail": f"Unsupported export output. Choose one of: {', '.join(EXPORTERS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        exporter, content_type = EXPORTERS[output]
+        response = StreamingHttpResponse(
+            exporter(request.user.pk), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="tasks.{output}"'
+        return response
+
+
+class TaskListViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Class for viewset task lists"""
 
     model = TaskList
-    serializer_class = TaskListSerializer
+    serializer_class = TaskListSummarySerializer
     queryset = TaskList.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
     lookup_field = "list_uuid"
+    sparse_required_fields = ("id", "created_at")
 
     def get_queryset(self):
         queryset = self.queryset.filter(created_by=self.request.user)
+        queryset = self.apply_sparse_fields(queryset)
+        if self.action != "create":
+            queryset = queryset.annotate(**task_list_aggregates())
         return queryset.order_by("created_at").distinct()
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @collection_condition
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        """Return the task lists of the authenticated user"""
+        return super().list(request, *args, **kwargs)
+
     def retrieve(self, request, list_uuid=None, *args, **kwargs):
         """Using list_uuid to find task list and return a task_list object"""
         list_uuid = list_uuid.lower()
-        queryset = self.get_queryset()
+        inbox = list_uuid == "inbox"
+        if inbox:
+            # case inbox os is not created
+            list_uuid = str(TaskList.objects.get_inbox_uuid(self.request.user.pk))
         try:
-            if list_uuid == "inbox":
-                # case inbox os is not created
-                inbox = TaskList.objects.filter(
-                    name="inbox", created_by=self.request.user
-                ).exists()  # noqa: E501
-                if not inbox:
-                    TaskList.objects.create(name="inbox", created_by=self.request.user)
-                queryset = queryset.get(name__iexact="inbox")
-            else:
-                queryset = queryset.get(list_uuid__iexact=list_uuid)
+            queryset = self.get_queryset().get(list_uuid__iexact=list_uuid)
         except TaskList.DoesNotExist:
-            return Response(
-                status=status.HTTP_404_NOT_FOUND, data={"message": "List Not found."}
-            )
+            if not inbox:
+                return Response(
+                    status=status.HTTP_404_NOT_FOUND, data={"message": "List Not found."}
+                )
+            # The cached inbox was deleted by another process
+            invalidate_inbox(self.request.user.pk)
+            list_uuid = TaskList.objects.get_inbox(self.request.user.pk).list_uuid
+            queryset = self.get_queryset().get(list_uuid=list_uuid)
         serializer = self.get_serializer(queryset, many=False)
         return Response(serializer.data)
+
+
+class SyncChangesView(APIView):
+    """View for delta sync of task lists and tasks"""
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return the lists and tasks written, and the objects deleted, after
+        the `since` token. Omit `since` for a full sync. Store the returned
+        `sync_token` and request again while `has_more` is true; `page_size`
+        bounds the number of changes per response.
+        """
+        limit = KeysetPagination().get_page_size(request)
+        data = get_changes(request.user, request.query_params.get("since"), limit)
+        return Response(data, status=status.HTTP_200_OK)
@@ -1,11 +1,50 @@
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from core.metrics import observe_request
+from core.timing import RequestTimer, current_timer, install_query_timer
+
+logger = logging.getLogger("todo_project.requests")
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware running natively in both modes. Under ASGI a
+    sync-only middleware holds a thread for the rest of the request,
+    which would serialize the async views behind it.
+    """
 
+    sync_capable = True
+    async_capable = True
 
-class CorsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
 
     def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class CorsMiddleware(AsyncCapableMiddleware):
+    def handle(self, request):
         # Handle preflight requests
         if request.method == 'OPTIONS':
             response = HttpResponse('Not Allowed! CORS preflight request not allowed.')
@@ -13,9 +52,134 @@ class CorsMiddleware:
         else:
             response = self.get_response(request)
 
+        return self.add_headers(response)
+
+    async def __acall__(self, request):
+        if request.method == 'OPTIONS':
+            response = HttpResponse('Not Allowed! CORS preflight request not allowed.')
+        else:
+            response = await self.get_response(request)
+        return self.add_headers(response)
+
+    def add_headers(self, response):
         # Add CORS headers to the response
         response['Access-Control-Allow-Origin'] = '*'
         response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS, PATCH'
         response['Access-Control-Allow-Headers'] = '*'
 
         return response
+
+
+class WhiteNoiseMiddleware(AsyncCapableMiddleware, BaseWhiteNoiseMiddleware):
+    """WhiteNoise serving static files without blocking async requests"""
+
+    def __init__(self, get_response):
+        BaseWhiteNoiseMiddleware.__init__(self, get_response)
+        AsyncCapableMiddleware.__init__(self, get_response)
+
+    def handle(self, request):
+        return BaseWhiteNoiseMiddleware.__call__(self, request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Count the queries and DB time of every request and send them with
+    the serialization and total time in a Server-Timing header when
+    SERVER_TIMING_HEADER is on. Requests
+    slower than REQUEST_SLOW_THRESHOLD_MS are logged as one JSON line.
+
+    Queries are timed by an execute wrapper installed once per connection,
+    which adds to the timer of the current request through a context
+    variable, so queries of async views run in sync_to_async threads are
+    counted too and requests pay no per-query setup.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        connection_created.connect(install_query_timer)
+        self.header = getattr(settings, "SERVER_TIMING_HEADER", False)
+        self.slow_threshold = getattr(settings, "REQUEST_SLOW_THRESHOLD_MS", 500) / 1000
+
+    def handle(self, request):
+        # Connections opened before this middleware was loaded
+        for connection in connections.all():
+            install_query_timer(connection)
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        timer = RequestTimer()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer)
+
+    def finish(self, request, response, timer):
+        total = timer.total
+        if self.header:
+            response["Server-Timing"] = (
+                f'db;dur={timer.db * 1000:.1f};desc="{timer.queries} queries", '
+                f"serialize;dur={timer.serialize * 1000:.1f}, "
+                f"total;dur={total * 1000:.1f}"
+            )
+        if total >= self.slow_threshold:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_request",
+                        "method": request.method,
+                        "path": request.path,
+                        "status": response.status_code,
+                        "total_ms": round(total * 1000, 1),
+                        "db_ms": round(timer.db * 1000, 1),
+                        "queries": timer.queries,
+                        "serialize_ms": round(timer.serialize * 1000, 1),
+                    }
+                )
+            )
+        return response
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """
+    Record Prometheus latency, size, status and query count metrics per
+    route and DRF action. Placed after RequestTimingMiddleware, it reads
+    the query count from the request's timer.
+    """
+
+    def handle(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, started)
+        return response
+
+    def observe(self, request, response, started):
+        timer = current_timer.get()
+        observe_request(
+            request,
+            response,
+            time.perf_counter() - started,
+            queries=timer.queries if timer is not None else None,
+        )
@@ -8,6 +8,7 @@ import dotenv
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -60,8 +61,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "todo_project.middleware.RequestTimingMiddleware",
+    "todo_project.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "todo_project.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "todo_project.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -97,6 +100,28 @@ WSGI_APPLICATION = "todo_project.wsgi.application"
 DATABASE_URL = os.environ.get("DATABASE_URL")
 DATABASES = {"default": dj_database_url.config(default=DATABASE_URL, conn_max_age=600)}
 
+# Set DATABASE_POOL=true to share a bounded pool of connections between
+# the threads of each process instead of keeping one per thread, for
+# serverless functions and autoscaled workers (PostgreSQL only)
+if os.environ.get("DATABASE_POOL", "").lower() in ("1", "true", "yes"):
+    if DATABASES["default"].get("ENGINE") != "django.db.backends.postgresql":
+        raise ImproperlyConfigured("DATABASE_POOL needs a PostgreSQL DATABASE_URL")
+    DATABASES["default"].update(
+        ENGINE="core.backends.postgresql",
+        # Connections go back to the pool at the end of each request
+        CONN_MAX_AGE=0,
+        POOL={
+            "MIN_SIZE": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 0)),
+            "MAX_SIZE": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+            # Seconds before a connection is replaced, idle ones beyond
+            # MIN_SIZE are closed and a checkout waits for a free one.
+            # Connections open on demand, MIN_SIZE only keeps them alive.
+            "MAX_LIFETIME": float(os.environ.get("DATABASE_POOL_MAX_LIFETIME", 1800)),
+            "MAX_IDLE": float(os.environ.get("DATABASE_POOL_MAX_IDLE", 300)),
+            "TIMEOUT": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+        },
+    )
+
 if "test" in sys.argv or "test_coverage" in sys.argv:
     DATABASES = {
         "default": dj_database_url.config(
@@ -104,6 +129,32 @@ if "test" in sys.argv or "test_coverage" in sys.argv:
         )
     }
 
+# Cache
+# Set CACHE_URL (redis://...) to share the cache across workers. The
+# server should evict with an LRU policy such as allkeys-lru.
+
+CACHE_URL = os.environ.get("CACHE_URL")
+if CACHE_URL and not ("test" in sys.argv or "test_coverage" in sys.argv):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 5000))},
+        }
+    }
+    if "test" in sys.argv or "test_coverage" in sys.argv:
+        # Tests run in one process, their throttle buckets need no sharing
+        SILENCED_SYSTEM_CHECKS = ["core.W001"]
+
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -162,19 +213,62 @@ AUTH_USER_MODEL = "core.User"
 # Rest framework configuration
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",
+        "auth_api.authentication.StatelessJWTCookieAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "core.throttling.UserTokenBucketThrottle",
+        "core.throttling.AnonTokenBucketThrottle",
+    ),
+    # Token buckets, "num/period" refills num tokens over the period and
+    # an empty value turns the scope off
+    "DEFAULT_THROTTLE_RATES": {
+        "user_read": os.environ.get("THROTTLE_USER_READ", "600/min"),
+        "user_write": os.environ.get("THROTTLE_USER_WRITE", "120/min"),
+        "user_bulk": os.environ.get("THROTTLE_USER_BULK", "20/min"),
+        "anon_read": os.environ.get("THROTTLE_ANON_READ", "120/min"),
+        "anon_write": os.environ.get("THROTTLE_ANON_WRITE", "30/min"),
+        "anon_bulk": os.environ.get("THROTTLE_ANON_BULK", "10/min"),
+        # Login, logout and password views of dj-rest-auth
+        "user_dj_rest_auth": os.environ.get("THROTTLE_USER_AUTH", "30/min"),
+        "anon_dj_rest_auth": os.environ.get("THROTTLE_ANON_AUTH", "10/min"),
+    },
+    # Proxies in front of the app, so X-Forwarded-For gives the client IP
+    "NUM_PROXIES": int(os.environ["NUM_PROXIES"]) if os.environ.get("NUM_PROXIES") else None,
 }
 
+# Cache holding the throttle buckets, shared by every worker. Without
+# CACHE_URL it is per process and the core.W001 check warns about it.
+THROTTLE_CACHE_ALIAS = "default"
+
+# Keyset pagination for task collections
+TASKS_PAGE_SIZE = int(os.environ.get("TASKS_PAGE_SIZE", 100))
+TASKS_MAX_PAGE_SIZE = int(os.environ.get("TASKS_MAX_PAGE_SIZE", 1000))
+
+# Maximum number of operations accepted by /api/tasks/bulk/
+TASKS_BULK_MAX_OPERATIONS = int(os.environ.get("TASKS_BULK_MAX_OPERATIONS", 1000))
+
+# Rows fetched per database round trip by /api/tasks/export/
+TASKS_EXPORT_CHUNK_SIZE = int(os.environ.get("TASKS_EXPORT_CHUNK_SIZE", 2000))
+
 REST_AUTH_SERIALIZERS = {
     "USER_DETAILS_SERIALIZER": "core.serializers.UserSerializer",
 }
 
 REST_AUTH = {
     "USE_JWT": True,
+    "JWT_TOKEN_CLAIMS_SERIALIZER": "auth_api.serializers.ClaimsTokenObtainPairSerializer",
 }
 
 SITE_ID = 1  # https://dj-rest-auth.readthedocs.io/en/latest/installation.html#registration-optional
@@ -204,7 +298,32 @@ SIMPLE_JWT = {
     "UPDATE_LAST_LOGIN": True,
     "USER_ID_FIELD": "userId",  # for the custom user model
     "USER_ID_CLAIM": "user_id",
-    "SIGNING_KEY": os.getenv("JWT_SECRET_KEY"),
+    "SIGNING_KEY": os.getenv("JWT_SECRET_KEY", SECRET_KEY),
+}
+
+# Seconds a user loaded by stateless JWT authentication stays cached
+JWT_USER_CACHE_TIMEOUT = int(os.environ.get("JWT_USER_CACHE_TIMEOUT", 60))
+
+# Server-Timing header with the DB, serialization and total time of requests.
+# Off by default: it tells every client the query counts and DB time.
+SERVER_TIMING_HEADER = os.environ.get("SERVER_TIMING_HEADER", "False") == "True"
+# Requests slower than this are logged to todo_project.requests
+REQUEST_SLOW_THRESHOLD_MS = int(os.environ.get("REQUEST_SLOW_THRESHOLD_MS", 500))
+
+# Bearer token required to scrape /metrics, which is not served without one
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "todo_project.requests": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
 }
 
 # All auth social providers configuration
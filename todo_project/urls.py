@@ -3,9 +3,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics, name="metrics"),
     path("api/", include("todo_api.urls"), name="task"),
+    # Async read endpoints, meant to be served by an ASGI server
+    path("api/async/", include("todo_api.async_urls"), name="task-async"),
     path("api/user/", include("user_api.urls"), name="user"),
     path(
         "api/rest/auth/", include("dj_rest_auth.urls"), name="rest-auth"